@@ -1,71 +1,272 @@
 """
 Lambda Function: Commander Agent (Orchestrator)
 Uses AWS Bedrock (Claude AI) to synthesize findings from all agents
-and make final root cause determination with remediation steps.
+and make final root cause determination with remediation steps. With an
+evidence board in the event, it runs alongside the agents instead of after
+them and synthesizes as soon as the early-exit gate is met (see evidence_board).
 """
 
-import json
-import boto3
+import contextvars
 import os
-import urllib.parse
-import urllib.request
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from aws_clients import lazy_client
+from bedrock_client import BEDROCK_TIMEOUT_SECONDS, BEDROCK_WARMUP, invoke_claude, warm_up
+from claim_check import claim_checked
+from evidence_board import EVIDENCE_WAIT_SECONDS, EvidenceBoard, collect_and_synthesize
+from incident_similarity import SimilarityIndex, incident_features
+from instrumentation import current_span, instrumented_handler, span
+from llm_json import parse_llm_json
+from prompt_compaction import compact_evidence, estimate_tokens
+from report_store import ReportStore
+from response_cache import FileTier, MemoryTier, S3Tier, TwoTierCache, llm_cache_key
 
 # Environment variables
 BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-5-sonnet-20241022-v2:0')
-BEDROCK_API_KEY = os.environ.get('AWS_BEDROCK_API_KEY', '')
+BEDROCK_HEDGE_MODEL_ID = os.environ.get('BEDROCK_HEDGE_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
+BEDROCK_HEDGE_DELAY_SECONDS = float(os.environ.get('BEDROCK_HEDGE_DELAY_SECONDS', '8'))
+DEADLINE_SAFETY_MARGIN_MS = int(os.environ.get('DEADLINE_SAFETY_MARGIN_MS', '3000'))
+BEDROCK_MAX_TOKENS = 2000
+BEDROCK_TEMPERATURE = 0.3
+LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+LLM_CACHE_TTL_SECONDS = int(os.environ.get('LLM_CACHE_TTL_SECONDS', '86400'))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '128'))
+LLM_CACHE_BUCKET = os.environ.get('LLM_CACHE_BUCKET', '')
+LLM_CACHE_DIR = os.environ.get('LLM_CACHE_DIR', '/tmp/llm-cache')
+SIMILARITY_ENABLED = os.environ.get('SIMILARITY_ENABLED', 'true').lower() == 'true'
+SIMILARITY_BUCKET = os.environ.get('SIMILARITY_BUCKET', os.environ.get('REPORTS_BUCKET', 'hackathon-team14-bucket'))
+SIMILARITY_INDEX_TTL_SECONDS = int(os.environ.get('SIMILARITY_INDEX_TTL_SECONDS', '300'))
+SIMILARITY_TOP_K = int(os.environ.get('SIMILARITY_TOP_K', '3'))
+SIMILARITY_ATTACH_THRESHOLD = float(os.environ.get('SIMILARITY_ATTACH_THRESHOLD', '0.6'))
+SIMILARITY_SKIP_LLM_THRESHOLD = float(os.environ.get('SIMILARITY_SKIP_LLM_THRESHOLD', '0.95'))
+SIMILARITY_SKIP_MIN_CONFIDENCE = float(os.environ.get('SIMILARITY_SKIP_MIN_CONFIDENCE', '0.8'))
+# Synthesis paths whose indexed answers may stand in for an LLM call (verified entries always can)
+SIMILARITY_SKIP_SYNTHESES = [s.strip() for s in os.environ.get('SIMILARITY_SKIP_SYNTHESES', 'llm').split(',') if s.strip()]
 
-# Initialize Bedrock client (fallback to standard boto3)
-bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+# Response cache survives across warm invocations; the persistent tier is S3
+# when LLM_CACHE_BUCKET is set, otherwise a local directory stand-in
+if LLM_CACHE_BUCKET:
+    persistent_tier = S3Tier(lazy_client('s3'), LLM_CACHE_BUCKET)
+else:
+    persistent_tier = FileTier(LLM_CACHE_DIR)
+llm_cache = TwoTierCache(
+    MemoryTier(max_entries=LLM_CACHE_MAX_ENTRIES),
+    persistent_tier,
+    ttl_seconds=LLM_CACHE_TTL_SECONDS
+)
 
-def lambda_handler(event, context):
-    """Synthesize all agent findings using AI."""
+# Pre-warm the pooled Bedrock connection during Lambda init (optional)
+if BEDROCK_WARMUP:
+    warm_up(BEDROCK_MODEL_ID)
+
+# Past-incident index, loaded from the report index and refreshed after a TTL
+similarity_state = {'index': None, 'loaded_at': 0.0}
+
+
+def flatten_agent_outputs(agent_outputs):
+    """Flatten agent outputs (Step Functions returns nested arrays)."""
+    findings = []
+    for output in agent_outputs:
+        if isinstance(output, list):
+            findings.extend(output)
+        else:
+            findings.append(output)
+    return findings
+
+
+def split_agent_findings(agent_outputs):
+    """Return (logs, metrics, deploy) findings from Parallel state output."""
+    findings = flatten_agent_outputs(agent_outputs)
+    logs_findings = next((f for f in findings if f.get('agent') == 'LogsAgent'), {})
+    metrics_findings = next((f for f in findings if f.get('agent') == 'MetricsAgent'), {})
+    deploy_findings = next((f for f in findings if f.get('agent') == 'DeployAgent'), {})
+    return logs_findings, metrics_findings, deploy_findings
+
+
+def call_llm_with_hedge(prompt, context, on_field=None, max_tokens=BEDROCK_MAX_TOKENS):
+    """
+    Call Claude within the Lambda's remaining time. If the primary model has not
+    answered after BEDROCK_HEDGE_DELAY_SECONDS (or fails), fire the same prompt at
+    the faster hedge model and take whichever valid answer arrives first.
+    Returns (model_id, analysis); raises TimeoutError when the deadline passes.
+    Once it returns or raises, the losing attempt is cancelled and its fields
+    are no longer forwarded to on_field.
+    """
+    started = time.time()
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        budget_seconds = (context.get_remaining_time_in_millis() - DEADLINE_SAFETY_MARGIN_MS) / 1000
+    else:
+        budget_seconds = BEDROCK_TIMEOUT_SECONDS
+    deadline = started + budget_seconds
+    print(f"   Deadline: {budget_seconds:.1f}s for LLM synthesis")
+    
+    settled = threading.Event()
+    
+    def forward(name, value):
+        if not settled.is_set():
+            on_field(name, value)
+    
+    def attempt(model_id):
+        claude_response = invoke_claude(
+            prompt,
+            model_id=model_id,
+            max_tokens=max_tokens,
+            temperature=BEDROCK_TEMPERATURE,
+            on_field=forward if on_field is not None else None,
+            cancelled=settled
+        )
+        # Parse Claude's JSON response (tolerates code fences, prose and truncation)
+        return model_id, parse_llm_json(claude_response)
+    
+    # Each call gets its own workers: an abandoned attempt holds only its own
+    # thread, and stops reading its stream once the call has settled. Attempts
+    # run in a copy of the caller's context so their Bedrock calls land in its spans
+    executor = ThreadPoolExecutor(max_workers=2)
+    pending = {executor.submit(contextvars.copy_context().run, attempt, BEDROCK_MODEL_ID)}
+    can_hedge = bool(BEDROCK_HEDGE_MODEL_ID) and BEDROCK_HEDGE_MODEL_ID != BEDROCK_MODEL_ID
+    last_error = None
     
     try:
-        # Extract agent outputs from Step Functions Parallel state
-        # Parallel state passes results as a list directly
-        if isinstance(event, list):
-            agent_outputs = event
-        else:
-            agent_outputs = event.get('agent_outputs', [])
-        
-        print(f"🎖️  CommanderAgent synthesizing findings...")
-        print(f"   Received input type: {type(event)}")
-        print(f"   Processing {len(agent_outputs)} agent outputs")
-        
-        # Flatten agent outputs (Step Functions returns nested arrays)
-        findings = []
-        for output in agent_outputs:
-            if isinstance(output, list):
-                findings.extend(output)
-            else:
-                findings.append(output)
-        
-        # Extract each agent's findings
-        logs_findings = next((f for f in findings if f.get('agent') == 'LogsAgent'), {})
-        metrics_findings = next((f for f in findings if f.get('agent') == 'MetricsAgent'), {})
-        deploy_findings = next((f for f in findings if f.get('agent') == 'DeployAgent'), {})
-        
-        print(f"   Logs: {logs_findings.get('confidence', 0):.0%} confidence")
-        print(f"   Metrics: {metrics_findings.get('confidence', 0):.0%} confidence")
-        print(f"   Deploy: {deploy_findings.get('confidence', 0):.0%} confidence")
+        while pending or can_hedge:
+            now = time.time()
+            if now >= deadline:
+                raise TimeoutError(f"LLM synthesis exceeded {budget_seconds:.1f}s deadline")
+            
+            if can_hedge and (not pending or now - started >= BEDROCK_HEDGE_DELAY_SECONDS):
+                print(f"   🏁 Hedging with {BEDROCK_HEDGE_MODEL_ID} after {now - started:.1f}s")
+                pending.add(executor.submit(contextvars.copy_context().run, attempt, BEDROCK_HEDGE_MODEL_ID))
+                can_hedge = False
+            
+            wait_seconds = deadline - now
+            if can_hedge:
+                wait_seconds = min(wait_seconds, started + BEDROCK_HEDGE_DELAY_SECONDS - now)
+            done, pending = wait(pending, timeout=max(wait_seconds, 0), return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    print(f"⚠️  LLM attempt failed: {str(e)}")
+                    last_error = e
         
-        # Prepare prompt for Claude
-        prompt = f"""You are an expert incident response system analyzing a production outage. Review the following evidence from specialized agents and provide a comprehensive root cause analysis.
+        raise last_error
+    finally:
+        settled.set()
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_similarity_index():
+    """Similarity index over indexed reports; an unreadable index counts as empty until the TTL."""
+    now = time.time()
+    if similarity_state['index'] is None or now - similarity_state['loaded_at'] > SIMILARITY_INDEX_TTL_SECONDS:
+        try:
+            entries = ReportStore(lazy_client('s3'), SIMILARITY_BUCKET).recent()
+            similarity_state['index'] = SimilarityIndex.from_entries(entries)
+        except Exception as e:
+            print(f"⚠️  Similarity index unavailable: {str(e)}")
+            similarity_state['index'] = SimilarityIndex()
+        similarity_state['loaded_at'] = now
+    return similarity_state['index']
+
+
+def find_similar_incidents(logs_findings, metrics_findings, deploy_findings):
+    """Closest past incidents above SIMILARITY_ATTACH_THRESHOLD, best first."""
+    if not SIMILARITY_ENABLED:
+        return []
+    
+    with span('similarity_lookup') as s:
+        index = get_similarity_index()
+        matches = index.nearest(
+            incident_features(logs_findings, metrics_findings, deploy_findings),
+            k=SIMILARITY_TOP_K,
+            min_similarity=SIMILARITY_ATTACH_THRESHOLD
+        )
+        s.set(indexed=len(index), matches=len(matches))
+    
+    similar = [
+        {'similarity': score, **{k: record.get(k) for k in ('incident_id', 'root_cause', 'confidence', 'deployment_id', 'synthesis', 'verified', 'timestamp', 'keys')}}
+        for score, record in matches
+    ]
+    for incident in similar:
+        print(f"   🔁 {incident['similarity']:.0%} similar to {incident['incident_id']}: {incident['root_cause']}")
+    return similar
+
+
+def can_skip_llm(prior):
+    """
+    A prior incident can replace the LLM call when it is a near-duplicate, was
+    confident, and its answer came from the LLM or was verified. Rule-based and
+    similarity-based answers would otherwise be copied forward without review.
+    """
+    return (
+        prior['similarity'] >= SIMILARITY_SKIP_LLM_THRESHOLD
+        and (prior.get('confidence') or 0) >= SIMILARITY_SKIP_MIN_CONFIDENCE
+        and (bool(prior.get('verified')) or prior.get('synthesis') in SIMILARITY_SKIP_SYNTHESES)
+    )
+
+
+def synthesize_from_similar(logs_findings, metrics_findings, deploy_findings, prior):
+    """
+    Resolve a repeat incident without Claude: rule-based synthesis names the
+    current deployment and changes, the prior RCA backs the confidence.
+    """
+    from rule_synthesis import describe_rules, synthesize
+    analysis = synthesize(logs_findings, metrics_findings, deploy_findings)
+    analysis['confidence'] = round(min(max(analysis['confidence'], prior['confidence'] * prior['similarity']), 0.95), 2)
+    analysis['reasoning'] = (
+        f"Matched prior incident {prior['incident_id']} ({prior['similarity']:.0%} similar), "
+        f"resolved as: {prior['root_cause']}. {describe_rules(analysis['rules_fired'])}"
+    )
+    analysis['synthesis'] = 'similar-incident'
+    print(f"   ⚡ Skipping LLM: {prior['similarity']:.0%} match with {prior['incident_id']}")
+    return analysis
+
+
+def analyze_with_llm(logs_findings, metrics_findings, deploy_findings, context, similar_incidents=(), early_sink=None):
+    """
+    Compacted-evidence prompt -> cached or hedged Claude call, with rule-based fallback.
+    early_sink(early_fields) is called each time a streamed field arrives early.
+    """
+    
+    # Compact the evidence so the prompt stays within the token budget
+    with span('compact_evidence') as s:
+        evidence = compact_evidence({
+            'logs': logs_findings,
+            'metrics': metrics_findings,
+            'deploy': deploy_findings
+        })
+        s.set(evidence_tokens=evidence['stats']['evidence_tokens'],
+              raw_evidence_tokens=evidence['stats']['raw_evidence_tokens'])
+    
+    # Closest resolved incidents as hints; they may involve other deployments
+    prior_section = ''
+    if similar_incidents:
+        prior_section = "\n**SIMILAR PAST INCIDENTS (verify against current evidence):**\n" + ''.join(
+            f"- {i['similarity']:.0%} similar: {i['root_cause']} (confidence {i.get('confidence') or 0:.0%})\n"
+            for i in similar_incidents
+        )
+    
+    # Prepare prompt for Claude
+    prompt = f"""You are an expert incident response system analyzing a production outage. Review the following evidence from specialized agents and provide a comprehensive root cause analysis. Evidence is minified JSON, ordered by relevance and truncated to fit the budget.
 
 **LOGS AGENT FINDINGS:**
-{json.dumps(logs_findings.get('findings', {}), indent=2)}
+{evidence['logs']}
 Confidence: {logs_findings.get('confidence', 0):.0%}
 
 **METRICS AGENT FINDINGS:**
-{json.dumps(metrics_findings.get('findings', {}), indent=2)}
+{evidence['metrics']}
 Severity: {metrics_findings.get('severity', 'UNKNOWN')}
 Confidence: {metrics_findings.get('confidence', 0):.0%}
 
 **DEPLOY INTELLIGENCE FINDINGS:**
-{json.dumps(deploy_findings.get('findings', {}), indent=2)}
+{evidence['deploy']}
 Root Cause Hypothesis: {deploy_findings.get('root_cause_hypothesis', 'Unknown')}
 Confidence: {deploy_findings.get('confidence', 0):.0%}
-
+{prior_section}
 **TASK:**
 1. Analyze the correlation between all three data sources
 2. Identify the root cause with confidence level (0-100%)
@@ -88,114 +289,159 @@ Respond in JSON format:
   "reasoning": "multi-line explanation of correlation and confidence"
 }}"""
 
-        # Call Claude via Bedrock
-        try:
-            # If we have a bearer token API key, use direct HTTP request
-            if BEDROCK_API_KEY and BEDROCK_API_KEY.startswith('bedrock-api-key-'):
-                print("   Using Bedrock API key authentication")
-                
-                # Extract the signed URL from the bearer token
-                # Format: bedrock-api-key-<base64-encoded-presigned-url>
-                encoded_url = BEDROCK_API_KEY.replace('bedrock-api-key-', '')
-                bedrock_url = urllib.parse.unquote(encoded_url)
-                
-                # Prepare the request body
-                request_body = {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 2000,
-                    "messages": [{
-                        "role": "user",
-                        "content": prompt
-                    }],
-                    "temperature": 0.3
+    prompt_stats = {
+        **evidence['stats'],
+        'estimated_input_tokens': estimate_tokens(prompt)
+    }
+    print(f"   Prompt: ~{prompt_stats['estimated_input_tokens']} input tokens "
+          f"(evidence {prompt_stats['evidence_tokens']}/{prompt_stats['token_budget']}, "
+          f"raw {prompt_stats['raw_evidence_tokens']})")
+    if prompt_stats['omitted']:
+        print(f"   Omitted over budget: {', '.join(prompt_stats['omitted'])}")
+
+    # Serve retries and re-runs with identical evidence from the cache
+    cache_key = llm_cache_key(BEDROCK_MODEL_ID, prompt, BEDROCK_TEMPERATURE)
+    analysis = llm_cache.get(cache_key) if LLM_CACHE_ENABLED else None
+    early_fields = {}
+    
+    if analysis is not None:
+        current_span().incr('cache_hits')
+        print(f"   ⚡ LLM cache hit ({cache_key[:12]})")
+    else:
+        current_span().incr('cache_misses')
+        # Call Claude via Bedrock; with streaming, root_cause and confidence
+        # are forwarded as soon as Claude emits them
+        call_started = time.time()
+        
+        def forward_early(name, value):
+            if name in ('root_cause', 'confidence') and name not in early_fields:
+                early_fields[name] = {
+                    'value': value,
+                    'elapsed_ms': int((time.time() - call_started) * 1000)
                 }
-                
-                # Make direct HTTP POST request using urllib
-                request_body_json = json.dumps(request_body).encode('utf-8')
-                
-                req = urllib.request.Request(
-                    bedrock_url,
-                    data=request_body_json,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'Content-Length': str(len(request_body_json))
-                    },
-                    method='POST'
-                )
-                
-                with urllib.request.urlopen(req, timeout=30) as http_response:
-                    response_data = http_response.read().decode('utf-8')
-                    response_body = json.loads(response_data)
-                    claude_response = response_body['content'][0]['text']
-                
-            else:
-                # Use standard boto3 client
-                print("   Using standard boto3 Bedrock client")
-                response = bedrock.invoke_model(
-                    modelId=BEDROCK_MODEL_ID,
-                    body=json.dumps({
-                        "anthropic_version": "bedrock-2023-05-31",
-                        "max_tokens": 2000,
-                        "messages": [{
-                            "role": "user",
-                            "content": prompt
-                        }],
-                        "temperature": 0.3
-                    })
-                )
-                
-                response_body = json.loads(response['body'].read())
-                claude_response = response_body['content'][0]['text']
-            
-            # Parse Claude's JSON response
-            # Extract JSON from markdown code blocks if present
-            if '```json' in claude_response:
-                claude_response = claude_response.split('```json')[1].split('```')[0].strip()
-            elif '```' in claude_response:
-                claude_response = claude_response.split('```')[1].split('```')[0].strip()
-            
-            analysis = json.loads(claude_response)
+                print(f"   📡 Early {name} after {early_fields[name]['elapsed_ms']}ms: {value}")
+                if early_sink is not None:
+                    try:
+                        early_sink(dict(early_fields))
+                    except Exception as e:
+                        print(f"⚠️  Could not forward early {name}: {str(e)}")
+        
+        try:
+            with span('llm_call', input_tokens=prompt_stats['estimated_input_tokens']) as s:
+                model_used, analysis = call_llm_with_hedge(prompt, context, on_field=forward_early)
+                s.set(model_id=model_used)
+            analysis['model_id'] = model_used
+            analysis['synthesis'] = 'llm'
             
+            # Only primary-model answers are cached; a hedged answer should not
+            # stop the next retry from getting the stronger model
+            if LLM_CACHE_ENABLED and model_used == BEDROCK_MODEL_ID:
+                llm_cache.put(cache_key, analysis)
+        
         except Exception as bedrock_error:
             print(f"⚠️  Bedrock call failed: {str(bedrock_error)}")
-            print("   Using fallback analysis...")
+            print("   Using rule-based synthesis from agent findings...")
             
-            # Fallback analysis without AI
-            analysis = {
-                'root_cause': 'ConnectionPoolExhaustedException caused by deploy_1009 (v40) reducing connection pool size',
-                'confidence': min(
-                    logs_findings.get('confidence', 0),
-                    deploy_findings.get('confidence', 0)
-                ),
-                'evidence_summary': {
-                    'logs': f"{logs_findings.get('findings', {}).get('top_error', {}).get('count', 0)} ConnectionPool errors correlated with deploy_1009",
-                    'metrics': f"{metrics_findings.get('severity', 'HIGH')} severity with {metrics_findings.get('findings', {}).get('degradation', {}).get('error_rate_multiplier', '7x')} error rate increase",
-                    'deploy': f"deploy_1009 happened {deploy_findings.get('findings', {}).get('correlation', {}).get('time_before_incident_minutes', 15)} minutes before incident"
-                },
-                'remediation_steps': [
-                    {'priority': 1, 'action': 'IMMEDIATE ROLLBACK to config v39', 'estimated_time': '2 minutes', 'risk': 'LOW'},
-                    {'priority': 2, 'action': 'Restore connection pool size to 50', 'estimated_time': '5 minutes', 'risk': 'LOW'},
-                    {'priority': 3, 'action': 'Add connection pool monitoring alerts', 'estimated_time': '30 minutes', 'risk': 'LOW'}
-                ],
-                'auto_remediate': True,
-                'reasoning': 'High confidence correlation between deployment and incident. All three agents show consistent evidence.'
-            }
-        
-        # Add agent metadata
-        result = {
-            'agent': 'CommanderAgent',
-            **analysis,
-            'agent_contributions': {
-                'logs': logs_findings,
-                'metrics': metrics_findings,
-                'deploy': deploy_findings
-            }
+            # Only needed when Bedrock fails, so kept off the cold-start path
+            from rule_synthesis import synthesize
+            analysis = synthesize(logs_findings, metrics_findings, deploy_findings)
+    
+    return analysis, prompt_stats, early_fields
+
+
+def synthesize_outputs(agent_outputs, context, early_sink=None):
+    """Root cause analysis for a list of agent outputs (any subset of the three agents)."""
+    
+    # Extract each agent's findings
+    logs_findings, metrics_findings, deploy_findings = split_agent_findings(agent_outputs)
+    
+    print(f"   Logs: {logs_findings.get('confidence', 0):.0%} confidence")
+    print(f"   Metrics: {metrics_findings.get('confidence', 0):.0%} confidence")
+    print(f"   Deploy: {deploy_findings.get('confidence', 0):.0%} confidence")
+    
+    # Close match to a resolved incident: reuse it instead of calling Claude
+    similar_incidents = find_similar_incidents(logs_findings, metrics_findings, deploy_findings)
+    best = next((incident for incident in similar_incidents if can_skip_llm(incident)), None)
+    if best:
+        analysis = synthesize_from_similar(logs_findings, metrics_findings, deploy_findings, best)
+        prompt_stats, early_fields = {}, {}
+    else:
+        analysis, prompt_stats, early_fields = analyze_with_llm(
+            logs_findings, metrics_findings, deploy_findings, context, similar_incidents, early_sink
+        )
+    
+    # The ingestion's incident ID, which the agents pass through to the report
+    incident_id = next(
+        (f['incident_id'] for f in flatten_agent_outputs(agent_outputs) if isinstance(f, dict) and f.get('incident_id')),
+        None
+    )
+    
+    # Add agent metadata
+    return {
+        'agent': 'CommanderAgent',
+        'incident_id': incident_id,
+        **analysis,
+        'prompt_stats': prompt_stats,
+        'llm_cache': llm_cache.stats(),
+        'early_fields': early_fields,
+        'similar_incidents': similar_incidents,
+        'agent_contributions': {
+            'logs': logs_findings,
+            'metrics': metrics_findings,
+            'deploy': deploy_findings
         }
+    }
+
+
+def evidence_wait_seconds(context):
+    """How long to wait for agents, leaving the rest of the Lambda's time for synthesis."""
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        remaining = (context.get_remaining_time_in_millis() - DEADLINE_SAFETY_MARGIN_MS) / 1000
+        return max(min(EVIDENCE_WAIT_SECONDS, remaining - BEDROCK_TIMEOUT_SECONDS), 0)
+    return EVIDENCE_WAIT_SECONDS
+
+
+@instrumented_handler('agent_commander')
+@claim_checked
+def lambda_handler(event, context):
+    """Synthesize all agent findings using AI."""
+    
+    try:
+        board = EvidenceBoard.from_event(event)
+        if board is not None:
+            print(f"🎖️  CommanderAgent collecting evidence for {board.investigation_id}...")
+            with span('evidence_board') as s:
+                result = collect_and_synthesize(
+                    board,
+                    lambda agent_outputs: synthesize_outputs(
+                        agent_outputs, context,
+                        early_sink=lambda fields: board.publish_result('early', fields)
+                    ),
+                    wait_seconds=evidence_wait_seconds(context)
+                )
+                s.set(time_to_first_rca_ms=result['evidence_board']['time_to_first_rca_ms'],
+                      refined=result['evidence_board']['refined'])
+        else:
+            # Extract agent outputs from Step Functions Parallel state
+            # Parallel state passes results as a list directly
+            if isinstance(event, list):
+                agent_outputs = event
+            else:
+                agent_outputs = event.get('agent_outputs', [])
+            
+            print(f"🎖️  CommanderAgent synthesizing findings...")
+            print(f"   Received input type: {type(event)}")
+            print(f"   Processing {len(agent_outputs)} agent outputs")
+            
+            result = synthesize_outputs(agent_outputs, context)
+        
+        if board is not None and not result.get('incident_id'):
+            result['incident_id'] = board.investigation_id
         
         print(f"✅ Commander analysis complete")
-        print(f"   Root cause: {analysis['root_cause']}")
-        print(f"   Confidence: {analysis['confidence']:.0%}")
-        print(f"   Auto-remediate: {analysis['auto_remediate']}")
+        print(f"   Root cause: {result['root_cause']}")
+        print(f"   Confidence: {result['confidence']:.0%}")
+        print(f"   Auto-remediate: {result['auto_remediate']}")
         
         return result
         
@@ -0,0 +1,333 @@
+"""
+Lambda Function: Commander Agent - Batch Mode
+Synthesizes many incidents at once during cascading outages. Incidents that
+share a deployment or service are grouped and analyzed in a single Claude call;
+non-urgent post-mortems can go through Bedrock batch inference instead.
+Offline submission also writes a manifest mapping each batch record to its
+incident IDs, so collect mode can return results keyed by incident_id.
+
+Event:
+{
+  "mode": "realtime" | "offline" | "collect",
+  "incidents": [{"incident_id": "...", "agent_outputs": [...]}, ...],
+  "job_arn": "..."            # collect mode only
+}
+"""
+
+import contextvars
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from agent_commander import BEDROCK_MODEL_ID, BEDROCK_TEMPERATURE, call_llm_with_hedge, split_agent_findings
+from aws_clients import lazy_client
+from bedrock_client import build_request_body
+from claim_check import claim_checked
+from instrumentation import instrumented_handler
+from llm_json import parse_llm_json
+from prompt_compaction import PROMPT_TOKEN_BUDGET, compact_evidence, estimate_tokens
+from rule_synthesis import synthesize
+
+# Environment variables
+BATCH_MAX_INCIDENTS_PER_CALL = int(os.environ.get('BATCH_MAX_INCIDENTS_PER_CALL', '8'))
+BATCH_MAX_TOKENS_PER_INCIDENT = int(os.environ.get('BATCH_MAX_TOKENS_PER_INCIDENT', '600'))
+# Output ceiling every model a batch may land on accepts (the Haiku hedge model caps at 4096)
+BATCH_MODEL_MAX_OUTPUT_TOKENS = int(os.environ.get('BATCH_MODEL_MAX_OUTPUT_TOKENS', '4096'))
+BATCH_MAX_CONCURRENT_CALLS = int(os.environ.get('BATCH_MAX_CONCURRENT_CALLS', '4'))
+BATCH_INFERENCE_BUCKET = os.environ.get('BATCH_INFERENCE_BUCKET', 'hackathon-team14-bucket')
+BATCH_INFERENCE_ROLE_ARN = os.environ.get('BATCH_INFERENCE_ROLE_ARN', '')
+
+s3_client = lazy_client('s3')
+bedrock_control = lazy_client('bedrock', region_name='us-east-1')
+
+# Incidents per call, so the completion fits the model's output limit
+INCIDENTS_PER_CALL = max(1, min(BATCH_MAX_INCIDENTS_PER_CALL, BATCH_MODEL_MAX_OUTPUT_TOKENS // BATCH_MAX_TOKENS_PER_INCIDENT))
+
+
+def incident_keys(logs_findings, deploy_findings):
+    """Deployment IDs and services an incident can be grouped on."""
+    logs = logs_findings.get('findings', {}) or {}
+    deploy = deploy_findings.get('findings', {}) or {}
+    keys = set()
+    for deployment_id in (
+        logs.get('deployment_correlation', {}).get('deployment_id'),
+        deploy.get('correlation', {}).get('deployment_id')
+    ):
+        if deployment_id and deployment_id not in ('None', 'Unknown'):
+            keys.add(f"deployment:{deployment_id}")
+    for service in list(logs.get('affected_services', {}))[:1] + [deploy.get('target_deployment', {}).get('service')]:
+        if service and service != 'Unknown':
+            keys.add(f"service:{service}")
+    return keys
+
+
+def group_incidents(incidents):
+    """Union incidents sharing any deployment_id or service; returns lists of incidents."""
+    parent = list(range(len(incidents)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owner = {}
+    for index, incident in enumerate(incidents):
+        for key in incident['keys']:
+            if key in owner:
+                parent[find(index)] = find(owner[key])
+            else:
+                owner[key] = index
+
+    groups = {}
+    for index, incident in enumerate(incidents):
+        groups.setdefault(find(index), []).append(incident)
+
+    # Split oversized groups so each call stays within the completion budget
+    batches = []
+    for members in groups.values():
+        for start in range(0, len(members), INCIDENTS_PER_CALL):
+            batches.append(members[start:start + INCIDENTS_PER_CALL])
+    return batches
+
+
+def batch_max_tokens(batch):
+    return min(BATCH_MAX_TOKENS_PER_INCIDENT * len(batch), BATCH_MODEL_MAX_OUTPUT_TOKENS)
+
+
+def build_batch_prompt(batch):
+    """One prompt covering every incident in a group, evidence compacted per incident."""
+    budget = max(PROMPT_TOKEN_BUDGET // len(batch), 200)
+    sections = []
+    for incident in batch:
+        evidence = compact_evidence({
+            'logs': incident['logs'],
+            'metrics': incident['metrics'],
+            'deploy': incident['deploy']
+        }, token_budget=budget)
+        sections.append(f"""### INCIDENT {incident['incident_id']}
+Logs (confidence {incident['logs'].get('confidence', 0):.0%}): {evidence['logs']}
+Metrics (severity {incident['metrics'].get('severity', 'UNKNOWN')}): {evidence['metrics']}
+Deploy (hypothesis {incident['deploy'].get('root_cause_hypothesis', 'Unknown')}): {evidence['deploy']}""")
+
+    evidence_text = '\n\n'.join(sections)
+    return f"""You are an expert incident response system analyzing {len(batch)} related production incidents from a cascading outage. They share deployments or services, so first decide whether they have a common root cause, then analyze each one. Evidence is minified JSON, ordered by relevance.
+
+{evidence_text}
+
+Respond in JSON format:
+{{
+  "shared_root_cause": "one sentence, or null if the incidents are unrelated",
+  "incidents": [
+    {{
+      "incident_id": "...",
+      "root_cause": "clear one-sentence root cause",
+      "confidence": 0.95,
+      "evidence_summary": {{"logs": "...", "metrics": "...", "deploy": "..."}},
+      "remediation_steps": [{{"priority": 1, "action": "...", "estimated_time": "...", "risk": "LOW/MEDIUM/HIGH"}}],
+      "auto_remediate": true/false,
+      "reasoning": "short explanation"
+    }}
+  ]
+}}"""
+
+
+def synthesize_batch(batch, context):
+    """Analyze one group with a single LLM call; rule-based synthesis fills any gaps."""
+    prompt = build_batch_prompt(batch)
+    results = {}
+    shared_root_cause = None
+    model_id = None
+    try:
+        model_id, analysis = call_llm_with_hedge(
+            prompt, context, max_tokens=batch_max_tokens(batch)
+        )
+        shared_root_cause = analysis.get('shared_root_cause')
+        for item in analysis.get('incidents', []):
+            if item.get('incident_id'):
+                results[str(item['incident_id'])] = {**item, 'synthesis': 'llm', 'model_id': model_id}
+    except Exception as e:
+        print(f"⚠️  Batch LLM call failed for {len(batch)} incidents: {str(e)}")
+
+    for incident in batch:
+        if incident['incident_id'] not in results:
+            results[incident['incident_id']] = synthesize(incident['logs'], incident['metrics'], incident['deploy'])
+
+    return {
+        'incident_ids': [incident['incident_id'] for incident in batch],
+        'shared_root_cause': shared_root_cause,
+        'model_id': model_id,
+        'estimated_input_tokens': estimate_tokens(prompt),
+        'results': results
+    }
+
+
+def prepare_incidents(event):
+    incidents = []
+    for index, raw in enumerate(event.get('incidents', [])):
+        logs_findings, metrics_findings, deploy_findings = split_agent_findings(raw.get('agent_outputs', []))
+        incidents.append({
+            'incident_id': str(raw.get('incident_id', index)),
+            'logs': logs_findings,
+            'metrics': metrics_findings,
+            'deploy': deploy_findings,
+            'keys': incident_keys(logs_findings, deploy_findings)
+        })
+    return incidents
+
+
+def submit_offline_job(batches):
+    """Write one batch-inference record per group to S3 and start a Bedrock batch job.
+    Bedrock enforces a minimum record count per job, so queue post-mortems and submit together."""
+    if not BATCH_INFERENCE_ROLE_ARN:
+        raise ValueError("BATCH_INFERENCE_ROLE_ARN is not set; offline mode needs a Bedrock batch inference service role")
+
+    job_name = f"incident-postmortem-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}"
+    input_key = f"batch-inference/input/{job_name}.jsonl"
+    records = []
+    groups = {}
+    for index, batch in enumerate(batches):
+        record_id = f"group-{index:05d}"
+        groups[record_id] = [incident['incident_id'] for incident in batch]
+        records.append(json.dumps({
+            'recordId': record_id,
+            'modelInput': json.loads(build_request_body(
+                build_batch_prompt(batch),
+                batch_max_tokens(batch),
+                BEDROCK_TEMPERATURE
+            ))
+        }))
+
+    s3_client.put_object(
+        Bucket=BATCH_INFERENCE_BUCKET,
+        Key=input_key,
+        Body='\n'.join(records).encode('utf-8'),
+        ContentType='application/jsonl'
+    )
+    s3_client.put_object(
+        Bucket=BATCH_INFERENCE_BUCKET,
+        Key=manifest_key(job_name),
+        Body=json.dumps(groups).encode('utf-8'),
+        ContentType='application/json'
+    )
+    response = bedrock_control.create_model_invocation_job(
+        jobName=job_name,
+        roleArn=BATCH_INFERENCE_ROLE_ARN,
+        modelId=BEDROCK_MODEL_ID,
+        inputDataConfig={'s3InputDataConfig': {'s3Uri': f"s3://{BATCH_INFERENCE_BUCKET}/{input_key}"}},
+        outputDataConfig={'s3OutputDataConfig': {'s3Uri': f"s3://{BATCH_INFERENCE_BUCKET}/batch-inference/output/"}}
+    )
+    return {'job_arn': response['jobArn'], 'job_name': job_name, 'groups': groups}
+
+
+def manifest_key(job_name):
+    return f"batch-inference/input/{job_name}.groups.json"
+
+
+def collect_offline_results(job_arn):
+    """
+    Read the output of a completed Bedrock batch job. Records are mapped back
+    through the submission manifest: results are keyed by incident_id, groups
+    keep each record's incident IDs and shared root cause.
+    """
+    job = bedrock_control.get_model_invocation_job(jobIdentifier=job_arn)
+    if job['status'] != 'Completed':
+        return {'job_arn': job_arn, 'status': job['status'], 'groups': [], 'results': {}}
+
+    manifest = s3_client.get_object(Bucket=BATCH_INFERENCE_BUCKET, Key=manifest_key(job['jobName']))
+    record_incidents = json.loads(manifest['Body'].read().decode('utf-8'))
+
+    output_uri = job['outputDataConfig']['s3OutputDataConfig']['s3Uri']
+    bucket, _, prefix = output_uri.replace('s3://', '', 1).partition('/')
+    analyses = {}
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"{prefix.rstrip('/')}/{job_arn.split('/')[-1]}/"):
+        for obj in page.get('Contents', []):
+            if not obj['Key'].endswith('.jsonl.out'):
+                continue
+            body = s3_client.get_object(Bucket=bucket, Key=obj['Key'])['Body'].read().decode('utf-8')
+            for line in body.splitlines():
+                record = json.loads(line)
+                try:
+                    analyses[record['recordId']] = parse_llm_json(record['modelOutput']['content'][0]['text'])
+                except (KeyError, ValueError) as e:
+                    analyses[record['recordId']] = {'error': str(e)}
+
+    groups = []
+    results = {}
+    for record_id, incident_ids in record_incidents.items():
+        analysis = analyses.get(record_id, {'error': 'no output record'})
+        by_incident = {
+            str(item['incident_id']): item
+            for item in analysis.get('incidents', []) if item.get('incident_id')
+        }
+        for incident_id in incident_ids:
+            if incident_id in by_incident:
+                results[incident_id] = {**by_incident[incident_id], 'synthesis': 'llm', 'model_id': BEDROCK_MODEL_ID}
+            else:
+                results[incident_id] = {'error': analysis.get('error', 'incident missing from batch output')}
+        groups.append({
+            'record_id': record_id,
+            'incident_ids': incident_ids,
+            'shared_root_cause': analysis.get('shared_root_cause')
+        })
+    return {'job_arn': job_arn, 'status': job['status'], 'groups': groups, 'results': results}
+
+
+@instrumented_handler('agent_commander_batch')
+@claim_checked
+def lambda_handler(event, context):
+    """Synthesize a batch of incidents with as few LLM calls as possible."""
+
+    try:
+        mode = event.get('mode', 'realtime')
+        if mode == 'collect':
+            return {'agent': 'CommanderAgent', 'mode': mode, **collect_offline_results(event['job_arn'])}
+
+        started = time.time()
+        incidents = prepare_incidents(event)
+        batches = group_incidents(incidents)
+
+        print(f"🎖️  CommanderAgent batch mode ({mode})")
+        print(f"   {len(incidents)} incidents in {len(batches)} groups")
+
+        if mode == 'offline':
+            job = submit_offline_job(batches)
+            print(f"✅ Batch inference job started: {job['job_arn']}")
+            return {'agent': 'CommanderAgent', 'mode': mode, **job}
+
+        # Groups are independent, so their calls run concurrently, each in a
+        # copy of the handler's context so its Bedrock calls count toward its span
+        with ThreadPoolExecutor(max_workers=max(1, min(len(batches), BATCH_MAX_CONCURRENT_CALLS))) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, synthesize_batch, batch, context)
+                       for batch in batches]
+            groups = [future.result() for future in futures]
+
+        results = {}
+        for group in groups:
+            results.update(group.pop('results'))
+
+        print(f"✅ Batch synthesis complete in {time.time() - started:.1f}s "
+              f"({len(batches)} LLM calls for {len(incidents)} incidents)")
+
+        return {
+            'agent': 'CommanderAgent',
+            'mode': mode,
+            'incident_count': len(incidents),
+            'llm_calls': len(batches),
+            'groups': groups,
+            'results': results
+        }
+
+    except Exception as e:
+        print(f"❌ Error in CommanderAgent batch mode: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+        return {
+            'agent': 'CommanderAgent',
+            'error': str(e),
+            'results': {}
+        }
@@ -1,16 +1,108 @@
 """
 Lambda Function: Deploy Intelligence Agent (Historian)
 Maps real-time errors against CI/CD deployments and configuration changes
-to identify correlations and suggest rollback candidates.
+to identify correlations and suggest rollback candidates. With a shared
+incident context, the deployment behind most critical errors is the default
+hint and the spike start is the incident time.
 """
 
+import copy
 import json
-import boto3
 import os
 from datetime import datetime, timedelta
+from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb')
+from aws_clients import lazy_client
+from claim_check import claim_checked
+from evidence_board import publishes_evidence
+from incident_context import format_time_ms, load_context
+from instrumentation import instrumented_handler
 
+# Environment variables
+DEPLOYMENTS_TABLE = os.environ.get('DEPLOYMENTS_TABLE', '')
+
+dynamodb = lazy_client('dynamodb')
+
+# Demo deployment history, used when there is neither a table nor an override
+DEFAULT_DEPLOYMENTS = [
+    {
+        'deployment_id': 'deploy_1009',
+        'timestamp': '2026-02-06T10:00:00Z',
+        'service': 'checkout-service',
+        'config_version': 'v40',
+        'changes': [
+            'Reduced connection pool size from 50 to 10',
+            'Updated Redis cache TTL to 300s',
+            'Enabled query result caching'
+        ],
+        'deployed_by': 'cicd-pipeline',
+        'status': 'DEPLOYED'
+    },
+    {
+        'deployment_id': 'deploy_1008',
+        'timestamp': '2026-02-06T09:30:00Z',
+        'service': 'payment-service',
+        'config_version': 'v39',
+        'changes': [
+            'Updated payment gateway timeout to 30s'
+        ],
+        'deployed_by': 'cicd-pipeline',
+        'status': 'DEPLOYED'
+    },
+    {
+        'deployment_id': 'deploy_1007',
+        'timestamp': '2026-02-06T08:00:00Z',
+        'service': 'auth-service',
+        'config_version': 'v38',
+        'changes': [
+            'Updated JWT expiration to 24h'
+        ],
+        'deployed_by': 'cicd-pipeline',
+        'status': 'DEPLOYED'
+    }
+]
+
+
+def _plain(value):
+    """DynamoDB numbers (Decimal) as int or float, sets as lists, so findings stay JSON-serializable."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, set)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def load_deployments(event):
+    """
+    Deployment history, most recent first: the event's "deployments" override
+    (replays and tests), else DEPLOYMENTS_TABLE, else the demo history.
+    """
+    if event.get('deployments'):
+        deployments = list(event['deployments'])
+    elif DEPLOYMENTS_TABLE:
+        from boto3.dynamodb.types import TypeDeserializer
+        deserializer = TypeDeserializer()
+        deployments = []
+        for page in dynamodb.get_paginator('scan').paginate(TableName=DEPLOYMENTS_TABLE):
+            deployments.extend(
+                {k: _plain(deserializer.deserialize(v)) for k, v in item.items()} for item in page.get('Items', [])
+            )
+    else:
+        return copy.deepcopy(DEFAULT_DEPLOYMENTS)
+    return sorted(deployments, key=lambda d: str(d.get('timestamp', '')), reverse=True)
+
+
+def rollback_target(deployments, deployment):
+    """The most recent earlier deployment of the same service, or None."""
+    position = deployments.index(deployment)
+    return next((d for d in deployments[position + 1:] if d.get('service') == deployment.get('service')), None)
+
+
+@instrumented_handler('agent_deploy')
+@publishes_evidence
+@claim_checked
 def lambda_handler(event, context):
     """Analyze deployment history for correlations."""
     
@@ -20,52 +112,20 @@ def lambda_handler(event, context):
         time_window = event.get('time_window', {})
         
         deployment_id_hint = correlation_hint.get('deployment_id')
+        incident_time = datetime.fromisoformat(time_window['start'])
+        
+        incident_context = load_context(event)
+        if incident_context is not None:
+            if not deployment_id_hint:
+                top_deployments = incident_context.counts('deployment_id').most_common(1)
+                deployment_id_hint = top_deployments[0][0] if top_deployments else None
+            incident_time = datetime.fromisoformat(format_time_ms(incident_context.spike_start_ms()))
         
         print(f"📜 DeployAgent analyzing deployment history...")
         print(f"   Correlation hint: {deployment_id_hint}")
         print(f"   Time window: {time_window.get('start')} to {time_window.get('end')}")
         
-        # For demo purposes, we'll use mock deployment data
-        # In production, this would query DynamoDB
-        
-        # Mock deployment data
-        deployments = [
-            {
-                'deployment_id': 'deploy_1009',
-                'timestamp': '2026-02-06T10:00:00Z',
-                'service': 'checkout-service',
-                'config_version': 'v40',
-                'changes': [
-                    'Reduced connection pool size from 50 to 10',
-                    'Updated Redis cache TTL to 300s',
-                    'Enabled query result caching'
-                ],
-                'deployed_by': 'cicd-pipeline',
-                'status': 'DEPLOYED'
-            },
-            {
-                'deployment_id': 'deploy_1008',
-                'timestamp': '2026-02-06T09:30:00Z',
-                'service': 'payment-service',
-                'config_version': 'v39',
-                'changes': [
-                    'Updated payment gateway timeout to 30s'
-                ],
-                'deployed_by': 'cicd-pipeline',
-                'status': 'DEPLOYED'
-            },
-            {
-                'deployment_id': 'deploy_1007',
-                'timestamp': '2026-02-06T08:00:00Z',
-                'service': 'auth-service',
-                'config_version': 'v38',
-                'changes': [
-                    'Updated JWT expiration to 24h'
-                ],
-                'deployed_by': 'cicd-pipeline',
-                'status': 'DEPLOYED'
-            }
-        ]
+        deployments = load_deployments(event)
         
         # Find the deployment mentioned in correlation hint
         target_deployment = None
@@ -80,12 +140,11 @@ def lambda_handler(event, context):
         
         # Calculate time difference
         deploy_time = datetime.fromisoformat(target_deployment['timestamp'].replace('Z', ''))
-        incident_time = datetime.fromisoformat(time_window['start'])
         time_diff_minutes = int((incident_time - deploy_time).total_seconds() / 60)
         
         # Analyze the deployment for suspicious changes
         suspicious_changes = []
-        for change in target_deployment['changes']:
+        for change in target_deployment.get('changes', []):
             if 'pool' in change.lower() or 'connection' in change.lower():
                 suspicious_changes.append({
                     'change': change,
@@ -110,27 +169,41 @@ def lambda_handler(event, context):
             confidence = 0.40
             correlation_strong = False
         
+        # Rollback target: the service's deployment before it in the history
+        previous = rollback_target(deployments, target_deployment)
+        deployment_id = target_deployment['deployment_id']
+        if confidence <= 0.8:
+            recommended_action = "Investigate further"
+        elif previous:
+            recommended_action = f"ROLLBACK {deployment_id} to previous config ({previous.get('config_version')})"
+        else:
+            recommended_action = f"Investigate further: no earlier {target_deployment.get('service')} deployment to roll back to"
+        riskiest = next((c for c in suspicious_changes if c['risk_level'] == 'HIGH'), None) \
+            or (suspicious_changes[0] if suspicious_changes else None)
+        
         findings = {
             'agent': 'DeployAgent',
+            'incident_id': event.get('incident_id') or event.get('context_id'),
             'findings': {
                 'target_deployment': target_deployment,
                 'correlation': {
-                    'deployment_id': target_deployment['deployment_id'],
-                    'config_version': target_deployment['config_version'],
+                    'deployment_id': deployment_id,
+                    'config_version': target_deployment.get('config_version'),
                     'time_before_incident_minutes': time_diff_minutes,
                     'correlation_strength': 'STRONG' if correlation_strong else 'WEAK',
                     'confidence': confidence
                 },
                 'suspicious_changes': suspicious_changes,
+                'rollback_target': previous['deployment_id'] if previous else None,
                 'recent_deployments': deployments[:3]
             },
-            'root_cause_hypothesis': 'Connection pool reduction in deploy_1009' if suspicious_changes else 'Unknown',
-            'recommended_action': f"ROLLBACK deploy_1009 to previous config (v39)" if confidence > 0.8 else "Investigate further",
+            'root_cause_hypothesis': f"{riskiest['change']} in {deployment_id}" if riskiest else 'Unknown',
+            'recommended_action': recommended_action,
             'confidence': confidence
         }
         
         print(f"✅ Deployment analysis complete")
-        print(f"   Target: {target_deployment['deployment_id']}")
+        print(f"   Target: {deployment_id}")
         print(f"   Time before incident: {time_diff_minutes} minutes")
         print(f"   Confidence: {confidence:.0%}")
         
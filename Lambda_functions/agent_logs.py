@@ -1,16 +1,24 @@
 """
 Lambda Function: Logs Agent (Forensic Expert)
 Deep-scans CloudWatch Logs to find error patterns, stack traces, 
-and correlations between errors and deployments.
+and correlations between errors and deployments. Reads critical events from
+the shared incident context when the investigation carries one.
 """
 
 import json
-import boto3
-import time
 from collections import Counter
+from datetime import datetime
 
-logs_client = boto3.client('logs')
+from claim_check import claim_checked
+from evidence_board import publishes_evidence
+from incident_context import load_context
+from instrumentation import instrumented_handler, span
+from query_cache import cached_query
+from trace_graph import analyze_traces
 
+@instrumented_handler('agent_logs')
+@publishes_evidence
+@claim_checked
 def lambda_handler(event, context):
     """Analyze CloudWatch Logs for error patterns."""
     
@@ -22,41 +30,40 @@ def lambda_handler(event, context):
         print(f"🕵️ LogsAgent analyzing: {log_group}")
         print(f"   Time window: {time_window.get('start')} to {time_window.get('end')}")
         
-        # Query CloudWatch Logs Insights
-        query = """
-        fields @timestamp, service, error_type, error_message, deployment_id, config_version, latency_ms
-        | filter latency_ms >= 2000
-        | sort @timestamp desc
-        """
+        incident_context = load_context(event)
+        if incident_context is not None:
+            print(f"   Using shared incident context {incident_context.context_id}")
+            with span('context_rows') as s:
+                errors = incident_context.records(incident_context.critical_rows())
+                s.set(rows=len(errors))
+        else:
+            # Query CloudWatch Logs Insights
+            query = """
+            fields @timestamp, service, error_type, error_message, deployment_id, config_version, latency_ms,
+                   timestamp, trace_id, span_id, endpoint, retry_count
+            | filter latency_ms >= 2000
+            | sort @timestamp desc
+            """
         
-        # Start query
-        response = logs_client.start_query(
-            logGroupName=log_group,
-            startTime=int(time.mktime(time.strptime(time_window['start'], '%Y-%m-%dT%H:%M:%S'))),
-            endTime=int(time.mktime(time.strptime(time_window['end'], '%Y-%m-%dT%H:%M:%S'))),
-            queryString=query
-        )
+            # Identical queries over the same or a wider window come from the cache
+            with span('logs_insights_query') as s:
+                rows, source = cached_query(
+                    log_group,
+                    query,
+                    datetime.fromisoformat(time_window['start']).timestamp(),
+                    datetime.fromisoformat(time_window['end']).timestamp()
+                )
+                s.set(rows=len(rows), source=source)
         
-        query_id = response['queryId']
-        print(f"   Query ID: {query_id}")
-        
-        # Wait for query to complete
-        max_attempts = 30
-        for attempt in range(max_attempts):
-            result = logs_client.get_query_results(queryId=query_id)
-            
-            if result['status'] == 'Complete':
-                break
-            
-            time.sleep(1)
-        
-        # Parse results
-        errors = []
-        for result_row in result.get('results', []):
-            error = {}
-            for field in result_row:
-                error[field['field']] = field['value']
-            errors.append(error)
+            # Parse results
+            with span('parse_results') as s:
+                errors = []
+                for result_row in rows:
+                    error = {}
+                    for field in result_row:
+                        error[field['field']] = field['value']
+                    errors.append(error)
+                s.set(rows=len(errors))
         
         print(f"   Found {len(errors)} critical errors")
         
@@ -73,8 +80,14 @@ def lambda_handler(event, context):
         correlation_percentage = (top_deploy_count / len(errors) * 100) if errors else 0
         confidence = min(correlation_percentage / 100, 0.95)
         
+        # Follow failures across services through their traces
+        with span('trace_analysis') as s:
+            trace_analysis = analyze_traces(errors)
+            s.set(rows=trace_analysis.get('spans', 0), spilled=trace_analysis.get('spilled', False))
+        
         findings = {
             'agent': 'LogsAgent',
+            'incident_id': event.get('incident_id') or event.get('context_id'),
             'findings': {
                 'total_critical_errors': len(errors),
                 'top_error': {
@@ -88,7 +101,8 @@ def lambda_handler(event, context):
                     'percentage': correlation_percentage
                 },
                 'affected_services': dict(services.most_common(3)),
-                'error_distribution': dict(error_types)
+                'error_distribution': dict(error_types),
+                'trace_analysis': trace_analysis
             },
             'confidence': confidence,
             'recommendation': f'Investigate {top_deployment}' if correlation_percentage > 50 else 'No clear correlation'
@@ -96,6 +110,10 @@ def lambda_handler(event, context):
         
         print(f"✅ Analysis complete. Top error: {top_error_type} ({top_error_count})")
         print(f"   Correlation: {top_deployment} ({correlation_percentage:.1f}%)")
+        if trace_analysis.get('multi_service_traces'):
+            print(f"   Origin service: {trace_analysis['origin_service']} ({trace_analysis['origin_share']:.0f}% of "
+                  f"{trace_analysis['traces']} traces), retry amplification "
+                  f"{trace_analysis['retry_amplification']['overall']:.2f}x")
         
         return findings
         
@@ -1,16 +1,82 @@
 """
 Lambda Function: Metrics Agent (Telemetry Analyst)
 Monitors CloudWatch Metrics for error rate spikes, latency degradation,
-and system health anomalies.
+and system health anomalies. The incident starts at the first minute whose
+critical-error count spikes in the shared incident context. The baseline is
+the BASELINE_MINUTES before it and the same window a week earlier, both read
+from the ingestion rollups (falling back to the context when they are empty).
+Retry storms and bimodal timeout clusters come from the context's retry and
+latency histograms (see retry_analysis).
 """
 
 import json
-import boto3
+import os
 from datetime import datetime, timedelta
-from statistics import mean
 
-cloudwatch = boto3.client('cloudwatch')
+from aws_clients import lazy_client
+from claim_check import claim_checked
+from evidence_board import publishes_evidence
+from incident_context import CRITICAL_LATENCY_MS, MINUTE_MS, IncidentContext, format_time_ms, load_context
+from instrumentation import instrumented_handler, span
+from query_cache import cached_query
+from retry_analysis import analyze_retries
+from rollups import ROLLUP_ENABLED, WEEK_MS, RollupStore
 
+cloudwatch = lazy_client('cloudwatch')
+
+BASELINE_MINUTES = int(os.environ.get('BASELINE_MINUTES', '15'))
+
+
+def query_context(log_group, time_window):
+    """Build a context from Logs Insights when the investigation carries none."""
+    start_time = datetime.fromisoformat(time_window['start']) - timedelta(minutes=BASELINE_MINUTES)
+    query = """
+    fields @timestamp, timestamp, service, endpoint, region, error_type, deployment_id, config_version,
+           latency_ms, retry_count
+    | sort @timestamp asc
+    """
+    with span('logs_insights_query') as s:
+        rows, source = cached_query(
+            log_group,
+            query,
+            start_time.timestamp(),
+            datetime.fromisoformat(time_window['end']).timestamp()
+        )
+        s.set(rows=len(rows), source=source)
+    
+    records = [{field['field']: field['value'] for field in row} for row in rows]
+    return IncidentContext.from_records(f"{log_group}:{time_window['start']}", records, time_window)
+
+
+def period_stats(incident_context, start_ms, end_ms):
+    """Critical errors per minute and p99 latency over [start_ms, end_ms)."""
+    first, last = incident_context.rows_between(start_ms, end_ms)
+    critical = sum(1 for latency in incident_context.latency[first:last] if latency >= CRITICAL_LATENCY_MS)
+    minutes = max(1, (end_ms - start_ms) / MINUTE_MS)
+    return {
+        'events': last - first,
+        'error_rate_per_min': round(critical / minutes, 1),
+        'p99_latency_ms': incident_context.latency_percentile(first, last, 0.99)
+    }
+
+
+def rollup_baselines(baseline_start_ms, incident_start_ms, incident_end_ms):
+    """(baseline, same window last week) from the rollups; None for either without events."""
+    if not ROLLUP_ENABLED:
+        return None, None
+    try:
+        store = RollupStore()
+        baseline = store.window_stats(baseline_start_ms, incident_start_ms)
+        last_week = store.window_stats(incident_start_ms - WEEK_MS, incident_end_ms - WEEK_MS)
+    except Exception as e:
+        print(f"⚠️  Rollups unavailable: {str(e)}")
+        return None, None
+    return (baseline if baseline['events'] else None), (last_week if last_week['events'] else None)
+
+
+@instrumented_handler('agent_metrics')
+@publishes_evidence
+@claim_checked
 def lambda_handler(event, context):
     """Analyze CloudWatch Metrics for anomalies."""
     
@@ -23,30 +89,59 @@ def lambda_handler(event, context):
         print(f"   Namespace: {namespace}")
         print(f"   Time window: {time_window.get('start')} to {time_window.get('end')}")
         
-        # Parse time window
-        start_time = datetime.fromisoformat(time_window['start'])
-        end_time = datetime.fromisoformat(time_window['end'])
+        incident_context = load_context(event)
+        if incident_context is None:
+            incident_context = query_context(event.get('log_group'), time_window)
+        else:
+            print(f"   Using shared incident context {incident_context.context_id}")
+        
+        # Incident starts at the critical-error spike; the baseline is the
+        # quiet stretch before it (clamped to the events we have)
+        incident_start_ms = incident_context.spike_start_ms()
+        incident_end_ms = (incident_context.ts[-1] if len(incident_context) else incident_context.end_ms) + 1
+        baseline_start_ms = max(incident_start_ms - BASELINE_MINUTES * MINUTE_MS,
+                                incident_context.ts[0] if len(incident_context) else incident_start_ms)
         
-        # Calculate baseline and incident periods
-        baseline_start = start_time - timedelta(minutes=15)
-        baseline_end = start_time
-        incident_start = start_time
-        incident_end = end_time
+        with span('baseline') as s:
+            baseline, last_week = rollup_baselines(baseline_start_ms, incident_start_ms, incident_end_ms)
+            baseline_source = 'rollups' if baseline else 'context'
+            if baseline is None:
+                baseline = period_stats(incident_context, baseline_start_ms, incident_start_ms)
+            incident = period_stats(incident_context, incident_start_ms, incident_end_ms)
+            s.set(rows=baseline['events'] + incident['events'], source=baseline_source)
+        print(f"   Baseline from {baseline_source}"
+              + (f", last week: {last_week['events']} events" if last_week else ", no data for last week"))
         
-        # For demo purposes, we'll simulate metric data based on the log patterns
-        # In production, this would query actual CloudWatch Metrics
+        baseline_error_rate = baseline['error_rate_per_min']
+        baseline_p99_latency = baseline['p99_latency_ms']
+        incident_error_rate = incident['error_rate_per_min']
+        incident_p99_latency = incident['p99_latency_ms']
         
-        # Simulate baseline metrics (normal operation)
-        baseline_error_rate = 5  # errors per minute
-        baseline_p99_latency = 900  # ms
+        # Calculate degradation; a quiet baseline counts as one error a minute
+        # so a jump from zero still gives a finite multiplier
+        error_rate_multiplier = incident_error_rate / max(baseline_error_rate, 1)
+        error_rate_increase = error_rate_multiplier - 1
+        latency_increase = incident_p99_latency / baseline_p99_latency if baseline_p99_latency else 1.0
         
-        # Simulate incident metrics (after deploy_1009)
-        incident_error_rate = 35  # errors per minute
-        incident_p99_latency = 2500  # ms
+        # Seasonality: the same window a week earlier
+        seasonal_baseline = None
+        if last_week:
+            seasonal_baseline = {
+                'error_rate_per_min': last_week['error_rate_per_min'],
+                'p99_latency_ms': last_week['p99_latency_ms'],
+                'period': f"{format_time_ms(incident_start_ms - WEEK_MS)} to {format_time_ms(incident_end_ms - 1 - WEEK_MS)}",
+                'events': last_week['events'],
+                'error_rate_multiplier': f"{incident_error_rate / max(last_week['error_rate_per_min'], 1):.1f}x",
+                'latency_multiplier': f"{incident_p99_latency / last_week['p99_latency_ms']:.1f}x"
+                if last_week['p99_latency_ms'] else None
+            }
         
-        # Calculate degradation
-        error_rate_increase = (incident_error_rate / baseline_error_rate) - 1
-        latency_increase = (incident_p99_latency / baseline_p99_latency)
+        # Load and latency shape beyond the critical threshold
+        with span('retry_analysis') as s:
+            retry_analysis = analyze_retries(incident_context)
+            storms = retry_analysis['retry_storms']
+            clusters = retry_analysis['timeout_clusters']
+            s.set(rows=len(incident_context), storms=len(storms), clusters=len(clusters))
         
         # Determine severity
         if error_rate_increase > 5 or latency_increase > 2:
@@ -58,20 +153,24 @@ def lambda_handler(event, context):
         
         findings = {
             'agent': 'MetricsAgent',
+            'incident_id': event.get('incident_id') or event.get('context_id'),
             'findings': {
                 'baseline': {
                     'error_rate_per_min': baseline_error_rate,
                     'p99_latency_ms': baseline_p99_latency,
-                    'period': f"{baseline_start.isoformat()} to {baseline_end.isoformat()}"
+                    'period': f"{format_time_ms(baseline_start_ms)} to {format_time_ms(incident_start_ms)}",
+                    'events': baseline['events'],
+                    'source': baseline_source
                 },
                 'incident': {
                     'error_rate_per_min': incident_error_rate,
                     'p99_latency_ms': incident_p99_latency,
-                    'period': f"{incident_start.isoformat()} to {incident_end.isoformat()}"
+                    'period': f"{format_time_ms(incident_start_ms)} to {format_time_ms(incident_end_ms - 1)}",
+                    'events': incident['events']
                 },
                 'degradation': {
                     'error_rate_increase': f"{error_rate_increase * 100:.0f}%",
-                    'error_rate_multiplier': f"{incident_error_rate / baseline_error_rate:.1f}x",
+                    'error_rate_multiplier': f"{error_rate_multiplier:.1f}x",
                     'latency_increase': f"{(latency_increase - 1) * 100:.0f}%",
                     'latency_multiplier': f"{latency_increase:.1f}x"
                 },
@@ -79,17 +178,33 @@ def lambda_handler(event, context):
                     f"Error rate spike of {error_rate_increase * 100:.0f}% detected",
                     f"P99 latency increased {latency_increase:.1f}x from baseline",
                     "Critical threshold breach at incident start time"
-                ]
+                ] + ([f"Error rate {seasonal_baseline['error_rate_multiplier']} and P99 latency "
+                      f"{seasonal_baseline['latency_multiplier']} vs the same window last week"] if seasonal_baseline else [])
+                + [f"Retry storm on {storm['service']}: {storm['load_growth']} retry-weighted load, "
+                   f"{storm['attempts_per_request']} attempts per request (baseline {storm['baseline_attempts_per_request']})"
+                   for storm in storms]
+                + [f"Bimodal latency on {cluster['service']}: {cluster['incident_slow_share']}% of requests in a "
+                   f"~{cluster['slow_mode_ms']}ms timeout cluster (baseline {cluster['baseline_slow_share']}%)"
+                   for cluster in clusters],
+                'seasonal_baseline': seasonal_baseline,
+                'retry_storms': storms,
+                'timeout_clusters': clusters,
+                'retry_distribution': retry_analysis['retry_distribution']
             },
             'severity': severity,
-            'confidence': 0.92,
-            'spike_detected_at': incident_start.isoformat()
+            # Without baseline events the comparison is against nothing
+            'confidence': 0.92 if baseline['events'] else 0.6,
+            'spike_detected_at': format_time_ms(incident_start_ms)
         }
         
         print(f"✅ Metrics analysis complete")
         print(f"   Severity: {severity}")
         print(f"   Error rate increase: {error_rate_increase * 100:.0f}%")
         print(f"   Latency degradation: {latency_increase:.1f}x")
+        if storms:
+            print("   Retry storms: " + ', '.join(f"{storm['service']} ({storm['load_growth']})" for storm in storms))
+        if clusters:
+            print("   Timeout clusters: " + ', '.join(f"{cluster['service']} (~{cluster['slow_mode_ms']}ms)" for cluster in clusters))
         
         return findings
         
@@ -0,0 +1,106 @@
+"""
+AWS Client Factory
+Shared boto3 clients for every Lambda: created on first use rather than at
+import, configured once (timeouts, retries, pool size, keep-alive),
+instrumented, and cached for the life of the container. boto3 itself is only
+imported when the first client is built, so handlers that never call AWS skip
+that cost entirely during a cold start.
+"""
+
+import json
+import os
+import threading
+
+from instrumentation import instrument_client
+
+# Environment variables
+AWS_REGION = os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+AWS_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('AWS_CONNECT_TIMEOUT_SECONDS', '3'))
+AWS_READ_TIMEOUT_SECONDS = float(os.environ.get('AWS_READ_TIMEOUT_SECONDS', '30'))
+AWS_MAX_ATTEMPTS = int(os.environ.get('AWS_MAX_ATTEMPTS', '3'))
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '10'))
+
+_session = None
+_clients = {}
+_overrides = {}
+_lock = threading.Lock()
+
+
+def default_config(**overrides):
+    """botocore Config shared by all clients; keyword arguments replace defaults."""
+    from botocore.config import Config
+
+    params = {
+        'connect_timeout': AWS_CONNECT_TIMEOUT_SECONDS,
+        'read_timeout': AWS_READ_TIMEOUT_SECONDS,
+        'retries': {'max_attempts': AWS_MAX_ATTEMPTS, 'mode': 'standard'},
+        'max_pool_connections': AWS_MAX_POOL_CONNECTIONS,
+        'tcp_keepalive': True
+    }
+    params.update(overrides)
+    return Config(**params)
+
+
+def _get_session():
+    # One session for every client, so endpoint and service model data load once
+    global _session
+    if _session is None:
+        import boto3
+        _session = boto3.session.Session()
+    return _session
+
+
+def get_client(service, region_name=None, config=None):
+    """
+    Cached client for `service`. `config` is a dict of botocore Config overrides;
+    each distinct config gets its own client, so a module's retry and pool
+    settings hold no matter which module asked for the service first.
+    """
+    if service in _overrides:
+        return _overrides[service]
+
+    key = (service, region_name or AWS_REGION, json.dumps(config or {}, sort_keys=True))
+    client = _clients.get(key)
+    if client is None:
+        # Sessions are not thread-safe; build each client once under the lock
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = instrument_client(_get_session().client(
+                    service,
+                    region_name=key[1],
+                    # A fresh copy: botocore adds keys to the retries dict it is given
+                    config=default_config(**json.loads(key[2]))
+                ))
+                _clients[key] = client
+    return client
+
+
+class LazyClient:
+    """Module-level handle that resolves to the shared client on first attribute access."""
+
+    __slots__ = ('service', 'region_name', 'config')
+
+    def __init__(self, service, region_name=None, config=None):
+        self.service = service
+        self.region_name = region_name
+        self.config = config
+
+    def __getattr__(self, name):
+        return getattr(get_client(self.service, self.region_name, self.config), name)
+
+    def __repr__(self):
+        return f"LazyClient({self.service!r})"
+
+
+def lazy_client(service, region_name=None, config=None):
+    return LazyClient(service, region_name, config)
+
+
+def set_override(service, client):
+    """Serve `client` for every `service` lookup (in-memory stand-ins, tests)."""
+    _overrides[service] = client
+
+
+def clear_overrides():
+    _overrides.clear()
@@ -0,0 +1,249 @@
+"""
+Bedrock Runtime Client
+Transport for the Commander's Claude calls, via boto3 or a Bedrock API key,
+either blocking or streamed with incremental parsing of the JSON answer.
+Both paths share connection-pooled, keep-alive clients created on first use
+and kept for the container's life so warm invocations skip the TLS handshake.
+"""
+
+import base64
+import json
+import os
+import struct
+import urllib.parse
+from concurrent.futures import CancelledError
+
+from aws_clients import lazy_client
+from llm_json import IncrementalJSONParser
+
+# Environment variables
+BEDROCK_API_KEY = os.environ.get('AWS_BEDROCK_API_KEY', '')
+BEDROCK_REGION = os.environ.get('BEDROCK_REGION', 'us-east-1')
+BEDROCK_STREAMING = os.environ.get('BEDROCK_STREAMING', 'true').lower() == 'true'
+BEDROCK_TIMEOUT_SECONDS = int(os.environ.get('BEDROCK_TIMEOUT_SECONDS', '30'))
+BEDROCK_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('BEDROCK_CONNECT_TIMEOUT_SECONDS', '3'))
+BEDROCK_MAX_ATTEMPTS = int(os.environ.get('BEDROCK_MAX_ATTEMPTS', '3'))
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.environ.get('BEDROCK_MAX_POOL_CONNECTIONS', '10'))
+BEDROCK_WARMUP = os.environ.get('BEDROCK_WARMUP', 'false').lower() == 'true'
+
+# Initialize Bedrock client (fallback to standard boto3) with a tuned config:
+# adaptive retries back off client-side when Bedrock throttles
+bedrock = lazy_client(
+    'bedrock-runtime',
+    region_name=BEDROCK_REGION,
+    config={
+        'connect_timeout': BEDROCK_CONNECT_TIMEOUT_SECONDS,
+        'read_timeout': BEDROCK_TIMEOUT_SECONDS,
+        'retries': {'max_attempts': BEDROCK_MAX_ATTEMPTS, 'mode': 'adaptive'},
+        'max_pool_connections': BEDROCK_MAX_POOL_CONNECTIONS
+    }
+)
+
+_http_pool = None
+
+
+def get_http_pool():
+    """Shared keep-alive pool for the API-key path (urllib3 ships with botocore)."""
+    global _http_pool
+    if _http_pool is None:
+        import urllib3
+        _http_pool = urllib3.PoolManager(
+            maxsize=BEDROCK_MAX_POOL_CONNECTIONS,
+            timeout=urllib3.Timeout(connect=BEDROCK_CONNECT_TIMEOUT_SECONDS, read=BEDROCK_TIMEOUT_SECONDS),
+            retries=urllib3.Retry(
+                total=BEDROCK_MAX_ATTEMPTS - 1,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=None,
+                respect_retry_after_header=True
+            ),
+            headers={'Connection': 'keep-alive'}
+        )
+    return _http_pool
+
+# Event-stream header value sizes by type id (7 = string, 6 = bytes are length-prefixed)
+HEADER_VALUE_SIZES = {0: 0, 1: 0, 2: 1, 3: 2, 4: 4, 5: 8, 8: 8, 9: 16}
+
+
+def build_request_body(prompt, max_tokens, temperature):
+    return json.dumps({
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "messages": [{
+            "role": "user",
+            "content": prompt
+        }],
+        "temperature": temperature
+    }).encode('utf-8')
+
+
+def _api_key_url(streaming):
+    # Extract the signed URL from the bearer token
+    # Format: bedrock-api-key-<base64-encoded-presigned-url>
+    encoded_url = BEDROCK_API_KEY.replace('bedrock-api-key-', '')
+    bedrock_url = urllib.parse.unquote(encoded_url)
+    if streaming and bedrock_url.endswith('/invoke'):
+        bedrock_url += '-with-response-stream'
+    return bedrock_url
+
+
+def _parse_headers(raw):
+    headers = {}
+    offset = 0
+    while offset < len(raw):
+        name_length = raw[offset]
+        name = raw[offset + 1:offset + 1 + name_length].decode('utf-8')
+        offset += 1 + name_length
+        value_type = raw[offset]
+        offset += 1
+        if value_type in (6, 7):
+            (value_length,) = struct.unpack('>H', raw[offset:offset + 2])
+            value = raw[offset + 2:offset + 2 + value_length]
+            headers[name] = value.decode('utf-8') if value_type == 7 else value
+            offset += 2 + value_length
+        else:
+            offset += HEADER_VALUE_SIZES[value_type]
+    return headers
+
+
+def iter_event_stream(chunks):
+    """Decode AWS event-stream frames from an iterable of byte chunks, yielding each
+    message payload as soon as its frame is complete."""
+    buffer = bytearray()
+    chunks = iter(chunks)
+    while True:
+        while len(buffer) >= 12:
+            total_length, headers_length = struct.unpack('>II', buffer[:8])
+            if len(buffer) < total_length:
+                break
+            frame = memoryview(buffer)[:total_length]
+            headers = _parse_headers(bytes(frame[12:12 + headers_length]))
+            payload = bytes(frame[12 + headers_length:total_length - 4])
+            frame.release()
+            del buffer[:total_length]
+            if headers.get(':message-type') == 'exception':
+                raise RuntimeError(f"Bedrock stream error ({headers.get(':exception-type')}): {payload.decode('utf-8')}")
+            yield payload
+
+        chunk = next(chunks, b'')
+        if not chunk:
+            return
+        buffer.extend(chunk)
+
+
+def _arriving_chunks(response, chunk_size=8192):
+    """
+    Response bytes as they arrive. read(n) would block until n bytes are in,
+    holding back events (and early JSON fields) already received; read1 (urllib3
+    2.x) returns what is buffered, and stream() yields each HTTP chunk of a
+    chunked response on urllib3 1.x.
+    """
+    if hasattr(response, 'read1'):
+        return iter(lambda: response.read1(chunk_size), b'')
+    return response.stream(chunk_size)
+
+
+def _text_deltas(chunk_payloads):
+    """Yield text deltas from Anthropic streaming events."""
+    for payload in chunk_payloads:
+        data = json.loads(payload)
+        if data.get('type') == 'content_block_delta':
+            yield data['delta'].get('text', '')
+
+
+def _post_api_key(body, streaming):
+    headers = {'Content-Type': 'application/json'}
+    if streaming:
+        headers['Accept'] = 'application/vnd.amazon.eventstream'
+    response = get_http_pool().request(
+        'POST',
+        _api_key_url(streaming),
+        body=body,
+        headers=headers,
+        preload_content=not streaming
+    )
+    if response.status >= 400:
+        data = response.data if not streaming else response.read()
+        response.release_conn()
+        raise RuntimeError(f"Bedrock HTTP {response.status}: {data[:500].decode('utf-8', 'replace')}")
+    return response
+
+
+def _stream_chunks_api_key(body):
+    response = _post_api_key(body, streaming=True)
+    completed = False
+    try:
+        for payload in iter_event_stream(_arriving_chunks(response)):
+            # Each event wraps the model chunk as {"bytes": "<base64>"}
+            yield base64.b64decode(json.loads(payload)['bytes'])
+        completed = True
+    finally:
+        if completed:
+            # Return the connection to the pool for the next warm invocation
+            response.release_conn()
+        else:
+            # Abandoned mid-stream: a half-read connection must not go back to the pool
+            response.close()
+
+
+def _stream_chunks_boto3(model_id, body):
+    response = bedrock.invoke_model_with_response_stream(modelId=model_id, body=body)
+    try:
+        for event in response['body']:
+            if 'chunk' in event:
+                yield event['chunk']['bytes']
+    finally:
+        response['body'].close()
+
+
+def invoke_claude(prompt, model_id, max_tokens, temperature, on_field=None, streaming=None, cancelled=None):
+    """
+    Send the prompt to Claude on Bedrock and return the response text.
+
+    When streaming, top-level scalar fields of the JSON answer (root_cause,
+    confidence, ...) are passed to `on_field(name, value)` as soon as they
+    are complete, before the rest of the completion has arrived. Setting the
+    `cancelled` event stops reading the stream (raises CancelledError).
+    """
+    streaming = BEDROCK_STREAMING if streaming is None else streaming
+    body = build_request_body(prompt, max_tokens, temperature)
+    use_api_key = BEDROCK_API_KEY and BEDROCK_API_KEY.startswith('bedrock-api-key-')
+
+    if streaming:
+        print(f"   Streaming from Bedrock ({'API key' if use_api_key else 'boto3'})")
+        chunks = _stream_chunks_api_key(body) if use_api_key else _stream_chunks_boto3(model_id, body)
+        parser = IncrementalJSONParser(on_field=on_field)
+        try:
+            for text in _text_deltas(chunks):
+                if cancelled is not None and cancelled.is_set():
+                    raise CancelledError(f"{model_id} stream cancelled")
+                parser.feed(text)
+        finally:
+            chunks.close()
+        return parser.text()
+
+    # If we have a bearer token API key, use direct HTTP request
+    if use_api_key:
+        print("   Using Bedrock API key authentication")
+        response_body = json.loads(_post_api_key(body, streaming=False).data.decode('utf-8'))
+    else:
+        # Use standard boto3 client
+        print("   Using standard boto3 Bedrock client")
+        response = bedrock.invoke_model(modelId=model_id, body=body)
+        response_body = json.loads(response['body'].read())
+
+    return response_body['content'][0]['text']
+
+
+def warm_up(model_id):
+    """Open the Bedrock connection during Lambda init so the first investigation skips the handshake."""
+    try:
+        if BEDROCK_API_KEY and BEDROCK_API_KEY.startswith('bedrock-api-key-'):
+            parsed = urllib.parse.urlsplit(_api_key_url(streaming=False))
+            get_http_pool().request('HEAD', f"{parsed.scheme}://{parsed.netloc}/", retries=False).release_conn()
+        else:
+            # A 1-token completion is the cheapest call that opens the pooled connection
+            bedrock.invoke_model(modelId=model_id, body=build_request_body('ping', 1, 0.0))
+        print("🔥 Bedrock connection warmed up")
+    except Exception as e:
+        print(f"⚠️  Bedrock warm-up failed: {str(e)}")
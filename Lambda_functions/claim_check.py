@@ -0,0 +1,166 @@
+"""
+Claim-Check Payloads
+Keeps Step Functions state small: large fields of a handler's result are written
+once to S3 (gzip JSON, keyed by content hash) and replaced by a reference,
+and the next handler's event has its references resolved back to plain values
+before the handler runs.
+
+A reference looks like {"$claim_check": {"bucket", "key", "bytes"}}. Payloads
+are content-addressed and the warm container remembers which keys it fetched
+or stored, so a handler that passes a payload through (e.g. the report's
+{**event, ...}) offloads it to the same reference again without another
+upload. Resolved payloads are shared with that cache, so handlers treat them
+as read-only. A field is only offloaded when its reference is smaller than the
+field.
+Add an S3 lifecycle rule on CLAIM_CHECK_PREFIX to expire old payloads.
+"""
+
+import functools
+import gzip
+import hashlib
+import json
+import os
+
+from aws_clients import lazy_client
+from instrumentation import span
+from response_cache import MemoryTier
+
+s3_client = lazy_client('s3')
+
+# Environment variables
+CLAIM_CHECK_ENABLED = os.environ.get('CLAIM_CHECK_ENABLED', 'true').lower() == 'true'
+CLAIM_CHECK_BUCKET = os.environ.get('CLAIM_CHECK_BUCKET', os.environ.get('REPORTS_BUCKET', 'hackathon-team14-bucket'))
+CLAIM_CHECK_PREFIX = os.environ.get('CLAIM_CHECK_PREFIX', 'claim_check/')
+# Results above this size get their largest fields offloaded (Step Functions caps state at 256 KB)
+THRESHOLD_BYTES = int(os.environ.get('CLAIM_CHECK_THRESHOLD_BYTES', str(64 * 1024)))
+# Fields smaller than this stay inline
+MIN_FIELD_BYTES = int(os.environ.get('CLAIM_CHECK_MIN_FIELD_BYTES', '4096'))
+
+REF_KEY = '$claim_check'
+# How deep into events and results references are looked for (batch events nest agent outputs)
+MAX_DEPTH = 5
+CONDITIONAL_WRITE_CONFLICTS = ('PreconditionFailed', 'ConditionalRequestConflict')
+
+# Payloads already fetched or stored by this warm container
+payload_cache = MemoryTier(max_entries=64, max_bytes=32 * 1024 * 1024)
+stored_keys = set()
+
+
+def _encode(value):
+    return json.dumps(value, separators=(',', ':'), sort_keys=True, default=str).encode('utf-8')
+
+
+def is_reference(value):
+    return isinstance(value, dict) and set(value) == {REF_KEY}
+
+
+def reference(body):
+    """The reference a payload with these encoded bytes is stored under."""
+    key = f"{CLAIM_CHECK_PREFIX}{hashlib.sha256(body).hexdigest()}.json.gz"
+    return {REF_KEY: {'bucket': CLAIM_CHECK_BUCKET, 'key': key, 'bytes': len(body)}}
+
+
+def store(value, body=None):
+    """Write a value once to S3 and return its reference."""
+    body = body if body is not None else _encode(value)
+    ref = reference(body)
+    key = ref[REF_KEY]['key']
+    if key not in stored_keys:
+        try:
+            # Content-addressed: an existing object already holds these bytes
+            s3_client.put_object(
+                Bucket=CLAIM_CHECK_BUCKET,
+                Key=key,
+                Body=gzip.compress(body, mtime=0),
+                ContentType='application/json',
+                ContentEncoding='gzip',
+                IfNoneMatch='*'
+            )
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') not in CONDITIONAL_WRITE_CONFLICTS:
+                raise
+        stored_keys.add(key)
+    payload_cache.put(key, value, 3600, len(body))
+    return ref
+
+
+def fetch(reference):
+    """Value behind a reference (warm-container cache first)."""
+    location = reference[REF_KEY]
+    value = payload_cache.get(location['key'])
+    if value is None:
+        with span('claim_check_fetch', key=location['key']) as s:
+            response = s3_client.get_object(Bucket=location['bucket'], Key=location['key'])
+            body = gzip.decompress(response['Body'].read())
+            value = json.loads(body)
+            s.set(bytes=len(body))
+        payload_cache.put(location['key'], value, 3600, len(body))
+        # The object exists, so offloading the same payload again needs no upload
+        stored_keys.add(location['key'])
+    return value
+
+
+def resolve(value, depth=MAX_DEPTH):
+    """Replace references (in the event, nested up to depth) with their plain values."""
+    if is_reference(value):
+        return fetch(value)
+    if depth and isinstance(value, dict):
+        return {k: resolve(v, depth - 1) for k, v in value.items()}
+    if depth and isinstance(value, list):
+        return [resolve(v, depth - 1) for v in value]
+    return value
+
+
+def materialize(value):
+    """Resolve every reference at any depth (for local tools that print or save whole results)."""
+    if is_reference(value):
+        return materialize(fetch(value))
+    if isinstance(value, dict):
+        return {k: materialize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [materialize(v) for v in value]
+    return value
+
+
+def offload(result, threshold=THRESHOLD_BYTES):
+    """Offload a result's largest fields until it fits under the threshold."""
+    if not isinstance(result, dict):
+        return result
+    body = _encode(result)
+    if len(body) <= threshold:
+        return result
+
+    with span('claim_check_offload', bytes=len(body)) as s:
+        fields = sorted(
+            ((_encode(v), k) for k, v in result.items() if isinstance(v, dict) and not is_reference(v)),
+            key=lambda field: len(field[0]),
+            reverse=True
+        )
+        result = dict(result)
+        total = len(body)
+        offloaded = []
+        for field_body, key in fields:
+            size = len(field_body)
+            if total <= threshold or size < MIN_FIELD_BYTES:
+                break
+            ref_size = len(_encode(reference(field_body)))
+            if ref_size >= size:
+                continue
+            result[key] = store(result[key], field_body)
+            total -= size - ref_size
+            offloaded.append(key)
+        s.set(offloaded=offloaded, remaining_bytes=total)
+    print(f"   📦 Claim-checked {', '.join(offloaded) or 'nothing'} ({len(body)} -> {total} bytes of state)")
+    return result
+
+
+def claim_checked(handler):
+    """Resolve references in the event and offload large fields of the result."""
+    if not CLAIM_CHECK_ENABLED:
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        return offload(handler(resolve(event), context))
+
+    return wrapper
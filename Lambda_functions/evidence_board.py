@@ -0,0 +1,212 @@
+"""
+Evidence Board
+Lets the Commander start before the slowest agent finishes. Each agent
+publishes its findings to the board as soon as it completes. The Commander
+polls the board, runs a preliminary synthesis once the early-exit gate is met,
+and refines it when late evidence arrives.
+
+The gate is met when at least EARLY_EXIT_MIN_AGENTS agents have published with
+confidence >= EARLY_EXIT_MIN_CONFIDENCE and (with EARLY_EXIT_REQUIRE_AGREEMENT)
+at least two of them name the same deployment and none names another.
+
+Board layout (S3, EVIDENCE_BUCKET):
+
+  {EVIDENCE_PREFIX}{investigation_id}/agents/{agent}.json
+  {EVIDENCE_PREFIX}{investigation_id}/commander/{early|preliminary|final}.json
+
+commander/early.json holds the root_cause and confidence fields streamed from
+Claude before its full answer arrives, rewritten as each field lands.
+
+With EARLY_EXIT_ENABLED, process_logs adds an "evidence_board" reference to the
+investigation input. The state machine then runs the Commander as a fourth
+branch of the Parallel state, next to the agents, rather than after it.
+"""
+
+import functools
+import json
+import os
+import time
+
+from aws_clients import lazy_client
+from claim_check import resolve
+
+s3_client = lazy_client('s3')
+
+# Environment variables
+EARLY_EXIT_ENABLED = os.environ.get('EARLY_EXIT_ENABLED', 'false').lower() == 'true'
+EVIDENCE_BUCKET = os.environ.get('EVIDENCE_BUCKET', os.environ.get('REPORTS_BUCKET', 'hackathon-team14-bucket'))
+EVIDENCE_PREFIX = os.environ.get('EVIDENCE_PREFIX', 'evidence/')
+EARLY_EXIT_MIN_AGENTS = int(os.environ.get('EARLY_EXIT_MIN_AGENTS', '2'))
+EARLY_EXIT_MIN_CONFIDENCE = float(os.environ.get('EARLY_EXIT_MIN_CONFIDENCE', '0.8'))
+EARLY_EXIT_REQUIRE_AGREEMENT = os.environ.get('EARLY_EXIT_REQUIRE_AGREEMENT', 'true').lower() == 'true'
+EVIDENCE_WAIT_SECONDS = float(os.environ.get('EVIDENCE_WAIT_SECONDS', '120'))
+EVIDENCE_POLL_SECONDS = float(os.environ.get('EVIDENCE_POLL_SECONDS', '0.5'))
+
+EXPECTED_AGENTS = ('LogsAgent', 'MetricsAgent', 'DeployAgent')
+
+
+def board_ref(investigation_id, bucket=EVIDENCE_BUCKET):
+    """The reference an investigation input carries to enable the board."""
+    return {'investigation_id': investigation_id, 'bucket': bucket}
+
+
+class EvidenceBoard:
+    """One investigation's published agent findings and Commander results."""
+
+    def __init__(self, investigation_id, bucket=EVIDENCE_BUCKET, s3=None):
+        self.investigation_id = investigation_id
+        self.bucket = bucket
+        self.s3 = s3 or s3_client
+        self.prefix = f"{EVIDENCE_PREFIX}{investigation_id}/"
+        self.seen = set()
+
+    @classmethod
+    def from_event(cls, event):
+        """Board referenced by an investigation event, or None."""
+        ref = event.get('evidence_board') if isinstance(event, dict) else None
+        if not ref:
+            return None
+        return cls(ref['investigation_id'], ref.get('bucket', EVIDENCE_BUCKET))
+
+    def _put(self, key, document):
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=json.dumps(document, default=str).encode('utf-8'),
+            ContentType='application/json'
+        )
+
+    def publish(self, findings):
+        agent = findings.get('agent', 'UnknownAgent')
+        self._put(f"{self.prefix}agents/{agent}.json", {'published_at': time.time(), 'findings': findings})
+
+    def publish_result(self, stage, result):
+        self._put(f"{self.prefix}commander/{stage}.json", {'published_at': time.time(), 'result': result})
+
+    def collect(self):
+        """Findings published since the last call, {agent: findings}."""
+        new = {}
+        response = self.s3.list_objects_v2(Bucket=self.bucket, Prefix=f"{self.prefix}agents/")
+        for item in response.get('Contents', []):
+            key = item['Key']
+            if key in self.seen:
+                continue
+            document = json.loads(self.s3.get_object(Bucket=self.bucket, Key=key)['Body'].read())
+            findings = resolve(document['findings'])
+            new[findings.get('agent', key.rsplit('/', 1)[-1][:-len('.json')])] = findings
+            self.seen.add(key)
+        return new
+
+
+def publishes_evidence(handler):
+    """Publish an agent's result to the investigation's board, if it has one."""
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        result = handler(event, context)
+        board = EvidenceBoard.from_event(event)
+        if board is not None:
+            try:
+                board.publish(result)
+            except Exception as e:
+                print(f"⚠️  Could not publish to evidence board: {str(e)}")
+        return result
+
+    return wrapper
+
+
+def deployment_votes(evidence):
+    """{agent: deployment_id} for agents that attribute the incident to a deployment."""
+    votes = {}
+    logs = (evidence.get('LogsAgent') or {}).get('findings', {}) or {}
+    correlation = logs.get('deployment_correlation', {})
+    if correlation.get('percentage', 0) > 50:
+        votes['LogsAgent'] = correlation.get('deployment_id')
+    deploy = (evidence.get('DeployAgent') or {}).get('findings', {}) or {}
+    if deploy.get('correlation', {}).get('deployment_id'):
+        votes['DeployAgent'] = deploy['correlation']['deployment_id']
+    return {agent: deployment for agent, deployment in votes.items() if deployment not in (None, 'None', 'Unknown')}
+
+
+def gate(evidence, min_agents=EARLY_EXIT_MIN_AGENTS, min_confidence=EARLY_EXIT_MIN_CONFIDENCE,
+         require_agreement=EARLY_EXIT_REQUIRE_AGREEMENT):
+    """(met, reason): whether the evidence so far is strong enough for a preliminary RCA."""
+    confident = {
+        agent: findings for agent, findings in evidence.items()
+        if 'error' not in findings and findings.get('confidence', 0) >= min_confidence
+    }
+    if len(confident) < min_agents:
+        return False, f"{len(confident)}/{min_agents} agents at >= {min_confidence:.0%} confidence"
+    if require_agreement:
+        votes = deployment_votes(confident)
+        if len(votes) < 2 or len(set(votes.values())) != 1:
+            return False, f"no agreement on a deployment ({votes or 'no votes'})"
+        return True, f"{' and '.join(sorted(votes))} agree on {next(iter(votes.values()))}"
+    return True, f"{len(confident)} agents at >= {min_confidence:.0%} confidence"
+
+
+def collect_and_synthesize(board, synthesize, wait_seconds=EVIDENCE_WAIT_SECONDS, poll_seconds=EVIDENCE_POLL_SECONDS):
+    """
+    Poll the board until every agent has published or wait_seconds pass.
+    synthesize(agent_outputs) is run once when the gate is met (preliminary)
+    and again if evidence arrives after that (refined). Returns the final
+    result with an 'evidence_board' section describing how it was reached.
+    """
+    started = time.time()
+    deadline = started + wait_seconds
+    evidence = {}
+    timeline = []
+    preliminary = None
+    preliminary_info = None
+
+    while True:
+        for agent, findings in board.collect().items():
+            evidence[agent] = findings
+            timeline.append({'agent': agent, 'elapsed_ms': int((time.time() - started) * 1000)})
+            print(f"   📥 Evidence from {agent} ({findings.get('confidence', 0):.0%} confidence)")
+
+        complete = all(agent in evidence for agent in EXPECTED_AGENTS)
+        if complete or time.time() >= deadline:
+            break
+
+        if preliminary is None:
+            met, reason = gate(evidence)
+            if met:
+                print(f"   🚦 Early-exit gate met: {reason}")
+                agents = sorted(evidence)
+                preliminary = synthesize([evidence[agent] for agent in agents])
+                preliminary_info = {
+                    'agents': agents,
+                    'gate': reason,
+                    'root_cause': preliminary.get('root_cause'),
+                    'confidence': preliminary.get('confidence'),
+                    'elapsed_ms': int((time.time() - started) * 1000)
+                }
+                board.publish_result('preliminary', preliminary)
+                print(f"   ⚡ Preliminary RCA after {preliminary_info['elapsed_ms']}ms: {preliminary.get('root_cause')}")
+                continue
+
+        time.sleep(poll_seconds)
+
+    late_agents = sorted(set(evidence) - set(preliminary_info['agents'])) if preliminary_info else []
+    if preliminary is not None and not late_agents:
+        result = preliminary
+    else:
+        if late_agents:
+            print(f"   🔁 Refining with late evidence from {', '.join(late_agents)}")
+        result = synthesize([evidence[agent] for agent in sorted(evidence)])
+
+    elapsed_ms = int((time.time() - started) * 1000)
+    result['evidence_board'] = {
+        'investigation_id': board.investigation_id,
+        'time_to_first_rca_ms': preliminary_info['elapsed_ms'] if preliminary_info else elapsed_ms,
+        'time_to_final_rca_ms': elapsed_ms,
+        'preliminary': preliminary_info,
+        'refined': bool(late_agents),
+        'root_cause_changed': bool(preliminary_info) and preliminary_info['root_cause'] != result.get('root_cause'),
+        'late_agents': late_agents,
+        'missing_agents': [agent for agent in EXPECTED_AGENTS if agent not in evidence],
+        'timeline': timeline
+    }
+    board.publish_result('final', result)
+    return result
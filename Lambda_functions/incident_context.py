@@ -0,0 +1,303 @@
+"""
+Incident Context
+One columnar snapshot of an investigation's events, built once at ingestion
+and shared by the parallel agents through its ID instead of each agent
+fetching and parsing the same events again.
+
+Columns are parsed once: event times (epoch ms), latency and retry counts
+are typed arrays, and low-cardinality dimensions (service, endpoint, region,
+error type, deployment, config version) are dictionary-encoded. Per-minute
+buckets and the time bounds are precomputed. Agents derive views from the
+context (critical rows, counts per dimension, the spike start), memoized on
+the context object, so agents sharing a warm container or process compute
+each view once.
+
+The context is stored as gzip JSON with base64-encoded arrays under
+CONTEXT_PREFIX and referenced in the Step Functions input as context_id and
+context_ref.
+"""
+
+import base64
+import bisect
+import gzip
+import json
+import os
+import threading
+from array import array
+from collections import Counter
+from datetime import datetime
+
+from aws_clients import lazy_client
+from response_cache import MemoryTier
+
+s3_client = lazy_client('s3')
+
+# Environment variables
+CRITICAL_LATENCY_MS = int(os.environ.get('CRITICAL_LATENCY_MS', '2000'))
+CONTEXT_BUCKET = os.environ.get('CONTEXT_BUCKET', os.environ.get('REPORTS_BUCKET', 'hackathon-team14-bucket'))
+CONTEXT_PREFIX = os.environ.get('CONTEXT_PREFIX', 'incident_context/')
+# A minute is the spike start when its critical count is this many times the
+# running mean of earlier minutes (plus one), and at least SPIKE_MIN_CRITICAL
+SPIKE_FACTOR = float(os.environ.get('CONTEXT_SPIKE_FACTOR', '3'))
+SPIKE_MIN_CRITICAL = int(os.environ.get('CONTEXT_SPIKE_MIN_CRITICAL', '5'))
+
+FORMAT_VERSION = 1
+MINUTE_MS = 60000
+DIMENSIONS = ('service', 'endpoint', 'region', 'error_type', 'deployment_id', 'config_version')
+# High-cardinality strings, kept as plain lists for trace analysis
+STRING_COLUMNS = ('trace_id', 'span_id')
+
+# Contexts already loaded by this warm container, by context_id
+context_cache = MemoryTier(max_entries=8, max_bytes=256 * 1024 * 1024)
+
+
+def parse_time_ms(value):
+    """ISO timestamp (with or without Z) -> epoch ms, as process_logs computes it."""
+    return int(datetime.fromisoformat(str(value).replace('Z', '')).timestamp() * 1000)
+
+
+def format_time_ms(ms):
+    return datetime.fromtimestamp(ms / 1000).isoformat()
+
+
+def _int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def code_typecode(cardinality):
+    """Smallest array typecode that holds dictionary codes for this many values."""
+    return 'B' if cardinality <= 0xFF else 'H' if cardinality <= 0xFFFF else 'l'
+
+
+def _encode_array(values):
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def _encode_codes(codes, cardinality):
+    typecode = code_typecode(cardinality)
+    return [typecode, _encode_array(array(typecode, codes))]
+
+
+def _decode_array(typecode, data):
+    values = array(typecode)
+    values.frombytes(base64.b64decode(data))
+    return values
+
+
+class IncidentContext:
+    """Columnar, read-only view of one investigation's events."""
+
+    def __init__(self, context_id, time_window, ts, latency, retries, dictionaries, codes, strings):
+        self.context_id = context_id
+        self.time_window = time_window
+        self.start_ms = parse_time_ms(time_window['start'])
+        self.end_ms = parse_time_ms(time_window['end'])
+        self.ts = ts
+        self.latency = latency
+        self.retries = retries
+        self.dictionaries = dictionaries
+        self.codes = codes
+        self.strings = strings
+        self.views = {}
+        self.lock = threading.RLock()
+        self.minute_buckets = self._minute_buckets()
+
+    def __len__(self):
+        return len(self.ts)
+
+    @classmethod
+    def from_records(cls, context_id, records, time_window=None):
+        """Build from parsed log events (dicts), sorted by event time."""
+        rows = []
+        for record in records:
+            try:
+                rows.append((parse_time_ms(record.get('timestamp') or record['@timestamp']), record))
+            except (KeyError, ValueError):
+                continue
+        rows.sort(key=lambda row: row[0])
+        if time_window is None:
+            time_window = {
+                'start': format_time_ms(rows[0][0]) if rows else datetime.utcnow().isoformat(),
+                'end': format_time_ms(rows[-1][0]) if rows else datetime.utcnow().isoformat()
+            }
+
+        ts, latency, retries = array('q'), array('l'), array('h')
+        dictionaries = {dim: [] for dim in DIMENSIONS}
+        lookups = {dim: {} for dim in DIMENSIONS}
+        codes = {dim: array('l') for dim in DIMENSIONS}
+        strings = {column: [] for column in STRING_COLUMNS}
+        for timestamp_ms, record in rows:
+            ts.append(timestamp_ms)
+            latency.append(_int(record.get('latency_ms')))
+            retries.append(_int(record.get('retry_count')))
+            for dim in DIMENSIONS:
+                value = record.get(dim) or 'Unknown'
+                code = lookups[dim].get(value)
+                if code is None:
+                    code = lookups[dim][value] = len(dictionaries[dim])
+                    dictionaries[dim].append(value)
+                codes[dim].append(code)
+            for column in STRING_COLUMNS:
+                strings[column].append(record.get(column) or '')
+        return cls(context_id, time_window, ts, latency, retries, dictionaries, codes, strings)
+
+    def _minute_buckets(self):
+        """[{'minute_ms', 'events', 'critical', 'latency_sum', 'latency_max'}] in time order."""
+        buckets = []
+        for i, timestamp_ms in enumerate(self.ts):
+            minute = timestamp_ms - timestamp_ms % MINUTE_MS
+            if not buckets or buckets[-1]['minute_ms'] != minute:
+                buckets.append({'minute_ms': minute, 'events': 0, 'critical': 0, 'latency_sum': 0, 'latency_max': 0})
+            bucket = buckets[-1]
+            latency = self.latency[i]
+            bucket['events'] += 1
+            bucket['critical'] += latency >= CRITICAL_LATENCY_MS
+            bucket['latency_sum'] += latency
+            bucket['latency_max'] = max(bucket['latency_max'], latency)
+        return buckets
+
+    # Memoized views
+
+    def view(self, name, compute):
+        """Compute a derived view once per context (shared by agents in the same process)."""
+        with self.lock:
+            if name not in self.views:
+                self.views[name] = compute()
+            return self.views[name]
+
+    def rows_between(self, start_ms, end_ms):
+        """Row range [first, last) with start_ms <= ts < end_ms (rows are time-sorted)."""
+        return bisect.bisect_left(self.ts, start_ms), bisect.bisect_left(self.ts, end_ms)
+
+    def critical_rows(self):
+        return self.view('critical_rows', lambda: array('l', (
+            i for i, latency in enumerate(self.latency) if latency >= CRITICAL_LATENCY_MS
+        )))
+
+    def counts(self, dim, rows=None):
+        """Counter of decoded dimension values over rows (default: critical rows)."""
+        def compute():
+            codes = self.codes[dim]
+            selected = self.critical_rows() if rows is None else rows
+            counted = Counter(codes[i] for i in selected)
+            return Counter({self.dictionaries[dim][code]: n for code, n in counted.items()})
+        return self.view(('counts', dim), compute) if rows is None else compute()
+
+    def value(self, dim, row):
+        return self.dictionaries[dim][self.codes[dim][row]]
+
+    def records(self, rows):
+        """Rows back as log-event dicts (for code written against raw events)."""
+        return [
+            {
+                'timestamp': format_time_ms(self.ts[i]),
+                'latency_ms': self.latency[i],
+                'retry_count': self.retries[i],
+                **{dim: self.value(dim, i) for dim in DIMENSIONS},
+                **{column: self.strings[column][i] for column in STRING_COLUMNS}
+            }
+            for i in rows
+        ]
+
+    def spike_start_ms(self):
+        """Start of the first minute whose critical count jumps above the running baseline."""
+        def compute():
+            total = 0
+            for index, bucket in enumerate(self.minute_buckets):
+                mean = total / index if index else 0
+                # The first minute has no running baseline to jump above
+                if index and bucket['critical'] >= SPIKE_MIN_CRITICAL and bucket['critical'] >= SPIKE_FACTOR * (mean + 1):
+                    return bucket['minute_ms']
+                total += bucket['critical']
+            return self.start_ms
+        return self.view('spike_start_ms', compute)
+
+    def latency_percentile(self, first, last, q):
+        values = sorted(self.latency[first:last])
+        if not values:
+            return 0
+        return values[min(len(values) - 1, max(0, int(round(q * len(values))) - 1))]
+
+    # Storage
+
+    def to_bytes(self):
+        document = {
+            'version': FORMAT_VERSION,
+            'context_id': self.context_id,
+            'time_window': self.time_window,
+            'columns': {
+                'ts': _encode_array(self.ts),
+                'latency': _encode_array(self.latency),
+                'retries': _encode_array(self.retries),
+            },
+            'typecodes': {'ts': self.ts.typecode, 'latency': self.latency.typecode, 'retries': self.retries.typecode},
+            'dictionaries': self.dictionaries,
+            'codes': {dim: _encode_codes(codes, len(self.dictionaries[dim])) for dim, codes in self.codes.items()},
+            'strings': {column: '\n'.join(values) for column, values in self.strings.items()}
+        }
+        return gzip.compress(json.dumps(document, separators=(',', ':')).encode('utf-8'), mtime=0)
+
+    @classmethod
+    def from_bytes(cls, data):
+        document = json.loads(gzip.decompress(data))
+        typecodes = document['typecodes']
+        columns = document['columns']
+        ts = _decode_array(typecodes['ts'], columns['ts'])
+        strings = {
+            column: values.split('\n') if ts else []
+            for column, values in document['strings'].items()
+        }
+        return cls(
+            document['context_id'],
+            document['time_window'],
+            ts,
+            _decode_array(typecodes['latency'], columns['latency']),
+            _decode_array(typecodes['retries'], columns['retries']),
+            document['dictionaries'],
+            {dim: _decode_array(typecode, codes) for dim, (typecode, codes) in document['codes'].items()},
+            strings
+        )
+
+    def summary(self):
+        return {
+            'events': len(self),
+            'critical_events': len(self.critical_rows()),
+            'minutes': len(self.minute_buckets),
+            'dimensions': {dim: len(values) for dim, values in self.dictionaries.items()}
+        }
+
+
+def context_key(context_id):
+    return f"{CONTEXT_PREFIX}{context_id}.json.gz"
+
+
+def save_context(context, bucket=CONTEXT_BUCKET):
+    """Store a context; returns the reference the Step Functions input carries."""
+    data = context.to_bytes()
+    key = context_key(context.context_id)
+    s3_client.put_object(Bucket=bucket, Key=key, Body=data, ContentType='application/json')
+    context_cache.put(context.context_id, context, 86400, len(data))
+    return {'bucket': bucket, 'key': key, 'bytes': len(data)}
+
+
+def load_context(event):
+    """The context an investigation event refers to, or None if it carries none."""
+    context_id = event.get('context_id')
+    if not context_id:
+        return None
+    context = context_cache.get(context_id)
+    if context is not None:
+        return context
+    ref = event.get('context_ref') or {}
+    try:
+        response = s3_client.get_object(Bucket=ref.get('bucket', CONTEXT_BUCKET), Key=ref.get('key', context_key(context_id)))
+        data = response['Body'].read()
+        context = IncidentContext.from_bytes(data)
+    except Exception as e:
+        print(f"⚠️  Could not load incident context {context_id}: {str(e)}")
+        return None
+    context_cache.put(context_id, context, 86400, len(data))
+    return context
@@ -0,0 +1,126 @@
+"""
+Incident Similarity Index
+Feature vectors for incidents and an in-memory nearest-neighbour index over
+past ones, built from the report index (see report_store).
+
+An incident is a sparse vector with four weighted feature groups:
+  - error:<type>     share of critical errors per error type
+  - service:<name>   share of critical errors per affected service
+  - change:<word>    keywords from the implicated deployment's changes
+  - latency:<bucket> p99 latency, latency multiplier and severity buckets
+Each group is L2-normalised and scaled by its weight, and the whole vector is
+normalised, so cosine similarity is a sparse dot product. Lookups score only
+incidents that share a feature, through an inverted index.
+"""
+
+import heapq
+import math
+import re
+from collections import defaultdict
+
+GROUP_WEIGHTS = {'error': 0.4, 'change': 0.3, 'service': 0.15, 'latency': 0.15}
+
+# Words that say nothing about the kind of change
+STOPWORDS = frozenset(
+    'a an and as at by for from in into of on or the to with updated update enabled '
+    'disabled changed change set reduced increased added removed new old'.split()
+)
+WORD = re.compile(r'[a-z][a-z_]{2,}')
+
+
+def _normalized(weights):
+    norm = math.sqrt(sum(v * v for v in weights.values()))
+    return {k: v / norm for k, v in weights.items()} if norm else {}
+
+
+def _bucket(value, edges):
+    """Index of the first edge above value, as a small ordinal label."""
+    for index, edge in enumerate(edges):
+        if value < edge:
+            return index
+    return len(edges)
+
+
+def _multiplier(text):
+    try:
+        return float(str(text).rstrip('x'))
+    except ValueError:
+        return None
+
+
+def change_keywords(changes):
+    return {w for change in changes for w in WORD.findall(change.lower()) if w not in STOPWORDS}
+
+
+def incident_features(logs_findings, metrics_findings, deploy_findings):
+    """Sparse, unit-length feature vector ({feature: weight}) from agent findings."""
+    logs = (logs_findings or {}).get('findings', {}) or {}
+    metrics = (metrics_findings or {}).get('findings', {}) or {}
+    deploy = (deploy_findings or {}).get('findings', {}) or {}
+
+    groups = {
+        'error': {f"error:{k}": v for k, v in (logs.get('error_distribution') or {}).items()},
+        'service': {f"service:{k}": v for k, v in (logs.get('affected_services') or {}).items()},
+    }
+
+    changes = list((deploy.get('target_deployment') or {}).get('changes', []))
+    changes += [c.get('change', '') for c in deploy.get('suspicious_changes', [])]
+    groups['change'] = {f"change:{w}": 1.0 for w in change_keywords(changes)}
+
+    latency = {}
+    p99 = (metrics.get('incident') or {}).get('p99_latency_ms')
+    if p99 is not None:
+        latency[f"latency:p99_{_bucket(p99, (100, 500, 2000, 5000))}"] = 1.0
+    multiplier = _multiplier((metrics.get('degradation') or {}).get('latency_multiplier', ''))
+    if multiplier is not None:
+        latency[f"latency:x{_bucket(multiplier, (1.5, 3, 6))}"] = 1.0
+    severity = (metrics_findings or {}).get('severity')
+    if severity:
+        latency[f"latency:sev_{severity}"] = 1.0
+    groups['latency'] = latency
+
+    vector = {}
+    for group, weights in groups.items():
+        for feature, value in _normalized(weights).items():
+            vector[feature] = value * GROUP_WEIGHTS[group]
+    return {k: round(v, 4) for k, v in _normalized(vector).items()}
+
+
+class SimilarityIndex:
+    """In-memory cosine nearest-neighbour search over sparse incident vectors."""
+
+    def __init__(self):
+        self.records = []
+        self.postings = defaultdict(list)
+
+    def add(self, vector, record):
+        record_id = len(self.records)
+        self.records.append(record)
+        for feature, weight in vector.items():
+            self.postings[feature].append((record_id, weight))
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Build from report index entries that carry a 'features' vector."""
+        index = cls()
+        seen = set()
+        # Newest first, so a re-indexed incident keeps its latest entry
+        for entry in reversed(entries):
+            features = entry.get('features')
+            if not features or entry.get('content_hash') in seen:
+                continue
+            seen.add(entry.get('content_hash'))
+            index.add(features, {k: v for k, v in entry.items() if k != 'features'})
+        return index
+
+    def __len__(self):
+        return len(self.records)
+
+    def nearest(self, vector, k=3, min_similarity=0.0):
+        """[(similarity, record)] for the k most similar incidents."""
+        scores = defaultdict(float)
+        for feature, weight in vector.items():
+            for record_id, other in self.postings.get(feature, ()):
+                scores[record_id] += weight * other
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(round(score, 4), self.records[rid]) for rid, score in best if score >= min_similarity]
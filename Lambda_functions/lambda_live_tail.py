@@ -0,0 +1,392 @@
+"""
+Lambda Function: Live Tail
+Streaming ingestion: consumes CloudWatch Logs subscription batches, delivered
+directly or through a Kinesis stream (base64 + gzip payloads), keeps per-minute
+pre-aggregates over a sliding window and starts an investigation as soon as
+the window crosses the critical-error threshold, instead of waiting for a log
+file to land in S3 (see lambda_process_logs).
+
+Windows are kept per source (Kinesis shard or log group) in the warm container
+and optionally checkpointed to S3, so a cold start resumes where it left off.
+Route the subscription through Kinesis for one consumer per shard; direct
+subscriptions can fan out over concurrent containers that each see part of
+the traffic.
+"""
+
+import base64
+import json
+import os
+import zlib
+from collections import Counter
+from datetime import datetime
+
+from aws_clients import lazy_client
+from instrumentation import instrumented_handler, span
+
+s3_client = lazy_client('s3')
+logs_client = lazy_client('logs')
+stepfunctions_client = lazy_client('stepfunctions')
+
+# Environment variables
+CRITICAL_LATENCY_MS = int(os.environ.get('CRITICAL_LATENCY_MS', '2000'))
+LOG_GROUP_NAME = os.environ.get('LOG_GROUP_NAME', '/aws/incident-commander/critical-errors-team14')
+STATE_MACHINE_ARN = os.environ.get('STATE_MACHINE_ARN', 'arn:aws:states:us-east-1:333813598365:stateMachine:incident-reasoning-orchestrator')
+WINDOW_MINUTES = int(os.environ.get('LIVE_TAIL_WINDOW_MINUTES', '5'))
+TRIGGER_THRESHOLD = int(os.environ.get('LIVE_TAIL_TRIGGER_THRESHOLD', '50'))
+COOLDOWN_MINUTES = int(os.environ.get('LIVE_TAIL_COOLDOWN_MINUTES', '15'))
+STATE_BUCKET = os.environ.get('LIVE_TAIL_STATE_BUCKET', '')
+STATE_PREFIX = os.environ.get('LIVE_TAIL_STATE_PREFIX', 'live_tail/state/')
+
+GZIP_MAGIC = b'\x1f\x8b'
+MINUTE_MS = 60000
+
+# PutLogEvents limits: events per call, and bytes per call (UTF-8 message + 26 bytes per event)
+PUT_LOG_EVENTS_MAX_EVENTS = 10000
+PUT_LOG_EVENTS_MAX_BYTES = 1048576
+LOG_EVENT_OVERHEAD_BYTES = 26
+
+# Per-source sliding windows, kept across warm invocations
+windows = {}
+known_streams = set()
+
+
+def decode_payload(data):
+    """base64 payload -> raw bytes, gunzipped when compressed (no str round trip)."""
+    raw = base64.b64decode(data)
+    if memoryview(raw)[:2] == GZIP_MAGIC:
+        raw = zlib.decompress(raw, 31)
+    return raw
+
+
+def encode_payload(document):
+    """Inverse of decode_payload: the gzip + base64 envelope CloudWatch Logs delivers."""
+    body = json.dumps(document, separators=(',', ':')).encode('utf-8')
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return base64.b64encode(compressor.compress(body) + compressor.flush()).decode('ascii')
+
+
+def subscription_event(log_group, log_stream, log_events):
+    """Lambda event for one CloudWatch Logs subscription delivery (for replays and tests)."""
+    return {'awslogs': {'data': encode_payload({
+        'messageType': 'DATA_MESSAGE',
+        'owner': 'local',
+        'logGroup': log_group,
+        'logStream': log_stream,
+        'subscriptionFilters': ['live-tail'],
+        'logEvents': log_events
+    })}}
+
+
+def _event_time_ms(record, fallback_ms):
+    timestamp = record.get('timestamp')
+    if timestamp:
+        try:
+            return int(datetime.fromisoformat(timestamp.replace('Z', '')).timestamp() * 1000)
+        except ValueError:
+            pass
+    return fallback_ms
+
+
+def _parse_log_events(envelope):
+    """(record, timestamp_ms) for each JSON log line in a subscription envelope."""
+    for log_event in envelope.get('logEvents', []):
+        try:
+            record = json.loads(log_event['message'])
+        except (json.JSONDecodeError, TypeError):
+            continue
+        if isinstance(record, dict):
+            yield record, _event_time_ms(record, log_event.get('timestamp', 0))
+
+
+def iter_batches(event):
+    """
+    Decode a Lambda event into (source, log_group, [(record, timestamp_ms)]) batches.
+    log_group is None for raw JSON lines that are not in CloudWatch yet.
+    """
+    if 'awslogs' in event:
+        envelope = json.loads(decode_payload(event['awslogs']['data']))
+        if envelope.get('messageType') == 'DATA_MESSAGE':
+            yield envelope['logGroup'], envelope['logGroup'], list(_parse_log_events(envelope))
+        return
+
+    for record in event.get('Records', []):
+        if 'kinesis' not in record:
+            continue
+        source = record.get('eventID', 'kinesis').split(':')[0]
+        data = decode_payload(record['kinesis']['data'])
+        if b'"logEvents"' in data[:4096]:
+            envelope = json.loads(data)
+            if envelope.get('messageType') == 'DATA_MESSAGE':
+                yield source, envelope['logGroup'], list(_parse_log_events(envelope))
+            continue
+        rows = []
+        for line in data.splitlines():
+            try:
+                parsed = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(parsed, dict):
+                rows.append((parsed, _event_time_ms(parsed, record['kinesis'].get('approximateArrivalTimestamp', 0) * 1000)))
+        yield source, None, rows
+
+
+def group_by_source(batches):
+    """
+    Merge an event's batches per source (a Kinesis invocation carries one batch
+    per record), so each window is updated, checkpointed and forwarded once.
+    Returns [{'source', 'log_group', 'rows', 'unforwarded'}] in first-seen order;
+    unforwarded holds the raw rows not in CloudWatch yet.
+    """
+    groups = {}
+    for source, log_group, rows in batches:
+        group = groups.get(source)
+        if group is None:
+            group = groups[source] = {'source': source, 'log_group': None, 'rows': [], 'unforwarded': []}
+        group['rows'].extend(rows)
+        if log_group is None:
+            group['unforwarded'].extend(rows)
+        else:
+            group['log_group'] = log_group
+    return list(groups.values())
+
+
+def log_event_batches(log_events):
+    """Split log events into PutLogEvents calls within the event-count and byte limits."""
+    batch, size = [], 0
+    for log_event in log_events:
+        event_size = len(log_event['message'].encode('utf-8')) + LOG_EVENT_OVERHEAD_BYTES
+        if batch and (len(batch) >= PUT_LOG_EVENTS_MAX_EVENTS or size + event_size > PUT_LOG_EVENTS_MAX_BYTES):
+            yield batch
+            batch, size = [], 0
+        batch.append(log_event)
+        size += event_size
+    if batch:
+        yield batch
+
+
+class SlidingWindow:
+    """Per-minute pre-aggregates over the last WINDOW_MINUTES of event time."""
+
+    def __init__(self, minutes=WINDOW_MINUTES):
+        self.minutes = minutes
+        self.buckets = {}
+        self.latest_ms = 0
+        self.last_trigger_ms = None
+        self.late_events = 0
+
+    def add(self, record, timestamp_ms):
+        minute = timestamp_ms // MINUTE_MS
+        if self.latest_ms and minute <= self.latest_ms // MINUTE_MS - self.minutes:
+            self.late_events += 1
+            return
+        bucket = self.buckets.get(minute)
+        if bucket is None:
+            bucket = self.buckets[minute] = {
+                'count': 0, 'critical': 0, 'latency_sum': 0, 'latency_max': 0, 'retries': 0,
+                'services': Counter(), 'error_types': Counter()
+            }
+        latency = record.get('latency_ms', 0) or 0
+        bucket['count'] += 1
+        bucket['latency_sum'] += latency
+        bucket['latency_max'] = max(bucket['latency_max'], latency)
+        bucket['retries'] += record.get('retry_count', 0) or 0
+        if latency >= CRITICAL_LATENCY_MS:
+            bucket['critical'] += 1
+            bucket['services'][record.get('service', 'unknown')] += 1
+            bucket['error_types'][record.get('error_type', 'unknown')] += 1
+        self.latest_ms = max(self.latest_ms, timestamp_ms)
+
+    def evict(self):
+        oldest = self.latest_ms // MINUTE_MS - self.minutes + 1
+        for minute in [m for m in self.buckets if m < oldest]:
+            del self.buckets[minute]
+
+    def summary(self):
+        """Window totals: the ingestion summary passed to the investigation."""
+        totals = {'events': 0, 'critical': 0, 'latency_sum': 0, 'latency_max': 0, 'retries': 0}
+        services, error_types = Counter(), Counter()
+        for bucket in self.buckets.values():
+            totals['events'] += bucket['count']
+            totals['critical'] += bucket['critical']
+            totals['latency_sum'] += bucket['latency_sum']
+            totals['latency_max'] = max(totals['latency_max'], bucket['latency_max'])
+            totals['retries'] += bucket['retries']
+            services.update(bucket['services'])
+            error_types.update(bucket['error_types'])
+        first_minute = min(self.buckets) if self.buckets else self.latest_ms // MINUTE_MS
+        return {
+            'window_start': datetime.fromtimestamp(first_minute * MINUTE_MS / 1000).isoformat(),
+            'window_end': datetime.fromtimestamp(self.latest_ms / 1000).isoformat(),
+            'total_events': totals['events'],
+            'critical_events': totals['critical'],
+            'avg_latency_ms': round(totals['latency_sum'] / totals['events'], 1) if totals['events'] else 0,
+            'max_latency_ms': totals['latency_max'],
+            'retries': totals['retries'],
+            'critical_by_minute': {
+                datetime.fromtimestamp(m * MINUTE_MS / 1000).strftime('%H:%M'): b['critical']
+                for m, b in sorted(self.buckets.items())
+            },
+            'critical_services': dict(services.most_common()),
+            'critical_error_types': dict(error_types.most_common())
+        }
+
+    def should_trigger(self):
+        if self.last_trigger_ms is not None and self.latest_ms < self.last_trigger_ms + COOLDOWN_MINUTES * MINUTE_MS:
+            return False
+        return sum(b['critical'] for b in self.buckets.values()) > TRIGGER_THRESHOLD
+
+    def to_dict(self):
+        return {
+            'minutes': self.minutes,
+            'buckets': {str(m): b for m, b in self.buckets.items()},
+            'latest_ms': self.latest_ms,
+            'last_trigger_ms': self.last_trigger_ms,
+            'late_events': self.late_events
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        window = cls(data.get('minutes', WINDOW_MINUTES))
+        for minute, bucket in data.get('buckets', {}).items():
+            bucket['services'] = Counter(bucket['services'])
+            bucket['error_types'] = Counter(bucket['error_types'])
+            window.buckets[int(minute)] = bucket
+        window.latest_ms = data.get('latest_ms', 0)
+        window.last_trigger_ms = data.get('last_trigger_ms')
+        window.late_events = data.get('late_events', 0)
+        return window
+
+
+def _state_key(source):
+    return f"{STATE_PREFIX}{source.strip('/').replace('/', '_')}.json"
+
+
+def get_window(source):
+    """Warm-container window for a source, restored from the S3 checkpoint on a cold start."""
+    window = windows.get(source)
+    if window is not None:
+        return window
+    window = SlidingWindow()
+    if STATE_BUCKET:
+        try:
+            response = s3_client.get_object(Bucket=STATE_BUCKET, Key=_state_key(source))
+            window = SlidingWindow.from_dict(json.loads(response['Body'].read()))
+            print(f"♻️  Restored live-tail window for {source}")
+        except Exception as e:
+            print(f"ℹ️  No live-tail checkpoint for {source}: {str(e)}")
+    windows[source] = window
+    return window
+
+
+def save_window(source, window):
+    if not STATE_BUCKET:
+        return
+    try:
+        s3_client.put_object(
+            Bucket=STATE_BUCKET,
+            Key=_state_key(source),
+            Body=json.dumps(window.to_dict()).encode('utf-8'),
+            ContentType='application/json'
+        )
+    except Exception as e:
+        print(f"⚠️  Failed to checkpoint live-tail window: {str(e)}")
+
+
+def forward_to_cloudwatch(rows, log_stream_name):
+    """Raw Kinesis lines are not in CloudWatch yet; write them where the agents query."""
+    if log_stream_name not in known_streams:
+        try:
+            logs_client.create_log_stream(logGroupName=LOG_GROUP_NAME, logStreamName=log_stream_name)
+        except logs_client.exceptions.ResourceAlreadyExistsException:
+            pass
+        known_streams.add(log_stream_name)
+    log_events = sorted(
+        ({'timestamp': ts, 'message': json.dumps(record)} for record, ts in rows),
+        key=lambda x: x['timestamp']
+    )
+    for batch in log_event_batches(log_events):
+        logs_client.put_log_events(
+            logGroupName=LOG_GROUP_NAME,
+            logStreamName=log_stream_name,
+            logEvents=batch
+        )
+
+
+def start_investigation(source, log_group, window):
+    summary = window.summary()
+    name = f"live-{source.strip('/').replace('/', '-')[-40:]}-{datetime.fromtimestamp(window.latest_ms / 1000).strftime('%Y%m%d-%H%M%S')}"
+    with span('trigger_investigation'):
+        response = stepfunctions_client.start_execution(
+            stateMachineArn=STATE_MACHINE_ARN,
+            name=name,
+            input=json.dumps({
+                'incident_id': name,
+                'log_group': log_group,
+                'time_window': {
+                    'start': summary['window_start'],
+                    'end': summary['window_end']
+                },
+                'error_count': summary['critical_events'],
+                'auto_triggered': True,
+                'trigger': 'live_tail',
+                'ingestion_summary': summary
+            })
+        )
+    window.last_trigger_ms = window.latest_ms
+    return response['executionArn']
+
+
+@instrumented_handler('live_tail')
+def lambda_handler(event, context):
+    """Main handler for subscription / Kinesis batches."""
+
+    try:
+        with span('decode') as s:
+            groups = group_by_source(iter_batches(event))
+            s.set(rows=sum(len(group['rows']) for group in groups))
+
+        results = []
+        for group in groups:
+            source, rows = group['source'], group['rows']
+            if not rows:
+                continue
+            if group['unforwarded']:
+                with span('put_log_events', rows=len(group['unforwarded'])):
+                    forward_to_cloudwatch(group['unforwarded'], f"live-tail-{source}")
+            log_group = group['log_group'] or LOG_GROUP_NAME
+
+            window = get_window(source)
+            with span('window_update', rows=len(rows)):
+                for record, timestamp_ms in rows:
+                    window.add(record, timestamp_ms)
+                window.evict()
+
+            critical = sum(b['critical'] for b in window.buckets.values())
+            execution_arn = None
+            if window.should_trigger():
+                try:
+                    print(f"🚀 Live tail: {critical} critical errors in the last {window.minutes} min, starting investigation")
+                    execution_arn = start_investigation(source, log_group, window)
+                    print(f"✅ Investigation started: {execution_arn}")
+                except Exception as trigger_error:
+                    print(f"⚠️  Failed to auto-trigger investigation: {str(trigger_error)}")
+
+            save_window(source, window)
+            results.append({
+                'source': source,
+                'log_group': log_group,
+                'events': len(rows),
+                'critical_in_window': critical,
+                'trigger_investigation': execution_arn is not None,
+                'execution_arn': execution_arn
+            })
+
+        print(f"📊 Live tail: {sum(r['events'] for r in results)} events from {len(results)} source(s)")
+        return {
+            'statusCode': 200,
+            'body': json.dumps({'batches': results})
+        }
+
+    except Exception as e:
+        print(f"❌ Error in live tail: {str(e)}")
+        raise
@@ -1,23 +1,71 @@
 """
 Lambda Function: Process Logs
 Reads error logs from S3, filters critical errors (latency >= 2000ms), 
-and writes them to CloudWatch Logs for analysis.
+and writes them to CloudWatch Logs for analysis. With CATEGORIZED_BUCKET set,
+the same pass also writes every event into latency-category partitions
+(see partition_sink), and with ROLLUP_ENABLED it updates the minute/hour
+baseline rollups (see rollups). Investigations it triggers carry the ID of a
+shared incident context (see incident_context) built from the same parsed
+events.
 """
 
+import hashlib
 import json
-import boto3
 import os
+import zlib
 from datetime import datetime
 
-s3_client = boto3.client('s3')
-logs_client = boto3.client('logs')
-stepfunctions_client = boto3.client('stepfunctions')
+from aws_clients import lazy_client
+from evidence_board import EARLY_EXIT_ENABLED, board_ref
+from incident_context import IncidentContext, save_context
+from instrumentation import instrumented_handler, span
+from partition_sink import CATEGORIZED_BUCKET, PartitionedSink
+from rollups import ROLLUP_ENABLED, Rollup, RollupStore
+
+s3_client = lazy_client('s3')
+logs_client = lazy_client('logs')
+stepfunctions_client = lazy_client('stepfunctions')
 
 # Environment variables
 CRITICAL_LATENCY_MS = int(os.environ.get('CRITICAL_LATENCY_MS', '2000'))
 LOG_GROUP_NAME = os.environ.get('LOG_GROUP_NAME', '/aws/incident-commander/critical-errors-team14')
 STATE_MACHINE_ARN = os.environ.get('STATE_MACHINE_ARN', 'arn:aws:states:us-east-1:333813598365:stateMachine:incident-reasoning-orchestrator')
 
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+def iter_lines(body):
+    """Non-empty lines (bytes) of an S3 object body, gunzipped on the fly when compressed."""
+    decompressor = None
+    pending = b''
+    first = True
+    while True:
+        chunk = body.read(READ_CHUNK_BYTES)
+        if first:
+            first = False
+            # Backfills are uploaded gzip-compressed (see upload_to_s3.py)
+            if chunk[:2] == b'\x1f\x8b':
+                decompressor = zlib.decompressobj(31)
+        if decompressor is not None:
+            data = decompressor.decompress(chunk) if chunk else decompressor.flush()
+            # Concatenated gzip members
+            while decompressor.eof and decompressor.unused_data:
+                rest = decompressor.unused_data
+                decompressor = zlib.decompressobj(31)
+                data += decompressor.decompress(rest)
+        else:
+            data = chunk
+        lines = (pending + data).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line.rstrip(b'\r')
+        if not chunk:
+            break
+    if pending.strip():
+        yield pending.rstrip(b'\r')
+
+@instrumented_handler('process_logs')
 def lambda_handler(event, context):
     """Main handler for processing S3 log files."""
     
@@ -28,17 +76,60 @@ def lambda_handler(event, context):
         
         print(f"📥 Processing file: s3://{bucket}/{key}")
         
-        # Download log file from S3
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        log_data = response['Body'].read().decode('utf-8')
-        
-        # Parse JSON logs
-        all_errors = []
-        for line in log_data.strip().split('\n'):
+        # Stream the log file from S3: parse each line and route it to its
+        # partition in one pass, without holding the raw file in memory
+        with span('s3_read', key=key):
+            response = s3_client.get_object(Bucket=bucket, Key=key)
+        
+        # Identifies this object version, so re-processing it is recognisable
+        run_id = hashlib.sha1(f"{bucket}/{key}/{response.get('ETag', '')}".encode('utf-8')).hexdigest()[:12]
+        sink = PartitionedSink(s3_client, CATEGORIZED_BUCKET, run_id) if CATEGORIZED_BUCKET else None
+        rollup = Rollup() if ROLLUP_ENABLED else None
+        
+        with span('parse') as s:
+            all_errors = []
+            size = 0
+            for line in iter_lines(response['Body']):
+                size += len(line) + 1
+                try:
+                    error = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                all_errors.append(error)
+                if sink:
+                    try:
+                        sink.add(error, line)
+                    except Exception as sink_error:
+                        # Partitions are a side output; the investigation goes on without them
+                        sink.abort()
+                        sink = None
+                        print(f"⚠️  Failed to write categorized partitions, continuing without them: {str(sink_error)}")
+                if rollup:
+                    rollup.add(error)
+            s.set(rows=len(all_errors), bytes=size)
+        
+        partitions = None
+        if sink:
+            try:
+                with span('partition_sink') as s:
+                    partitions = sink.close()
+                    s.set(bytes=partitions['compressed_bytes'], rows=partitions['events'])
+                print(f"🗂️  Wrote {partitions['events']} events to {partitions['files']} part files in "
+                      f"{partitions['partitions']} partitions under s3://{CATEGORIZED_BUCKET}/{partitions['prefix']}")
+            except Exception as sink_error:
+                sink.abort()
+                print(f"⚠️  Failed to write categorized partitions: {str(sink_error)}")
+        
+        rollup_summary = None
+        if rollup:
             try:
-                all_errors.append(json.loads(line))
-            except json.JSONDecodeError:
-                continue
+                with span('rollups') as s:
+                    rollup_summary = RollupStore().update(rollup, run_id)
+                    s.set(rows=rollup_summary['cells'])
+                print(f"📈 Updated {rollup_summary['cells']} rollup cells in {rollup_summary['objects']} objects"
+                      + (f" ({rollup_summary['skipped']} already applied)" if rollup_summary['skipped'] else ''))
+            except Exception as rollup_error:
+                print(f"⚠️  Failed to update rollups: {str(rollup_error)}")
         
         print(f"📊 Total errors in file: {len(all_errors)}")
         
@@ -75,13 +166,14 @@ def lambda_handler(event, context):
         log_events.sort(key=lambda x: x['timestamp'])
         
         # CloudWatch has a 10,000 event limit per request
-        for i in range(0, len(log_events), 10000):
-            batch = log_events[i:i+10000]
-            logs_client.put_log_events(
-                logGroupName=LOG_GROUP_NAME,
-                logStreamName=log_stream_name,
-                logEvents=batch
-            )
+        with span('put_log_events', rows=len(log_events)):
+            for i in range(0, len(log_events), 10000):
+                batch = log_events[i:i+10000]
+                logs_client.put_log_events(
+                    logGroupName=LOG_GROUP_NAME,
+                    logStreamName=log_stream_name,
+                    logEvents=batch
+                )
         
         print(f"✅ Wrote {len(all_errors)} logs to CloudWatch ({len(critical_errors)} critical)")
         
@@ -97,21 +189,40 @@ def lambda_handler(event, context):
                 timestamps = [datetime.fromisoformat(e['timestamp'].replace('Z', '')) for e in all_errors]
                 start_time = min(timestamps).isoformat()
                 end_time = max(timestamps).isoformat()
+                time_window = {
+                    'start': start_time,
+                    'end': end_time
+                }
+                
+                # Build the shared incident context once, so the agents skip
+                # re-querying and re-parsing the same events
+                context_fields = {}
+                try:
+                    with span('incident_context') as s:
+                        incident_context = IncidentContext.from_records(log_stream_name, all_errors, time_window)
+                        context_ref = save_context(incident_context)
+                        s.set(rows=len(incident_context), bytes=context_ref['bytes'])
+                    context_fields = {'context_id': log_stream_name, 'context_ref': context_ref}
+                    print(f"🧊 Incident context {log_stream_name}: {len(incident_context)} events, "
+                          f"{context_ref['bytes']} bytes")
+                except Exception as context_error:
+                    print(f"⚠️  Failed to build incident context: {str(context_error)}")
                 
                 # Start Step Functions execution
-                response = stepfunctions_client.start_execution(
-                    stateMachineArn=STATE_MACHINE_ARN,
-                    name=f"{log_stream_name}-auto",
-                    input=json.dumps({
-                        'log_group': LOG_GROUP_NAME,
-                        'time_window': {
-                            'start': start_time,
-                            'end': end_time
-                        },
-                        'error_count': len(critical_errors),
-                        'auto_triggered': True
-                    })
-                )
+                with span('trigger_investigation'):
+                    response = stepfunctions_client.start_execution(
+                        stateMachineArn=STATE_MACHINE_ARN,
+                        name=f"{log_stream_name}-auto",
+                        input=json.dumps({
+                            'incident_id': log_stream_name,
+                            'log_group': LOG_GROUP_NAME,
+                            'time_window': time_window,
+                            'error_count': len(critical_errors),
+                            'auto_triggered': True,
+                            **context_fields,
+                            **({'evidence_board': board_ref(log_stream_name)} if EARLY_EXIT_ENABLED else {})
+                        })
+                    )
                 
                 execution_arn = response['executionArn']
                 print(f"✅ Investigation started: {execution_arn}")
@@ -129,7 +240,9 @@ def lambda_handler(event, context):
                 'log_group': LOG_GROUP_NAME,
                 'log_stream': log_stream_name,
                 'trigger_investigation': trigger_investigation,
-                'execution_arn': execution_arn
+                'execution_arn': execution_arn,
+                'partitions': partitions,
+                'rollups': rollup_summary
             })
         }
         
@@ -0,0 +1,167 @@
+"""
+Tolerant JSON parsing for LLM responses
+Extracts the JSON object from Claude's answer regardless of code fences or
+surrounding prose, repairs common defects, and parses streamed output
+incrementally so top-level fields are available as soon as they are emitted.
+"""
+
+import json
+import re
+
+TRAILING_COMMA = re.compile(r',\s*([}\]])')
+PYTHON_LITERALS = re.compile(r'(:\s*)(True|False|None)\b')
+PYTHON_JSON = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+
+def _scan(text, start):
+    """Walk a JSON object from `start`; return (end_index or None, open bracket stack, in_string)."""
+    stack = []
+    in_string = False
+    escape = False
+    for index in range(start, len(text)):
+        ch = text[index]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append(ch)
+        elif ch in '}]':
+            if stack:
+                stack.pop()
+            if not stack:
+                return index + 1, stack, False
+    return None, stack, in_string
+
+
+def _repair(candidate):
+    """Fix trailing commas, Python literals and truncated output."""
+    repaired = PYTHON_LITERALS.sub(lambda m: m.group(1) + PYTHON_JSON[m.group(2)], candidate)
+
+    end, stack, in_string = _scan(repaired, 0)
+    if end is None:
+        # Truncated response (e.g. max_tokens hit): close what is open
+        if in_string:
+            repaired += '"'
+        repaired = re.sub(r'[,:]\s*$', '', repaired.rstrip())
+        repaired = re.sub(r',\s*"[^"]*"\s*$', '', repaired)
+        repaired += ''.join('}' if opener == '{' else ']' for opener in reversed(stack))
+
+    return TRAILING_COMMA.sub(r'\1', repaired)
+
+
+def parse_llm_json(text):
+    """Parse the first JSON object in an LLM response, tolerating fences, prose and truncation."""
+    start = text.find('{')
+    if start == -1:
+        raise ValueError('No JSON object found in LLM response')
+
+    end, _, _ = _scan(text, start)
+    candidate = text[start:end] if end else text[start:]
+
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        return json.loads(_repair(candidate))
+
+
+class IncrementalJSONParser:
+    """
+    Feed streamed text chunks; scalar fields of the top-level object are
+    reported through `on_field(name, value)` as soon as each value completes.
+    Nested values are only available from `result()` once the stream ends.
+    """
+
+    def __init__(self, on_field=None):
+        self.on_field = on_field
+        self.chunks = []
+        self.fields = {}
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.token = []
+        self.key = None
+        self.expect = 'key'
+
+    def feed(self, chunk):
+        self.chunks.append(chunk)
+        for ch in chunk:
+            if self.depth < 0:
+                break
+            if self.depth == 0:
+                # Skip prose and code fences until the object opens
+                if ch == '{':
+                    self.depth = 1
+                    self.expect = 'key'
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self._string_done()
+                    continue
+                if self.depth == 1:
+                    self.token.append(ch)
+                continue
+
+            if ch == '"':
+                self.in_string = True
+                self.token = []
+            elif ch in '{[':
+                if self.depth == 1 and self.expect == 'value':
+                    self.expect = 'nested'
+                self.depth += 1
+            elif ch in '}]':
+                if self.depth == 1:
+                    self._scalar_done()
+                self.depth -= 1
+                if self.depth == 0:
+                    # Top-level object closed; ignore anything after it
+                    self.depth = -1
+            elif self.depth == 1:
+                if ch == ':':
+                    self.expect = 'value'
+                    self.token = []
+                elif ch == ',':
+                    self._scalar_done()
+                    self.expect = 'key'
+                elif self.expect == 'value' and not ch.isspace():
+                    self.token.append(ch)
+
+    def _string_done(self):
+        text = json.loads('"' + ''.join(self.token) + '"')
+        if self.expect == 'key':
+            self.key = text
+            self.expect = 'colon'
+        elif self.expect == 'value':
+            self._emit(text)
+
+    def _scalar_done(self):
+        if self.expect == 'value' and self.token:
+            try:
+                self._emit(json.loads(''.join(self.token)))
+            except json.JSONDecodeError:
+                self.expect = 'done'
+
+    def _emit(self, value):
+        self.expect = 'done'
+        self.token = []
+        self.fields[self.key] = value
+        if self.on_field:
+            self.on_field(self.key, value)
+
+    def text(self):
+        return ''.join(self.chunks)
+
+    def result(self):
+        return parse_llm_json(self.text())
@@ -0,0 +1,301 @@
+"""
+In-Memory AWS Stand-ins
+Minimal S3, CloudWatch Logs, Step Functions and Bedrock Runtime clients that
+implement just the calls the pipeline makes, so handlers can run on a laptop
+with the same event shapes and no AWS account.
+"""
+
+import io
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+
+class LocalClientError(Exception):
+    """Raised where boto3 would raise a ClientError."""
+
+    def __init__(self, code, message=''):
+        super().__init__(f"{code}: {message}")
+        self.response = {'Error': {'Code': code, 'Message': message}}
+
+
+def _error_class(name):
+    return type(name, (LocalClientError,), {'__init__': lambda self, message='': LocalClientError.__init__(self, name, message)})
+
+
+class LocalS3:
+    """Object store keyed by (bucket, key)."""
+
+    exceptions = SimpleNamespace(NoSuchKey=_error_class('NoSuchKey'), NoSuchBucket=_error_class('NoSuchBucket'))
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def put_object(self, Bucket, Key, Body=b'', IfMatch=None, IfNoneMatch=None, **kwargs):
+        if isinstance(Body, str):
+            Body = Body.encode('utf-8')
+        elif hasattr(Body, 'read'):
+            Body = Body.read()
+        etag = f'"{uuid.uuid4().hex}"'
+        with self.lock:
+            self.calls += 1
+            # Conditional writes, as S3 does for optimistic concurrency
+            current = self.objects.get((Bucket, Key))
+            if (IfNoneMatch == '*' and current is not None) or \
+                    (IfMatch is not None and (current is None or current['ETag'] != IfMatch)):
+                raise LocalClientError('PreconditionFailed', Key)
+            self.objects[(Bucket, Key)] = {
+                'Body': bytes(Body),
+                'ETag': etag,
+                'ContentType': kwargs.get('ContentType', 'binary/octet-stream'),
+                'ContentEncoding': kwargs.get('ContentEncoding'),
+                'Metadata': kwargs.get('Metadata', {}),
+                'LastModified': datetime.utcnow()
+            }
+        return {'ETag': etag}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        with self.lock:
+            self.calls += 1
+            obj = self.objects.get((Bucket, Key))
+        if obj is None:
+            raise self.exceptions.NoSuchKey(Key)
+        response = {k: v for k, v in obj.items() if k != 'Body' and v is not None}
+        response['Body'] = io.BytesIO(obj['Body'])
+        response['ContentLength'] = len(obj['Body'])
+        return response
+
+    def head_object(self, Bucket, Key, **kwargs):
+        response = self.get_object(Bucket, Key)
+        response.pop('Body')
+        return response
+
+    def list_objects_v2(self, Bucket, Prefix='', StartAfter='', **kwargs):
+        with self.lock:
+            self.calls += 1
+            keys = sorted(k for b, k in self.objects if b == Bucket and k.startswith(Prefix) and k > StartAfter)
+        return {
+            'KeyCount': len(keys),
+            'Contents': [{'Key': k, 'Size': len(self.objects[(Bucket, k)]['Body'])} for k in keys]
+        }
+
+    def get_paginator(self, operation):
+        client = self
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                yield getattr(client, operation)(**kwargs)
+
+        return Paginator()
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, Config=None, Callback=None):
+        data = Fileobj.read()
+        self.put_object(Bucket=Bucket, Key=Key, Body=data, **(ExtraArgs or {}))
+        if Callback:
+            Callback(len(data))
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Config=None, Callback=None):
+        with open(Filename, 'rb') as f:
+            self.upload_fileobj(f, Bucket, Key, ExtraArgs=ExtraArgs, Config=Config, Callback=Callback)
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = uuid.uuid4().hex
+        with self.lock:
+            self.calls += 1
+            self.uploads[upload_id] = {'Bucket': Bucket, 'Key': Key, 'parts': {}, 'kwargs': kwargs}
+        return {'Bucket': Bucket, 'Key': Key, 'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        etag = f'"{uuid.uuid4().hex}"'
+        with self.lock:
+            self.calls += 1
+            if UploadId not in self.uploads:
+                raise LocalClientError('NoSuchUpload', UploadId)
+            self.uploads[UploadId]['parts'][PartNumber] = (etag, bytes(Body))
+        return {'ETag': etag}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        with self.lock:
+            self.calls += 1
+            upload = self.uploads.pop(UploadId, None)
+        if upload is None:
+            raise LocalClientError('NoSuchUpload', UploadId)
+        parts = MultipartUpload['Parts']
+        for index, part in enumerate(parts):
+            etag, data = upload['parts'].get(part['PartNumber'], (None, b''))
+            if etag != part['ETag']:
+                raise LocalClientError('InvalidPart', str(part['PartNumber']))
+            if index < len(parts) - 1 and len(data) < 5 * 1024 * 1024:
+                raise LocalClientError('EntityTooSmall', str(part['PartNumber']))
+        body = b''.join(upload['parts'][part['PartNumber']][1] for part in parts)
+        return self.put_object(Bucket=Bucket, Key=Key, Body=body, **upload['kwargs'])
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        with self.lock:
+            self.calls += 1
+            self.uploads.pop(UploadId, None)
+        return {}
+
+
+class LocalLogs:
+    """CloudWatch Logs with a small Logs Insights subset: fields, filter, sort, limit."""
+
+    exceptions = SimpleNamespace(
+        ResourceAlreadyExistsException=_error_class('ResourceAlreadyExistsException'),
+        ResourceNotFoundException=_error_class('ResourceNotFoundException')
+    )
+
+    FILTER = re.compile(r'filter\s+(@?\w+)\s*(>=|<=|!=|=|>|<)\s*("?)([^"|]*)\3')
+
+    def __init__(self):
+        self.streams = {}
+        self.queries = {}
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def create_log_stream(self, logGroupName, logStreamName):
+        with self.lock:
+            self.calls += 1
+            if (logGroupName, logStreamName) in self.streams:
+                raise self.exceptions.ResourceAlreadyExistsException(logStreamName)
+            self.streams[(logGroupName, logStreamName)] = []
+        return {}
+
+    def put_log_events(self, logGroupName, logStreamName, logEvents, **kwargs):
+        with self.lock:
+            self.calls += 1
+            self.streams.setdefault((logGroupName, logStreamName), []).extend(logEvents)
+        return {'nextSequenceToken': uuid.uuid4().hex}
+
+    def start_query(self, logGroupName=None, startTime=0, endTime=0, queryString='', logGroupNames=None, limit=10000):
+        groups = [logGroupName] if logGroupName else list(logGroupNames or [])
+        with self.lock:
+            self.calls += 1
+            events = [
+                e for (group, _), stream in self.streams.items() if group in groups
+                for e in stream if startTime * 1000 <= e['timestamp'] <= endTime * 1000
+            ]
+
+        rows = []
+        for event in events:
+            record = json.loads(event['message'])
+            record['@timestamp'] = datetime.fromtimestamp(event['timestamp'] / 1000).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+            record['@message'] = event['message']
+            if all(self._matches(record, *clause) for clause in self.FILTER.findall(queryString)):
+                rows.append(record)
+
+        fields = []
+        for match in re.findall(r'fields\s+([^|]+)', queryString):
+            fields.extend(f.strip() for f in match.split(',') if f.strip())
+        if 'sort @timestamp desc' in queryString:
+            rows.sort(key=lambda r: r['@timestamp'], reverse=True)
+        limit_match = re.search(r'limit\s+(\d+)', queryString)
+        rows = rows[:int(limit_match.group(1)) if limit_match else limit]
+
+        query_id = uuid.uuid4().hex
+        self.queries[query_id] = [
+            [{'field': f, 'value': str(r[f])} for f in (fields or r.keys()) if f in r and r[f] is not None]
+            for r in rows
+        ]
+        return {'queryId': query_id}
+
+    @staticmethod
+    def _matches(record, field, op, _, raw_value):
+        if field not in record:
+            return False
+        value = record[field]
+        try:
+            expected = float(raw_value)
+            value = float(value)
+        except (TypeError, ValueError):
+            expected = raw_value.strip()
+        return {
+            '>=': lambda: value >= expected, '<=': lambda: value <= expected,
+            '>': lambda: value > expected, '<': lambda: value < expected,
+            '=': lambda: value == expected, '!=': lambda: value != expected
+        }[op]()
+
+    def get_query_results(self, queryId):
+        with self.lock:
+            self.calls += 1
+        return {'status': 'Complete', 'results': self.queries.get(queryId, [])}
+
+
+class LocalStepFunctions:
+    """Records start_execution calls instead of running a state machine."""
+
+    def __init__(self):
+        self.executions = []
+        self.calls = 0
+
+    def start_execution(self, stateMachineArn, name, input):
+        self.calls += 1
+        arn = f"{stateMachineArn.replace(':stateMachine:', ':execution:')}:{name}"
+        self.executions.append({'executionArn': arn, 'name': name, 'input': json.loads(input)})
+        return {'executionArn': arn, 'startDate': datetime.utcnow()}
+
+
+class LocalEventStream:
+    """Iterable response stream with close(), like botocore's EventStream."""
+
+    def __init__(self, events):
+        self.events = iter(events)
+        self.closed = False
+
+    def __iter__(self):
+        for event in self.events:
+            if self.closed:
+                return
+            yield event
+
+    def close(self):
+        self.closed = True
+
+
+class LocalBedrockRuntime:
+    """
+    Returns recorded Claude responses. `responder(prompt, model_id)` returns the
+    response text, or a fixed `response_text` is used; with neither, calls fail
+    like an unreachable endpoint so the Commander falls back to rule-based synthesis.
+    """
+
+    def __init__(self, response_text=None, responder=None, latency_seconds=0.0):
+        self.response_text = response_text
+        self.responder = responder
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+        self.prompts = []
+
+    def _respond(self, modelId, body):
+        self.calls += 1
+        prompt = json.loads(body)['messages'][0]['content']
+        self.prompts.append(prompt)
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if self.responder:
+            return self.responder(prompt, modelId)
+        if self.response_text is None:
+            raise LocalClientError('EndpointConnectionError', 'No recorded Bedrock response')
+        return self.response_text
+
+    def invoke_model(self, modelId, body, **kwargs):
+        text = self._respond(modelId, body)
+        return {'body': io.BytesIO(json.dumps({'content': [{'type': 'text', 'text': text}]}).encode('utf-8'))}
+
+    def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+        text = self._respond(modelId, body)
+        events = [
+            {'chunk': {'bytes': json.dumps({
+                'type': 'content_block_delta',
+                'delta': {'type': 'text_delta', 'text': text[i:i + 64]}
+            }).encode('utf-8')}}
+            for i in range(0, len(text), 64)
+        ]
+        return {'body': LocalEventStream(events)}
@@ -0,0 +1,308 @@
+"""
+Local Pipeline Runner
+Runs the Step Functions flow in-process for development and load tests:
+process_logs -> Parallel(LogsAgent, MetricsAgent, DeployAgent) -> Commander
+-> report, with the same event shapes the state machine passes, AWS clients
+swapped for in-memory stand-ins, and per-stage timings. run_live_tail does the
+same for the streaming entry point, from recorded subscription payloads.
+With early_exit, the Commander runs next to the agents and reads their
+findings from the evidence board; agent_delays simulates slow agents.
+"""
+
+import asyncio
+import importlib
+import json
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import aws_clients
+import instrumentation
+from evidence_board import board_ref
+from local_aws import LocalBedrockRuntime, LocalLogs, LocalS3, LocalStepFunctions
+
+AGENT_MODULES = ('agent_logs', 'agent_metrics', 'agent_deploy')
+
+class LocalContext:
+    """Lambda context with a request ID and a real remaining-time clock."""
+
+    def __init__(self, function_name, timeout_seconds=900):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self.deadline = time.time() + timeout_seconds
+
+    def get_remaining_time_in_millis(self):
+        return max(int((self.deadline - time.time()) * 1000), 0)
+
+
+class LocalAWS:
+    """Bundle of stand-in clients, installed as the client factory's overrides."""
+
+    def __init__(self, bedrock_response=None, bedrock_responder=None, bedrock_latency_seconds=0.0):
+        self.clients = {
+            's3': LocalS3(),
+            'logs': LocalLogs(),
+            'stepfunctions': LocalStepFunctions(),
+            'bedrock-runtime': LocalBedrockRuntime(
+                response_text=bedrock_response,
+                responder=bedrock_responder,
+                latency_seconds=bedrock_latency_seconds
+            ),
+        }
+
+    def install(self):
+        for service, client in self.clients.items():
+            aws_clients.set_override(service, client)
+        # Drop the Commander's past-incident index read from a previous stand-in
+        if 'agent_commander' in sys.modules:
+            sys.modules['agent_commander'].similarity_state['index'] = None
+        return self
+
+    def call_counts(self):
+        return {service: client.calls for service, client in self.clients.items()}
+
+
+def _timed(handler, event, context):
+    started = time.perf_counter()
+    result = handler(event, context)
+    return result, (time.perf_counter() - started) * 1000
+
+
+async def _run_agents_asyncio(agent_event, timeout_seconds):
+    tasks = [
+        asyncio.to_thread(
+            _timed,
+            importlib.import_module(name).lambda_handler,
+            agent_event,
+            LocalContext(name, timeout_seconds)
+        )
+        for name in AGENT_MODULES
+    ]
+    return await asyncio.gather(*tasks)
+
+
+def run_agents(agent_event, concurrency='threads', timeout_seconds=900):
+    """The Parallel state: every branch gets the same input; returns [(output, ms), ...]."""
+    if concurrency == 'asyncio':
+        return asyncio.run(_run_agents_asyncio(agent_event, timeout_seconds))
+
+    with ThreadPoolExecutor(max_workers=len(AGENT_MODULES)) as executor:
+        futures = [
+            executor.submit(
+                _timed,
+                importlib.import_module(name).lambda_handler,
+                agent_event,
+                LocalContext(name, timeout_seconds)
+            )
+            for name in AGENT_MODULES
+        ]
+        return [future.result() for future in futures]
+
+
+def _delayed(handler, delay_seconds):
+    def run(event, context):
+        time.sleep(delay_seconds)
+        return handler(event, context)
+    return run
+
+
+def run_investigation(investigation_input, concurrency='threads', timeout_seconds=900, early_exit=False, agent_delays=None):
+    """Run agents -> Commander -> report for one Step Functions input."""
+    if early_exit or 'evidence_board' in investigation_input:
+        return _run_early_exit_investigation(investigation_input, timeout_seconds, agent_delays or {})
+
+    import agent_commander
+    import lambda_generate_report
+
+    timings = {}
+    started = time.perf_counter()
+
+    agent_results = run_agents(investigation_input, concurrency, timeout_seconds)
+    timings['agents_parallel_ms'] = (time.perf_counter() - started) * 1000
+    for name, (_, elapsed_ms) in zip(AGENT_MODULES, agent_results):
+        timings[f"{name}_ms"] = elapsed_ms
+    agent_outputs = [output for output, _ in agent_results]
+
+    commander_output, timings['agent_commander_ms'] = _timed(
+        agent_commander.lambda_handler, agent_outputs, LocalContext('agent_commander', timeout_seconds)
+    )
+    report_output, timings['lambda_generate_report_ms'] = _timed(
+        lambda_generate_report.lambda_handler, commander_output, LocalContext('lambda_generate_report', timeout_seconds)
+    )
+    timings['investigation_total_ms'] = (time.perf_counter() - started) * 1000
+
+    return {
+        'agent_outputs': agent_outputs,
+        'commander': commander_output,
+        'report': report_output,
+        'timings': timings
+    }
+
+
+def _run_early_exit_investigation(investigation_input, timeout_seconds, agent_delays):
+    """The Parallel state with the Commander as a fourth branch polling the evidence board."""
+    import agent_commander
+    import lambda_generate_report
+
+    investigation_input = dict(investigation_input)
+    investigation_input.setdefault('evidence_board', board_ref(f"local-{uuid.uuid4().hex[:12]}"))
+
+    timings = {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(AGENT_MODULES) + 1) as executor:
+        agent_futures = [
+            executor.submit(
+                _timed,
+                _delayed(importlib.import_module(name).lambda_handler, agent_delays.get(name, 0)),
+                investigation_input,
+                LocalContext(name, timeout_seconds)
+            )
+            for name in AGENT_MODULES
+        ]
+        commander_future = executor.submit(
+            _timed, agent_commander.lambda_handler, investigation_input, LocalContext('agent_commander', timeout_seconds)
+        )
+        agent_results = [future.result() for future in agent_futures]
+        commander_output, timings['agent_commander_ms'] = commander_future.result()
+    timings['agents_parallel_ms'] = max(elapsed_ms for _, elapsed_ms in agent_results)
+    for name, (_, elapsed_ms) in zip(AGENT_MODULES, agent_results):
+        timings[f"{name}_ms"] = elapsed_ms
+    board = commander_output.get('evidence_board') or {}
+    if board:
+        timings['time_to_first_rca_ms'] = board['time_to_first_rca_ms']
+        timings['time_to_final_rca_ms'] = board['time_to_final_rca_ms']
+
+    report_output, timings['lambda_generate_report_ms'] = _timed(
+        lambda_generate_report.lambda_handler, commander_output, LocalContext('lambda_generate_report', timeout_seconds)
+    )
+    timings['investigation_total_ms'] = (time.perf_counter() - started) * 1000
+
+    return {
+        'agent_outputs': [output for output, _ in agent_results],
+        'commander': commander_output,
+        'report': report_output,
+        'timings': timings
+    }
+
+
+def run_pipeline(log_data, aws=None, bucket='local-incident-bucket', key='errors_json_native.log',
+                 concurrency='threads', timeout_seconds=900, early_exit=False, agent_delays=None,
+                 investigation_overrides=None):
+    """
+    Full pipeline from a raw log file: S3 upload event -> process_logs and, if it
+    triggers an investigation, the Step Functions flow with the recorded input
+    (updated with investigation_overrides, e.g. a recorded deployment history).
+    """
+    import lambda_process_logs
+
+    aws = aws or LocalAWS()
+    aws.install()
+    if isinstance(log_data, str):
+        log_data = log_data.encode('utf-8')
+    aws.clients['s3'].put_object(Bucket=bucket, Key=key, Body=log_data)
+
+    s3_event = {'Records': [{'s3': {'bucket': {'name': bucket}, 'object': {'key': key}}}]}
+    # Collect span records instead of printing them, so per-stage detail is in the result
+    spans = []
+    instrumentation.set_sink(spans.append)
+    try:
+        started = time.perf_counter()
+        ingestion, ingest_ms = _timed(lambda_process_logs.lambda_handler, s3_event, LocalContext('lambda_process_logs', timeout_seconds))
+
+        result = {'ingestion': ingestion, 'timings': {'lambda_process_logs_ms': ingest_ms}}
+        executions = aws.clients['stepfunctions'].executions
+        if executions:
+            investigation_input = {**executions[-1]['input'], **(investigation_overrides or {})}
+            investigation = run_investigation(investigation_input, concurrency, timeout_seconds, early_exit, agent_delays)
+            result.update({k: v for k, v in investigation.items() if k != 'timings'})
+            result['timings'].update(investigation['timings'])
+
+        result['timings']['end_to_end_ms'] = (time.perf_counter() - started) * 1000
+    finally:
+        instrumentation.set_sink(print)
+
+    result['aws_calls'] = aws.call_counts()
+    result['spans'] = [json.loads(line) for line in spans]
+    return result
+
+
+def subscription_events(log_data, log_group='/aws/incident-commander/live', log_stream='app', batch_events=500):
+    """
+    Split a JSON-lines log file into CloudWatch Logs subscription deliveries
+    (Lambda events), batch_events log events each, in file order.
+    """
+    from lambda_live_tail import subscription_event
+
+    if isinstance(log_data, bytes):
+        log_data = log_data.decode('utf-8')
+    log_events = []
+    for index, line in enumerate(log_data.splitlines()):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        timestamp = int(datetime.fromisoformat(record['timestamp'].replace('Z', '')).timestamp() * 1000)
+        log_events.append({'id': str(index), 'timestamp': timestamp, 'message': line})
+    return [
+        subscription_event(log_group, log_stream, log_events[i:i+batch_events])
+        for i in range(0, len(log_events), batch_events)
+    ]
+
+
+def run_live_tail(events, aws=None, stop_at_trigger=True, concurrency='threads', timeout_seconds=900):
+    """
+    Feed recorded subscription / Kinesis events to the live-tail handler, one at a
+    time, then run the investigation it starts. Subscription log events are also
+    written to the local log group first, as CloudWatch would already hold them.
+    """
+    import lambda_live_tail
+
+    aws = aws or LocalAWS()
+    aws.install()
+    lambda_live_tail.windows.clear()
+    logs = aws.clients['logs']
+
+    spans = []
+    instrumentation.set_sink(spans.append)
+    try:
+        started = time.perf_counter()
+        result = {'timings': {}, 'batches': 0, 'events_ingested': 0}
+        ingest_ms = 0.0
+        executions = aws.clients['stepfunctions'].executions
+        for event in events:
+            for _, log_group, rows in lambda_live_tail.iter_batches(event):
+                if log_group is not None:
+                    logs.put_log_events(
+                        logGroupName=log_group,
+                        logStreamName='live-tail-source',
+                        logEvents=[{'timestamp': ts, 'message': json.dumps(record)} for record, ts in rows]
+                    )
+                result['events_ingested'] += len(rows)
+            _, elapsed_ms = _timed(lambda_live_tail.lambda_handler, event, LocalContext('lambda_live_tail', timeout_seconds))
+            ingest_ms += elapsed_ms
+            result['batches'] += 1
+            if executions and 'trigger' not in result:
+                result['trigger'] = {
+                    'batch': result['batches'],
+                    'events_ingested': result['events_ingested'],
+                    'elapsed_ms': (time.perf_counter() - started) * 1000,
+                    'execution_arn': executions[0]['executionArn']
+                }
+                if stop_at_trigger:
+                    break
+        result['timings']['lambda_live_tail_ms'] = ingest_ms
+
+        if executions:
+            investigation = run_investigation(executions[0]['input'], concurrency, timeout_seconds)
+            result.update({k: v for k, v in investigation.items() if k != 'timings'})
+            result['timings'].update(investigation['timings'])
+
+        result['timings']['end_to_end_ms'] = (time.perf_counter() - started) * 1000
+    finally:
+        instrumentation.set_sink(print)
+
+    result['aws_calls'] = aws.call_counts()
+    result['spans'] = [json.loads(line) for line in spans]
+    return result
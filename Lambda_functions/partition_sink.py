@@ -0,0 +1,225 @@
+"""
+Partitioned S3 Sink
+Writes log events into Hive-style partitions,
+
+  {prefix}category={fast|medium|slow|critical}/service={service}/date=YYYY-MM-DD/hour=HH/part-{run_id}-{n:05d}.jsonl.gz
+
+as gzip JSON-lines part files of bounded size, so later analyses (Athena,
+S3 Select, the agents) read only the partitions they need instead of whole
+log files.
+
+Each partition compresses its events as they arrive. Once a partition's
+compressed buffer reaches the S3 minimum part size it goes out as a multipart
+part on a background thread, and a part file is completed once it holds
+PART_MAX_BYTES of raw events. Buffered memory is bounded: pending compressed
+bytes plus the deflate state every open file holds (COMPRESSOR_STATE_BYTES)
+stay under BUFFER_MAX_BYTES by closing the least recently written partitions
+early, so thousands of category x service x hour partitions cannot pile up
+open compressors.
+"""
+
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Environment variables
+CRITICAL_LATENCY_MS = int(os.environ.get('CRITICAL_LATENCY_MS', '2000'))
+CATEGORIZED_BUCKET = os.environ.get('CATEGORIZED_BUCKET', os.environ.get('CATEGORIZED_LOGS_BUCKET', ''))
+CATEGORIZED_PREFIX = os.environ.get('CATEGORIZED_PREFIX', 'categorized/')
+PART_MAX_BYTES = int(os.environ.get('PARTITION_PART_MAX_BYTES', str(128 * 1024 * 1024)))
+BUFFER_MAX_BYTES = int(os.environ.get('PARTITION_BUFFER_MAX_BYTES', str(64 * 1024 * 1024)))
+UPLOAD_WORKERS = int(os.environ.get('PARTITION_UPLOAD_WORKERS', '4'))
+
+MIN_PART_BYTES = 5 * 1024 * 1024  # S3 minimum for every multipart part but the last
+COMPRESS_LEVEL = 6
+# zlib deflate state per compressor: (1 << (wbits + 2)) + (1 << (memLevel + 9)) at wbits=15, memLevel=8
+COMPRESSOR_STATE_BYTES = 256 * 1024
+
+# Upper latency bound (exclusive) per category; anything above is critical
+LATENCY_CATEGORIES = (('fast', 100), ('medium', 500), ('slow', CRITICAL_LATENCY_MS))
+
+UNSAFE_KEY_CHARS = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+def latency_category(latency_ms):
+    for category, upper in LATENCY_CATEGORIES:
+        if latency_ms < upper:
+            return category
+    return 'critical'
+
+
+def partition_for(record):
+    """Partition path (without prefix) for one event."""
+    timestamp = record.get('timestamp') or ''
+    service = UNSAFE_KEY_CHARS.sub('_', str(record.get('service') or 'unknown'))
+    return (
+        f"category={latency_category(record.get('latency_ms', 0) or 0)}/service={service}/"
+        f"date={timestamp[:10] or 'unknown'}/hour={timestamp[11:13] or '00'}"
+    )
+
+
+class _PartFile:
+    """One open part file: its compressor, pending compressed bytes and multipart state."""
+
+    def __init__(self, key):
+        self.key = key
+        self.compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+        self.buffer = bytearray()
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.events = 0
+        self.upload_id = None
+        self.parts = []  # futures of {'ETag', 'PartNumber'}
+
+
+class PartitionedSink:
+    """Buffers events per partition and writes compressed, size-bounded part files to S3."""
+
+    def __init__(self, s3_client, bucket, run_id, prefix=CATEGORIZED_PREFIX,
+                 part_max_bytes=PART_MAX_BYTES, buffer_max_bytes=BUFFER_MAX_BYTES, upload_workers=UPLOAD_WORKERS):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.run_id = run_id
+        self.prefix = prefix
+        self.part_max_bytes = part_max_bytes
+        self.buffer_max_bytes = buffer_max_bytes
+        self.open_files = OrderedDict()  # least recently written first
+        self.sequence = {}
+        self.buffered_bytes = 0
+        self.partition_events = {}
+        self.written = []
+        self.executor = ThreadPoolExecutor(max_workers=max(1, upload_workers))
+        # Caps parts in flight, so uploads cannot queue unbounded memory
+        self.in_flight = threading.BoundedSemaphore(max(1, upload_workers) * 2)
+
+    def add(self, record, line):
+        """Add one event; line is its raw JSON (bytes), written as-is."""
+        partition = partition_for(record)
+        part = self.open_files.get(partition)
+        if part is None:
+            part = self.open_files[partition] = self._new_file(partition)
+        else:
+            self.open_files.move_to_end(partition)
+
+        data = line + b'\n'
+        compressed = part.compressor.compress(data)
+        part.buffer += compressed
+        part.raw_bytes += len(data)
+        part.events += 1
+        self.buffered_bytes += len(compressed)
+        self.partition_events[partition] = self.partition_events.get(partition, 0) + 1
+
+        if part.raw_bytes >= self.part_max_bytes:
+            self._close(partition)
+        elif len(part.buffer) >= MIN_PART_BYTES:
+            self._upload_part(part)
+
+        while self.open_files and self.memory_bytes() > self.buffer_max_bytes:
+            self._close(next(iter(self.open_files)))
+
+    def memory_bytes(self):
+        """Pending compressed bytes plus the compressor state of every open file."""
+        return self.buffered_bytes + len(self.open_files) * COMPRESSOR_STATE_BYTES
+
+    def _new_file(self, partition):
+        sequence = self.sequence.get(partition, 0)
+        self.sequence[partition] = sequence + 1
+        return _PartFile(f"{self.prefix}{partition}/part-{self.run_id}-{sequence:05d}.jsonl.gz")
+
+    def _take_buffer(self, part):
+        data = bytes(part.buffer)
+        self.buffered_bytes -= len(part.buffer)
+        part.buffer.clear()
+        part.compressed_bytes += len(data)
+        return data
+
+    def _upload_part(self, part):
+        if part.upload_id is None:
+            # Plain .gz objects (no Content-Encoding) so query engines decompress by extension
+            part.upload_id = self.s3.create_multipart_upload(
+                Bucket=self.bucket, Key=part.key, ContentType='application/x-ndjson'
+            )['UploadId']
+        data = self._take_buffer(part)
+        number = len(part.parts) + 1
+        self.in_flight.acquire()
+        part.parts.append(self.executor.submit(self._send_part, part.key, part.upload_id, number, data))
+
+    def _send_part(self, key, upload_id, number, data):
+        try:
+            response = self.s3.upload_part(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=data
+            )
+            return {'ETag': response['ETag'], 'PartNumber': number}
+        finally:
+            self.in_flight.release()
+
+    def _close(self, partition):
+        part = self.open_files.pop(partition)
+        tail = part.compressor.flush()
+        part.buffer += tail
+        self.buffered_bytes += len(tail)
+
+        if part.upload_id is None:
+            data = self._take_buffer(part)
+            self.s3.put_object(Bucket=self.bucket, Key=part.key, Body=data, ContentType='application/x-ndjson')
+        else:
+            try:
+                self._upload_part(part)
+                self.s3.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=part.key,
+                    UploadId=part.upload_id,
+                    MultipartUpload={'Parts': [future.result() for future in part.parts]}
+                )
+            except Exception:
+                self.open_files[partition] = part  # so abort() cleans it up
+                raise
+        self.written.append({
+            'key': part.key,
+            'events': part.events,
+            'raw_bytes': part.raw_bytes,
+            'compressed_bytes': part.compressed_bytes,
+            'multipart_parts': len(part.parts)
+        })
+
+    def close(self):
+        """Flush every open part file; returns a summary of what was written."""
+        try:
+            for partition in list(self.open_files):
+                self._close(partition)
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self.executor.shutdown(wait=True)
+        return {
+            'bucket': self.bucket,
+            'prefix': self.prefix,
+            'partitions': len(self.partition_events),
+            'files': len(self.written),
+            'events': sum(f['events'] for f in self.written),
+            'raw_bytes': sum(f['raw_bytes'] for f in self.written),
+            'compressed_bytes': sum(f['compressed_bytes'] for f in self.written),
+            'events_by_category': self.category_counts()
+        }
+
+    def abort(self):
+        """Abort open multipart uploads so no orphaned parts are billed, and stop the upload workers."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for part in self.open_files.values():
+            if part.upload_id:
+                try:
+                    self.s3.abort_multipart_upload(Bucket=self.bucket, Key=part.key, UploadId=part.upload_id)
+                except Exception as e:
+                    print(f"⚠️  Failed to abort upload for {part.key}: {str(e)}")
+        self.open_files.clear()
+
+    def category_counts(self):
+        counts = {}
+        for partition, events in self.partition_events.items():
+            category = partition.split('/', 1)[0].split('=', 1)[1]
+            counts[category] = counts.get(category, 0) + events
+        return counts
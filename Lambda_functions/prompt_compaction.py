@@ -0,0 +1,153 @@
+"""
+Prompt Compaction for the Commander Bedrock call
+Turns the raw findings of the three agents into minified, deduplicated and
+truncated evidence that fits a token budget, most relevant items first.
+"""
+
+import json
+import os
+
+# Environment variables
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', '1200'))
+MAX_STRING_CHARS = int(os.environ.get('PROMPT_MAX_STRING_CHARS', '240'))
+MAX_LIST_ITEMS = int(os.environ.get('PROMPT_MAX_LIST_ITEMS', '8'))
+
+# Rough chars-per-token ratio for Claude on JSON-heavy English text
+CHARS_PER_TOKEN = 4
+
+# Relevance of each findings key to the root cause decision (1.0 = always keep).
+# Keys not listed fall back to DEFAULT_RELEVANCE.
+RELEVANCE = {
+    'top_error': 1.0,
+    'deployment_correlation': 0.95,
+    'correlation': 0.95,
+    'suspicious_changes': 0.9,
+    'degradation': 0.9,
+    'retry_storms': 0.85,
+    'total_critical_errors': 0.85,
+    'target_deployment': 0.8,
+    'trace_analysis': 0.8,
+    'anomalies': 0.75,
+    'affected_services': 0.7,
+    'timeout_clusters': 0.7,
+    'incident': 0.65,
+    'baseline': 0.6,
+    'seasonal_baseline': 0.55,
+    'error_distribution': 0.5,
+    'retry_distribution': 0.3,
+    'recent_deployments': 0.2,
+}
+DEFAULT_RELEVANCE = 0.4
+
+# Keys that only repeat information already present elsewhere in the findings
+REDUNDANT_KEYS = {'agent', 'period'}
+
+
+def estimate_tokens(text):
+    """Estimate the number of Claude input tokens for a piece of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def minify(value):
+    """Serialize a value as compact JSON."""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def _shrink(value, seen, max_string, max_items):
+    """Drop empty/duplicate entries and truncate long strings and lists."""
+    if isinstance(value, dict):
+        shrunk = {}
+        for key, item in value.items():
+            if key in REDUNDANT_KEYS:
+                continue
+            item = _shrink(item, seen, max_string, max_items)
+            if item in (None, '', [], {}):
+                continue
+            shrunk[key] = item
+        return shrunk
+
+    if isinstance(value, list):
+        shrunk = []
+        for item in value:
+            # Skip list entries already emitted verbatim elsewhere (e.g. the
+            # target deployment repeated inside recent_deployments)
+            if isinstance(item, dict) and minify(item) in seen:
+                continue
+            shrunk.append(_shrink(item, seen, max_string, max_items))
+        if len(shrunk) > max_items:
+            shrunk = shrunk[:max_items] + [f"...(+{len(shrunk) - max_items} more)"]
+        return shrunk
+
+    if isinstance(value, str) and len(value) > max_string:
+        return value[:max_string] + '...'
+
+    if isinstance(value, float):
+        return round(value, 3)
+
+    return value
+
+
+def _remember(value, seen):
+    """Record every dict emitted so later items can drop verbatim repeats."""
+    if isinstance(value, dict):
+        seen.add(minify(value))
+        for item in value.values():
+            _remember(item, seen)
+    elif isinstance(value, list):
+        for item in value:
+            _remember(item, seen)
+
+
+def compact_evidence(agent_findings, token_budget=None):
+    """
+    Compact agent findings into prompt-ready evidence.
+
+    agent_findings: dict of section name -> agent output, e.g.
+        {'logs': logs_findings, 'metrics': metrics_findings, 'deploy': deploy_findings}
+
+    Returns a dict with one minified evidence string per section plus 'stats'.
+    """
+    token_budget = PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+
+    # Collect (relevance, section, key, value) candidates across all agents.
+    # The original raw findings are kept for the stats comparison.
+    candidates = []
+    raw_tokens = 0
+    for section, output in agent_findings.items():
+        findings = (output or {}).get('findings', {}) or {}
+        raw_tokens += estimate_tokens(json.dumps(findings, indent=2, default=str))
+        for position, (key, value) in enumerate(findings.items()):
+            relevance = RELEVANCE.get(key, DEFAULT_RELEVANCE)
+            candidates.append((relevance, -position, section, key, value))
+
+    # Most relevant first; ties keep the agent's own ordering
+    candidates.sort(key=lambda c: (c[0], c[1]), reverse=True)
+
+    seen = set()
+    selected = {section: {} for section in agent_findings}
+    omitted = []
+    used_tokens = 0
+
+    for relevance, _, section, key, value in candidates:
+        # Try progressively harder truncation before giving up on an item
+        for max_string, max_items in ((MAX_STRING_CHARS, MAX_LIST_ITEMS), (80, 3)):
+            shrunk = _shrink(value, seen, max_string, max_items)
+            if shrunk in (None, '', [], {}):
+                break
+            cost = estimate_tokens(minify({key: shrunk}))
+            if used_tokens + cost <= token_budget:
+                selected[section][key] = shrunk
+                used_tokens += cost
+                _remember(value, seen)
+                break
+        else:
+            omitted.append(f"{section}.{key}")
+
+    evidence = {section: minify(items) for section, items in selected.items()}
+    evidence['stats'] = {
+        'token_budget': token_budget,
+        'evidence_tokens': used_tokens,
+        'raw_evidence_tokens': raw_tokens,
+        'omitted': omitted
+    }
+    return evidence
@@ -0,0 +1,196 @@
+"""
+Logs Insights Query Cache
+Caches Logs Insights results by log group, normalized query string and time
+window, so retried and overlapping investigations do not pay for the same
+scan twice. Entries live in the warm container's memory and in a persistent
+tier (S3 with QUERY_CACHE_BUCKET, otherwise a local directory), with a TTL
+and size-bounded eviction.
+
+A lookup first tries the exact window. If that misses, it falls back to a
+cached wider window for the same log group and query, and filters that
+window's rows down to the requested one. This only works when the cached
+result holds raw rows: every row carries @timestamp, the query does not
+aggregate or truncate (stats, limit, dedup), and it did not hit the result
+row limit.
+
+Windows that end less than QUERY_CACHE_SETTLE_SECONDS ago may still be
+receiving log events, so they are cached for at most
+QUERY_CACHE_UNSETTLED_TTL_SECONDS. Only Complete queries are cached: rows of
+a query that failed, was cancelled or was still running after
+POLL_MAX_ATTEMPTS polls are returned once, as 'incomplete', and never stored.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+from aws_clients import lazy_client
+from instrumentation import current_span
+from response_cache import FileTier, MemoryTier, S3Tier, TwoTierCache
+
+logs_client = lazy_client('logs')
+
+# Environment variables
+QUERY_CACHE_ENABLED = os.environ.get('QUERY_CACHE_ENABLED', 'true').lower() == 'true'
+QUERY_CACHE_TTL_SECONDS = int(os.environ.get('QUERY_CACHE_TTL_SECONDS', '900'))
+QUERY_CACHE_SETTLE_SECONDS = int(os.environ.get('QUERY_CACHE_SETTLE_SECONDS', '300'))
+QUERY_CACHE_UNSETTLED_TTL_SECONDS = int(os.environ.get('QUERY_CACHE_UNSETTLED_TTL_SECONDS', '60'))
+QUERY_CACHE_MAX_ENTRIES = int(os.environ.get('QUERY_CACHE_MAX_ENTRIES', '64'))
+QUERY_CACHE_MAX_BYTES = int(os.environ.get('QUERY_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+QUERY_CACHE_BUCKET = os.environ.get('QUERY_CACHE_BUCKET', '')
+QUERY_CACHE_DIR = os.environ.get('QUERY_CACHE_DIR', '/tmp/query-cache')
+
+RESULT_ROW_LIMIT = 10000  # Logs Insights default (and maximum) result rows
+MAX_WINDOWS_PER_QUERY = 16
+POLL_MAX_ATTEMPTS = 30
+PENDING_STATUSES = ('Scheduled', 'Running')
+NON_RAW_COMMANDS = re.compile(r'\|\s*(stats|limit|dedup)\b', re.IGNORECASE)
+
+if QUERY_CACHE_BUCKET:
+    persistent_tier = S3Tier(lazy_client('s3'), QUERY_CACHE_BUCKET, prefix='query-cache/')
+else:
+    persistent_tier = FileTier(QUERY_CACHE_DIR)
+query_cache = TwoTierCache(
+    MemoryTier(max_entries=QUERY_CACHE_MAX_ENTRIES, max_bytes=QUERY_CACHE_MAX_BYTES),
+    persistent_tier,
+    ttl_seconds=QUERY_CACHE_TTL_SECONDS
+)
+
+
+def normalize_query(query_string):
+    """Collapse whitespace, and drop it around pipes and commas, so layout-only differences match."""
+    return re.sub(r'\s*([|,])\s*', r'\1', re.sub(r'\s+', ' ', query_string)).strip()
+
+
+def query_family(log_group, query_string):
+    """Hash of log group and normalized query, shared by every window of that query."""
+    material = json.dumps({'log_group': log_group, 'query': normalize_query(query_string)}, sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def window_key(family, start_time, end_time):
+    return hashlib.sha256(f"{family}:{int(start_time)}:{int(end_time)}".encode('utf-8')).hexdigest()
+
+
+def row_time(row):
+    """@timestamp of a result row in epoch ms (Logs Insights reports it in UTC), or None."""
+    for field in row:
+        if field['field'] == '@timestamp':
+            try:
+                parsed = datetime.strptime(field['value'], '%Y-%m-%d %H:%M:%S.%f')
+            except ValueError:
+                return None
+            return int(parsed.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    return None
+
+
+def holds_raw_rows(query_string, rows):
+    """Whether a result can be filtered down to a narrower window."""
+    return (
+        not NON_RAW_COMMANDS.search(query_string)
+        and len(rows) < RESULT_ROW_LIMIT
+        and all(row_time(row) is not None for row in rows)
+    )
+
+
+def run_query(log_group, query_string, start_time, end_time):
+    """Start a Logs Insights query and poll until it completes; returns (rows, status)."""
+    response = logs_client.start_query(
+        logGroupName=log_group,
+        startTime=int(start_time),
+        endTime=int(end_time),
+        queryString=query_string
+    )
+    query_id = response['queryId']
+    print(f"   Query ID: {query_id}")
+
+    # Wait for query to complete
+    for attempt in range(POLL_MAX_ATTEMPTS):
+        result = logs_client.get_query_results(queryId=query_id)
+        if result['status'] not in PENDING_STATUSES:
+            break
+        time.sleep(1)
+    current_span().set(poll_attempts=attempt + 1, query_status=result['status'])
+    if result['status'] != 'Complete':
+        print(f"⚠️  Query {query_id} ended {result['status']} after {attempt + 1} polls; "
+              f"{len(result.get('results', []))} rows may be partial")
+    return result.get('results', []), result['status']
+
+
+def _get_entry(family, start_time, end_time):
+    # A persistent-tier hit is re-cached in memory with the default TTL, so
+    # the entry carries its own expiry (shorter for unsettled windows)
+    entry = query_cache.get(window_key(family, start_time, end_time))
+    if entry is None or entry['expires_at'] < time.time():
+        return None
+    return entry
+
+
+def _lookup(family, start_time, end_time):
+    """(rows, source) from the cache, or (None, None)."""
+    entry = _get_entry(family, start_time, end_time)
+    if entry is not None:
+        print(f"   ⚡ Query cache: {len(entry['rows'])} rows for the same window")
+        return entry['rows'], 'exact'
+
+    # Narrowest cached window that covers the requested one and holds raw rows
+    windows = query_cache.get(f"{family}-windows") or []
+    covering = sorted(
+        (w for w in windows if w['raw'] and w['start'] <= start_time and w['end'] >= end_time),
+        key=lambda w: w['rows']
+    )
+    for window in covering:
+        entry = _get_entry(family, window['start'], window['end'])
+        if entry is None:
+            continue
+        low, high = int(start_time) * 1000, int(end_time) * 1000
+        rows = [row for row in entry['rows'] if low <= row_time(row) <= high]
+        print(f"   ⚡ Query cache: {len(rows)} of {len(entry['rows'])} rows from cached window "
+              f"{window['start']}-{window['end']}")
+        return rows, 'subwindow'
+    return None, None
+
+
+def _store(family, query_string, start_time, end_time, rows):
+    settled = time.time() - end_time >= QUERY_CACHE_SETTLE_SECONDS
+    ttl_seconds = QUERY_CACHE_TTL_SECONDS if settled else min(QUERY_CACHE_TTL_SECONDS, QUERY_CACHE_UNSETTLED_TTL_SECONDS)
+    expires_at = time.time() + ttl_seconds
+    query_cache.put(window_key(family, start_time, end_time), {'rows': rows, 'expires_at': expires_at},
+                    ttl_seconds=ttl_seconds)
+
+    windows = [
+        w for w in query_cache.get(f"{family}-windows") or []
+        if w['expires_at'] > time.time() and (w['start'], w['end']) != (start_time, end_time)
+    ]
+    windows.append({'start': start_time, 'end': end_time, 'rows': len(rows),
+                    'raw': holds_raw_rows(query_string, rows), 'expires_at': expires_at})
+    query_cache.put(f"{family}-windows", windows[-MAX_WINDOWS_PER_QUERY:],
+                    ttl_seconds=max(w['expires_at'] for w in windows) - time.time())
+
+
+def cached_query(log_group, query_string, start_time, end_time):
+    """
+    Logs Insights results for a window (epoch seconds), from the cache when
+    possible. Returns (rows, source) with source 'exact', 'subwindow', 'query'
+    or 'incomplete' (the query did not complete; its rows are not cached).
+    """
+    start_time, end_time = int(start_time), int(end_time)
+    if not QUERY_CACHE_ENABLED:
+        rows, status = run_query(log_group, query_string, start_time, end_time)
+        return rows, 'query' if status == 'Complete' else 'incomplete'
+
+    family = query_family(log_group, query_string)
+    rows, source = _lookup(family, start_time, end_time)
+    if rows is not None:
+        current_span().incr('cache_hits')
+        return rows, source
+
+    current_span().incr('cache_misses')
+    rows, status = run_query(log_group, query_string, start_time, end_time)
+    if status != 'Complete':
+        return rows, 'incomplete'
+    _store(family, query_string, start_time, end_time, rows)
+    return rows, 'query'
@@ -0,0 +1,532 @@
+"""
+RCA Report Renderer
+Single renderer for incident reports, shared by the report Lambda and the
+local CLI. Commander output (the current schema with evidence_summary,
+reasoning and agent_contributions, or the older evidence/llm_reasoning one)
+is first mapped to a format-neutral report model, then rendered to Markdown,
+emoji-free Markdown, HTML or JSON. Templates are compiled once at import and
+output is assembled in a list buffer, so large evidence tables stay linear.
+"""
+
+import html
+import json
+from datetime import datetime
+
+FORMATS = ('markdown', 'markdown-plain', 'html', 'json')
+CONTENT_TYPES = {
+    'markdown': 'text/markdown',
+    'markdown-plain': 'text/markdown',
+    'html': 'text/html',
+    'json': 'application/json',
+}
+EXTENSIONS = {'markdown': 'md', 'markdown-plain': 'md', 'html': 'html', 'json': 'json'}
+
+DEFAULT_MODEL_LABEL = 'Claude 3.5 Sonnet (Amazon Bedrock)'
+SYNTHESIS_LABELS = {
+    'rule-based': 'Rule-based synthesis (LLM unavailable)',
+    'similar-incident': 'Matched a prior incident (no LLM call)',
+}
+
+SECTION_TITLES = {
+    'logs': 'LogsAgent Findings (WHAT Happened)',
+    'metrics': 'MetricsAgent Findings (HOW BAD)',
+    'deploy': 'DeployAgent Findings (FIX Options)',
+}
+
+NEXT_ACTIONS = (
+    ('Short-term', ('Implement remediation steps', 'Add monitoring for this error pattern', 'Update runbooks')),
+    ('Long-term', ('Post-incident review', 'Update deployment processes', 'Add automated safeguards')),
+)
+
+# Status markers per output style
+EMOJI = {'HIGH': '🟢', 'MEDIUM': '🟡', 'LOW': '🔴', 'YES': '✅', 'NO': '❌'}
+SECTION_ICONS = {'summary': '🎯 ', 'evidence': '📊 ', 'reasoning': '🧠 ', 'remediation': '🔧 ', 'next': '📝 '}
+# Metrics severity uses CRITICAL/HIGH/MEDIUM/LOW, where HIGH is bad, unlike confidence
+SEVERITY_EMOJI = {'CRITICAL': '🔴', 'HIGH': '🟠', 'MEDIUM': '🟡', 'LOW': '🟢'}
+
+
+class Code(str):
+    """Inline code span inside a fact value (deployment IDs, error types)."""
+
+
+def confidence_level(confidence):
+    return 'HIGH' if confidence >= 0.85 else 'MEDIUM' if confidence >= 0.7 else 'LOW'
+
+
+# ---------------------------------------------------------------------------
+# Commander output -> report model
+# ---------------------------------------------------------------------------
+
+def _fact(label, *value, marker=None, severity=None):
+    return {'label': label, 'value': value, 'marker': marker, 'severity': severity}
+
+
+def _table(title, columns, rows):
+    return {'title': title, 'columns': columns, 'rows': rows}
+
+
+def _logs_section(logs_output, legacy):
+    facts, tables = [], []
+    if legacy:
+        facts.append(_fact('Primary Issue', legacy.get('what_happened', 'No data')))
+        correlation = legacy.get('correlation', {})
+        if correlation.get('correlation_found'):
+            facts.append(_fact('Deployment Correlation',
+                               f"{correlation.get('percentage', 0):.1f}% of errors linked to deployment ",
+                               Code(correlation.get('deployment_id'))))
+            facts.append(_fact('Insight', correlation.get('insight', 'N/A')))
+        patterns = legacy.get('error_patterns', [])
+        if patterns:
+            tables.append(_table('Top Error Patterns', ('Error type', 'Count', 'Service'), [
+                (Code(p.get('error_type', 'Unknown')), p.get('error_count', 0), p.get('service', 'unknown'))
+                for p in patterns
+            ]))
+        return facts, tables
+
+    findings = logs_output.get('findings', {})
+    if not findings:
+        return facts, tables
+    total = findings.get('total_critical_errors', 0)
+    top_error = findings.get('top_error', {})
+    facts.append(_fact('Primary Issue', f"{top_error.get('count', 0)} ", Code(top_error.get('type', 'Unknown')),
+                       f" errors ({top_error.get('percentage', 0):.1f}% of {total} critical errors)"))
+    correlation = findings.get('deployment_correlation', {})
+    if correlation.get('deployment_id') not in (None, 'None', 'Unknown'):
+        facts.append(_fact('Deployment Correlation',
+                           f"{correlation.get('percentage', 0):.1f}% of errors linked to deployment ",
+                           Code(correlation['deployment_id'])))
+    services = findings.get('affected_services', {})
+    if services:
+        facts.append(_fact('Affected Services', ', '.join(f"{s} ({n})" for s, n in services.items())))
+    traces = findings.get('trace_analysis', {})
+    if traces.get('multi_service_traces'):
+        facts.append(_fact('Failure Origin', Code(traces['origin_service']),
+                           f" ({traces['origin_share']:.0f}% of traces), reaching "
+                           f"{', '.join(traces['blast_radius']['services'])}"))
+    if traces.get('traces'):
+        facts.append(_fact('Retry Amplification', f"{traces['retry_amplification']['overall']:.2f}x calls per failed request"))
+    if logs_output.get('recommendation'):
+        facts.append(_fact('Recommendation', logs_output['recommendation']))
+
+    distribution = findings.get('error_distribution', {})
+    if distribution:
+        tables.append(_table('Error Distribution', ('Error type', 'Count', 'Share'), [
+            (Code(error_type), count, f"{count / total * 100:.1f}%" if total else '-')
+            for error_type, count in sorted(distribution.items(), key=lambda item: -item[1])
+        ]))
+    return facts, tables
+
+
+def _metrics_section(metrics_output, legacy):
+    facts, tables = [], []
+    if legacy:
+        severity = legacy.get('how_bad', 'UNKNOWN')
+        facts.append(_fact('Severity', f"(Score: {legacy.get('severity_score', 0)}/100)", severity=severity))
+        facts.append(_fact('Recommended Action', legacy.get('recommended_action', 'Monitor')))
+        error_rate = legacy.get('error_rate', {})
+        if error_rate:
+            facts.append(_fact('Error Rate Spike', f"{error_rate.get('spike_ratio', 1.0):.1f}x above baseline"))
+        anomaly = legacy.get('anomaly', {})
+        if anomaly.get('anomaly_detected'):
+            facts.append(_fact('Anomaly Detected', anomaly.get('message', 'Yes')))
+        return facts, tables
+
+    findings = metrics_output.get('findings', {})
+    if not findings:
+        return facts, tables
+    severity = metrics_output.get('severity', 'UNKNOWN')
+    facts.append(_fact('Severity', severity=severity))
+    baseline = findings.get('baseline', {})
+    incident = findings.get('incident', {})
+    degradation = findings.get('degradation', {})
+    if baseline and incident:
+        facts.append(_fact('Error Rate', f"{baseline.get('error_rate_per_min')} -> {incident.get('error_rate_per_min')} "
+                                         f"errors/min ({degradation.get('error_rate_multiplier', '?')})"))
+        facts.append(_fact('P99 Latency', f"{baseline.get('p99_latency_ms')} -> {incident.get('p99_latency_ms')} ms "
+                                          f"({degradation.get('latency_multiplier', '?')})"))
+    if metrics_output.get('spike_detected_at'):
+        facts.append(_fact('Spike Detected At', metrics_output['spike_detected_at']))
+    anomalies = findings.get('anomalies', [])
+    if anomalies:
+        tables.append(_table('Anomalies', ('Anomaly',), [(a,) for a in anomalies]))
+    return facts, tables
+
+
+def _deploy_section(deploy_output, legacy):
+    facts, tables = [], []
+    if legacy:
+        fix = legacy.get('fix_recommendation', {})
+        if fix.get('recommend_rollback'):
+            facts.append(_fact('Recommendation', 'ROLLBACK RECOMMENDED', marker='YES'))
+            facts.append(_fact('Target Deployment', Code(fix.get('deployment_id'))))
+            if 'confidence' in fix:
+                facts.append(_fact('Confidence', f"{fix['confidence'] * 100:.0f}%"))
+            facts.append(_fact('Reason', str(fix.get('reason'))))
+        else:
+            facts.append(_fact('Recommendation', 'Rollback not recommended', marker='NO'))
+            facts.append(_fact('Reason', fix.get('reason', 'Insufficient correlation')))
+        fix_applied = legacy.get('fix_applied')
+        if fix_applied:
+            facts.append(_fact('Auto-Remediation', fix_applied.get('status', 'Not executed')))
+        return facts, tables
+
+    findings = deploy_output.get('findings', {})
+    if not findings:
+        return facts, tables
+    action = deploy_output.get('recommended_action', '')
+    rollback = action.upper().startswith('ROLLBACK')
+    facts.append(_fact('Recommendation', action or 'Rollback not recommended', marker='YES' if rollback else 'NO'))
+    if deploy_output.get('root_cause_hypothesis'):
+        facts.append(_fact('Hypothesis', deploy_output['root_cause_hypothesis']))
+    correlation = findings.get('correlation', {})
+    if correlation.get('deployment_id'):
+        facts.append(_fact('Target Deployment', Code(correlation['deployment_id']),
+                           f" (config {correlation.get('config_version')}, "
+                           f"{correlation.get('time_before_incident_minutes')} minutes before incident)"))
+        facts.append(_fact('Correlation', f"{correlation.get('correlation_strength', 'UNKNOWN')} "
+                                          f"({correlation.get('confidence', 0) * 100:.0f}%)"))
+
+    suspicious = findings.get('suspicious_changes', [])
+    if suspicious:
+        tables.append(_table('Suspicious Changes', ('Change', 'Risk', 'Reason'), [
+            (c.get('change'), c.get('risk_level'), c.get('reason')) for c in suspicious
+        ]))
+    deployments = findings.get('recent_deployments', [])
+    if deployments:
+        tables.append(_table('Recent Deployments', ('Deployment', 'Timestamp', 'Service', 'Config', 'Changes'), [
+            (Code(d.get('deployment_id')), d.get('timestamp'), d.get('service'), d.get('config_version'),
+             '; '.join(d.get('changes', [])))
+            for d in deployments
+        ]))
+    return facts, tables
+
+
+def _remediation_steps(steps):
+    normalized = []
+    for index, step in enumerate(steps or [], 1):
+        if isinstance(step, dict):
+            normalized.append({'priority': step.get('priority', index), **step})
+        else:
+            normalized.append({'priority': index, 'action': str(step)})
+    return sorted(normalized, key=lambda s: s['priority'])
+
+
+def build_report_model(commander_output, generated_at=None):
+    """Map Commander output (current or legacy schema) to a format-neutral report model."""
+    if isinstance(commander_output, str):
+        commander_output = json.loads(commander_output)
+
+    confidence = commander_output.get('confidence', 0.0) or 0.0
+    legacy_evidence = commander_output.get('evidence', {}) or {}
+    contributions = commander_output.get('agent_contributions', {}) or {}
+
+    sections = []
+    for key, builder in (('logs', _logs_section), ('metrics', _metrics_section), ('deploy', _deploy_section)):
+        facts, tables = builder(contributions.get(key, {}) or {}, legacy_evidence.get(key))
+        sections.append({'key': key, 'title': SECTION_TITLES[key], 'facts': facts, 'tables': tables})
+
+    similar = commander_output.get('similar_incidents') or []
+    if similar:
+        sections.append({'key': 'similar', 'title': 'Similar Past Incidents', 'facts': [], 'tables': [
+            _table('Closest resolved incidents', ('Similarity', 'Incident', 'Deployment', 'Confidence', 'Root cause'), [
+                (f"{i['similarity']:.0%}", Code(i.get('incident_id')), i.get('deployment_id') or '-',
+                 f"{(i.get('confidence') or 0) * 100:.0f}%", i.get('root_cause'))
+                for i in similar
+            ])
+        ]})
+
+    fix = (legacy_evidence.get('deploy') or {}).get('fix_recommendation', {})
+    deploy_action = (contributions.get('deploy') or {}).get('recommended_action', '')
+    rollback = bool(fix.get('recommend_rollback')) or deploy_action.upper().startswith('ROLLBACK')
+
+    deploy_findings = (contributions.get('deploy') or {}).get('findings', {})
+    logs_findings = (contributions.get('logs') or {}).get('findings', {})
+    deployment_id = (
+        fix.get('deployment_id')
+        or deploy_findings.get('correlation', {}).get('deployment_id')
+        or logs_findings.get('deployment_correlation', {}).get('deployment_id')
+        or ((legacy_evidence.get('logs') or {}).get('correlation') or {}).get('deployment_id')
+    )
+
+    synthesis = commander_output.get('synthesis')
+    model_id = commander_output.get('model_id')
+    return {
+        'generated_at': generated_at or datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC'),
+        'root_cause': commander_output.get('root_cause', 'Unknown'),
+        'confidence': confidence,
+        'confidence_level': confidence_level(confidence),
+        'auto_remediate': bool(commander_output.get('auto_remediate', commander_output.get('auto_remediate_approved', False))),
+        'rollback_recommended': rollback,
+        'deployment_id': deployment_id if deployment_id not in ('None', 'Unknown') else None,
+        'evidence_summary': commander_output.get('evidence_summary', {}) or {},
+        'sections': sections,
+        'reasoning': commander_output.get('reasoning') or commander_output.get('llm_reasoning', ''),
+        'remediation_steps': _remediation_steps(commander_output.get('remediation_steps')),
+        'model_label': SYNTHESIS_LABELS.get(synthesis) or model_id or commander_output.get('model') or DEFAULT_MODEL_LABEL,
+        'synthesis': synthesis,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Markdown
+# ---------------------------------------------------------------------------
+
+MD_HEADER = """# Incident Root Cause Analysis Report
+
+**Generated:** {generated_at}  
+**Status:** Investigation Complete  
+**Confidence:** {percent}%
+
+---
+
+## {icon_summary}Executive Summary
+
+### Root Cause
+{root_cause}
+
+### Confidence Level
+{level_marker} ({percent}%)
+""".format
+
+MD_FOOTER = """
+---
+
+**Report Generated by:** Autonomous Incident Commander  
+**LLM Model:** {model_label}  
+**Agent Framework:** Multi-Agent AWS Step Functions
+""".format
+
+MD_FACT = "- **{label}:** {marker}{value}".format
+MD_STEP = "{index}. {action}{details}\n".format
+
+
+def _md_value(parts):
+    return ''.join(f"`{p}`" if isinstance(p, Code) else str(p) for p in parts)
+
+
+def _md_cell(value):
+    text = f"`{value}`" if isinstance(value, Code) else str(value)
+    return text.replace('|', '\\|').replace('\n', ' ')
+
+
+def _render_markdown(model, emoji):
+    icons = SECTION_ICONS if emoji else dict.fromkeys(SECTION_ICONS, '')
+    percent = f"{model['confidence'] * 100:.0f}"
+    level = model['confidence_level']
+
+    out = [MD_HEADER(
+        generated_at=model['generated_at'],
+        percent=percent,
+        icon_summary=icons['summary'],
+        root_cause=model['root_cause'],
+        level_marker=f"{EMOJI[level]} {level}" if emoji else f"[{level}]"
+    )]
+
+    summary = model['evidence_summary']
+    if summary:
+        out.append("\n### Key Evidence\n")
+        for key in ('logs', 'metrics', 'deploy'):
+            if summary.get(key):
+                out.append(MD_FACT(label=key.capitalize(), marker='', value=summary[key]) + '\n')
+
+    out.append(f"\n---\n\n## {icons['evidence']}Evidence Analysis\n")
+    for section in model['sections']:
+        out.append(f"\n### {section['title']}\n\n")
+        if not section['facts'] and not section['tables']:
+            out.append("*No findings*\n")
+        for fact in section['facts']:
+            marker = ''
+            if fact['severity']:
+                severity = fact['severity']
+                marker = f"{SEVERITY_EMOJI.get(severity, '⚪')} {severity} " if emoji else f"[{severity}] "
+            elif fact['marker']:
+                marker = f"{EMOJI[fact['marker']]} " if emoji else f"[{fact['marker']}] "
+            out.append(MD_FACT(label=fact['label'], marker=marker, value=_md_value(fact['value'])).rstrip() + '\n')
+        for table in section['tables']:
+            out.append(f"\n**{table['title']}:**\n\n| {' | '.join(table['columns'])} |\n")
+            out.append(f"|{'---|' * len(table['columns'])}\n")
+            out.extend(f"| {' | '.join(_md_cell(cell) for cell in row)} |\n" for row in table['rows'])
+
+    out.append(f"\n---\n\n## {icons['reasoning']}LLM Reasoning\n\n")
+    out.append(f"{model['reasoning']}\n" if model['reasoning'] else "*LLM reasoning not available*\n")
+
+    out.append(f"\n---\n\n## {icons['remediation']}Remediation Steps\n\n")
+    if model['remediation_steps']:
+        for index, step in enumerate(model['remediation_steps'], 1):
+            details = [f"{k.replace('_', ' ')}: {step[k]}" for k in ('estimated_time', 'risk') if step.get(k)]
+            out.append(MD_STEP(index=index, action=step.get('action', ''),
+                               details=f" ({', '.join(details)})" if details else ''))
+    else:
+        out.append("*No specific remediation steps provided*\n")
+
+    out.append(f"\n---\n\n## {icons['next']}Next Actions\n\n### Immediate\n1. Review this RCA with the team\n")
+    out.append(f"2. {'Proceed with rollback if approved' if model['rollback_recommended'] else 'Monitor the situation'}\n")
+    out.append("3. Notify stakeholders\n")
+    for heading, actions in NEXT_ACTIONS:
+        out.append(f"\n### {heading}\n")
+        out.extend(f"{i}. {action}\n" for i, action in enumerate(actions, 1))
+
+    out.append(MD_FOOTER(model_label=model['model_label']))
+    return ''.join(out)
+
+
+# ---------------------------------------------------------------------------
+# HTML
+# ---------------------------------------------------------------------------
+
+HTML_HEADER = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Incident RCA Report</title>
+<style>
+body{{font-family:-apple-system,Segoe UI,Helvetica,Arial,sans-serif;max-width:960px;margin:2em auto;padding:0 1em;color:#222}}
+table{{border-collapse:collapse;margin:.5em 0 1em}}th,td{{border:1px solid #ccc;padding:4px 8px;text-align:left}}
+th{{background:#f4f4f4}}code{{background:#f4f4f4;padding:0 3px}}
+.marker{{font-weight:bold;padding:0 4px;border-radius:3px}}
+.HIGH,.YES{{background:#d4f4d4}}.MEDIUM{{background:#fff3c4}}.LOW,.NO,.CRITICAL{{background:#f8d0d0}}
+</style>
+</head>
+<body>
+<h1>Incident Root Cause Analysis Report</h1>
+<p><strong>Generated:</strong> {generated_at}<br><strong>Status:</strong> Investigation Complete<br>
+<strong>Confidence:</strong> {percent}%</p>
+<h2>Executive Summary</h2>
+<h3>Root Cause</h3>
+<p>{root_cause}</p>
+<h3>Confidence Level</h3>
+<p><span class="marker {level}">{level}</span> ({percent}%)</p>
+""".format
+
+HTML_FOOTER = """<hr>
+<p><strong>Report Generated by:</strong> Autonomous Incident Commander<br>
+<strong>LLM Model:</strong> {model_label}<br>
+<strong>Agent Framework:</strong> Multi-Agent AWS Step Functions</p>
+</body>
+</html>
+""".format
+
+HTML_FACT = "<li><strong>{label}:</strong> {marker}{value}</li>\n".format
+
+# Severity uses the confidence palette inverted: a HIGH severity is bad
+HTML_SEVERITY_CLASS = {'CRITICAL': 'CRITICAL', 'HIGH': 'LOW', 'MEDIUM': 'MEDIUM', 'LOW': 'HIGH'}
+
+
+def _html_text(value):
+    return f"<code>{html.escape(value)}</code>" if isinstance(value, Code) else html.escape(str(value))
+
+
+def _render_html(model):
+    escape = html.escape
+    out = [HTML_HEADER(
+        generated_at=escape(model['generated_at']),
+        percent=f"{model['confidence'] * 100:.0f}",
+        root_cause=escape(str(model['root_cause'])),
+        level=model['confidence_level']
+    )]
+
+    summary = model['evidence_summary']
+    if summary:
+        out.append("<h3>Key Evidence</h3>\n<ul>\n")
+        for key in ('logs', 'metrics', 'deploy'):
+            if summary.get(key):
+                out.append(HTML_FACT(label=key.capitalize(), marker='', value=escape(str(summary[key]))))
+        out.append("</ul>\n")
+
+    out.append("<h2>Evidence Analysis</h2>\n")
+    for section in model['sections']:
+        out.append(f"<h3>{escape(section['title'])}</h3>\n")
+        if not section['facts'] and not section['tables']:
+            out.append("<p><em>No findings</em></p>\n")
+        if section['facts']:
+            out.append("<ul>\n")
+            for fact in section['facts']:
+                marker = ''
+                if fact['severity']:
+                    css = HTML_SEVERITY_CLASS.get(fact['severity'], '')
+                    marker = f'<span class="marker {css}">{escape(fact["severity"])}</span> '
+                elif fact['marker']:
+                    marker = f'<span class="marker {fact["marker"]}">{fact["marker"]}</span> '
+                out.append(HTML_FACT(label=escape(fact['label']), marker=marker,
+                                     value=''.join(_html_text(p) for p in fact['value'])))
+            out.append("</ul>\n")
+        for table in section['tables']:
+            out.append(f"<p><strong>{escape(table['title'])}</strong></p>\n<table>\n<tr>")
+            out.extend(f"<th>{escape(c)}</th>" for c in table['columns'])
+            out.append("</tr>\n")
+            out.extend(
+                f"<tr>{''.join(f'<td>{_html_text(cell)}</td>' for cell in row)}</tr>\n"
+                for row in table['rows']
+            )
+            out.append("</table>\n")
+
+    out.append("<h2>LLM Reasoning</h2>\n")
+    out.append(f"<p>{escape(model['reasoning'])}</p>\n" if model['reasoning'] else "<p><em>LLM reasoning not available</em></p>\n")
+
+    out.append("<h2>Remediation Steps</h2>\n")
+    if model['remediation_steps']:
+        out.append("<table>\n<tr><th>#</th><th>Action</th><th>Estimated time</th><th>Risk</th></tr>\n")
+        out.extend(
+            f"<tr><td>{index}</td><td>{escape(str(step.get('action', '')))}</td>"
+            f"<td>{escape(str(step.get('estimated_time', '')))}</td><td>{escape(str(step.get('risk', '')))}</td></tr>\n"
+            for index, step in enumerate(model['remediation_steps'], 1)
+        )
+        out.append("</table>\n")
+    else:
+        out.append("<p><em>No specific remediation steps provided</em></p>\n")
+
+    out.append("<h2>Next Actions</h2>\n<h3>Immediate</h3>\n<ol>\n<li>Review this RCA with the team</li>\n")
+    out.append(f"<li>{'Proceed with rollback if approved' if model['rollback_recommended'] else 'Monitor the situation'}</li>\n")
+    out.append("<li>Notify stakeholders</li>\n</ol>\n")
+    for heading, actions in NEXT_ACTIONS:
+        out.append(f"<h3>{heading}</h3>\n<ol>\n")
+        out.extend(f"<li>{action}</li>\n" for action in actions)
+        out.append("</ol>\n")
+
+    out.append(HTML_FOOTER(model_label=escape(str(model['model_label']))))
+    return ''.join(out)
+
+
+# ---------------------------------------------------------------------------
+# JSON
+# ---------------------------------------------------------------------------
+
+def _plain(value):
+    if isinstance(value, tuple):
+        return ''.join(str(p) for p in value)
+    return value
+
+
+def _render_json(model):
+    sections = [{
+        'key': section['key'],
+        'title': section['title'],
+        'facts': [{
+            'label': fact['label'],
+            'value': _plain(fact['value']),
+            **({'marker': fact['marker']} if fact['marker'] else {}),
+            **({'severity': fact['severity']} if fact['severity'] else {})
+        } for fact in section['facts']],
+        'tables': [{
+            'title': table['title'],
+            'columns': list(table['columns']),
+            'rows': [list(row) for row in table['rows']]
+        } for table in section['tables']]
+    } for section in model['sections']]
+    return json.dumps({**model, 'sections': sections}, indent=2, default=str)
+
+
+def render_model(model, fmt='markdown'):
+    """Render a report model; build it once to produce several formats."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown report format: {fmt} (expected one of {', '.join(FORMATS)})")
+    if fmt == 'html':
+        return _render_html(model)
+    if fmt == 'json':
+        return _render_json(model)
+    return _render_markdown(model, emoji=(fmt == 'markdown'))
+
+
+def render_report(commander_output, fmt='markdown', generated_at=None):
+    """Render Commander output as 'markdown', 'markdown-plain', 'html' or 'json'."""
+    return render_model(build_report_model(commander_output, generated_at), fmt)
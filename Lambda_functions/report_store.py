@@ -0,0 +1,304 @@
+"""
+RCA Report Store
+Compressed, content-addressed report storage with an append-only index.
+
+Reports are gzip-compressed (Content-Encoding: gzip) and keyed by a hash of
+their content, so retries and re-runs that produce the same report reuse the
+stored objects instead of writing a copy. A small lookup object per content
+hash records which formats are already stored, so finding a duplicate is one
+GET rather than a read of the index.
+
+Every saved report (duplicate or not) appends one line (incident_id, root
+cause, confidence, deployment, synthesis path, timestamp, keys) to the gzip
+JSON-lines index. An entry with "verified": true has been confirmed by a
+post-incident review.
+The index is split into daily segments, and a day rolls over to a new part
+once its current part reaches REPORT_INDEX_SEGMENT_MAX_BYTES, so each append
+lists only its own day and rewrites at most one bounded segment. Each append
+also updates a snapshot of the newest REPORT_INDEX_RECENT_ENTRIES entries, so
+past-incident lookups (the Commander's similarity index, recent queries) are
+one small GET; only queries reaching further back read the segments:
+
+  {REPORT_INDEX_PREFIX}date=YYYY-MM-DD/part-00000.jsonl.gz
+  {REPORT_INDEX_PREFIX}recent.jsonl.gz
+  {REPORTS_PREFIX}hashes/{content_hash}.json
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from report_renderer import CONTENT_TYPES
+
+# Environment variables
+REPORTS_PREFIX = os.environ.get('REPORTS_PREFIX', 'rca_reports/')
+REPORT_INDEX_PREFIX = os.environ.get('REPORT_INDEX_PREFIX', f"{REPORTS_PREFIX}index/")
+INDEX_SEGMENT_MAX_BYTES = int(os.environ.get('REPORT_INDEX_SEGMENT_MAX_BYTES', str(1024 * 1024)))
+INDEX_RECENT_ENTRIES = int(os.environ.get('REPORT_INDEX_RECENT_ENTRIES', '1000'))
+INDEX_WRITE_ATTEMPTS = int(os.environ.get('REPORT_INDEX_WRITE_ATTEMPTS', '5'))
+
+# Object key suffix per format (plain Markdown kept apart from the emoji one)
+KEY_SUFFIXES = {'markdown': '.md', 'markdown-plain': '.plain.md', 'html': '.html', 'json': '.json'}
+
+# Error codes S3 returns when a conditional write loses a race
+CONDITIONAL_WRITE_CONFLICTS = ('PreconditionFailed', 'ConditionalRequestConflict')
+
+
+def content_hash(model):
+    """Hash of the report content, ignoring when it was generated."""
+    content = {k: v for k, v in model.items() if k != 'generated_at'}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def compress(data):
+    # mtime=0 keeps the bytes identical for identical content
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return gzip.compress(data, mtime=0)
+
+
+def _error_code(error):
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+
+def index_entry(model, incident_id, digest, keys, features=None):
+    entry = {
+        'incident_id': incident_id,
+        'root_cause': model['root_cause'],
+        'confidence': model['confidence'],
+        'deployment_id': model.get('deployment_id'),
+        'auto_remediate': model['auto_remediate'],
+        'synthesis': model.get('synthesis'),
+        'timestamp': datetime.utcnow().isoformat(),
+        'content_hash': digest,
+        'keys': keys
+    }
+    if features:
+        entry['features'] = features
+    return entry
+
+
+def segment_date(key):
+    """'YYYY-MM-DD' of an index segment key, or '' for keys outside the layout."""
+    for part in key.split('/'):
+        if part.startswith('date='):
+            return part[len('date='):]
+    return ''
+
+
+def parse_index(data):
+    """Index bytes (gzip, possibly several members) -> list of entries, oldest first."""
+    if not data:
+        return []
+    return [json.loads(line) for line in gzip.decompress(data).decode('utf-8').splitlines() if line]
+
+
+def query_index(entries, incident_id=None, deployment_id=None, min_confidence=None,
+                since=None, text=None, limit=None):
+    """Filter index entries in memory; newest first."""
+    matches = []
+    for entry in reversed(entries):
+        if incident_id and entry.get('incident_id') != incident_id:
+            continue
+        if deployment_id and entry.get('deployment_id') != deployment_id:
+            continue
+        if min_confidence is not None and (entry.get('confidence') or 0) < min_confidence:
+            continue
+        if since and entry.get('timestamp', '') < since:
+            continue
+        if text and text.lower() not in (entry.get('root_cause') or '').lower():
+            continue
+        matches.append(entry)
+        if limit and len(matches) >= limit:
+            break
+    return matches
+
+
+class ReportStore:
+    """Reports, their content-hash lookups and their index in one S3 bucket."""
+
+    def __init__(self, s3_client, bucket, prefix=REPORTS_PREFIX, index_prefix=REPORT_INDEX_PREFIX,
+                 segment_max_bytes=INDEX_SEGMENT_MAX_BYTES, recent_max_entries=INDEX_RECENT_ENTRIES):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.index_prefix = index_prefix
+        self.segment_max_bytes = segment_max_bytes
+        self.recent_max_entries = recent_max_entries
+        self.recent_key = f"{index_prefix}recent.jsonl.gz"
+
+    def _read(self, key):
+        """(bytes, ETag); (b'', None) for a missing object."""
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            if _error_code(e) in ('NoSuchKey', '404'):
+                return b'', None
+            raise
+        return response['Body'].read(), response.get('ETag')
+
+    def _list(self, prefix, start_after=''):
+        """[(key, size)] under a prefix, sorted by key."""
+        objects = []
+        extra = {'StartAfter': start_after} if start_after else {}
+        for page in self.s3.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=prefix, **extra):
+            objects.extend((item['Key'], item.get('Size', 0)) for item in page.get('Contents', []))
+        return sorted(objects)
+
+    def segments(self, since=None):
+        """[(key, size)] of the index segments, oldest first (from the day of `since`)."""
+        # Listing starts at the day of `since`, so older segments are not listed at all
+        start_after = f"{self.index_prefix}date={since[:10]}" if since else ''
+        return self._list(f"{self.index_prefix}date=", start_after)
+
+    def load_index(self, since=None):
+        """Raw index bytes: the segments concatenated (gzip members), b'' before the first report."""
+        return b''.join(self._read(key)[0] for key, _ in self.segments(since))
+
+    def entries(self, since=None):
+        return parse_index(self.load_index(since))
+
+    def recent(self):
+        """
+        The newest entries (up to recent_max_entries), oldest first, from one GET
+        of the snapshot. An index written before the snapshot existed falls back
+        to the segments.
+        """
+        data, etag = self._read(self.recent_key)
+        if etag is None:
+            return self.entries()[-self.recent_max_entries:]
+        return parse_index(data)
+
+    def query(self, **filters):
+        """
+        Filter the index, newest first. Answered from the recent snapshot when it
+        holds the whole history or already has `limit` matches; otherwise the
+        segments (from `since` on) are read.
+        """
+        recent = self.recent()
+        matches = query_index(recent, **filters)
+        limit = filters.get('limit')
+        if len(recent) < self.recent_max_entries or (limit and len(matches) >= limit):
+            return matches
+        return query_index(self.entries(filters.get('since')), **filters)
+
+    def get_report(self, key):
+        """Fetch and decompress a stored report."""
+        response = self.s3.get_object(Bucket=self.bucket, Key=key)
+        body = response['Body'].read()
+        if response.get('ContentEncoding') == 'gzip':
+            body = gzip.decompress(body)
+        return body.decode('utf-8')
+
+    def _hash_key(self, digest):
+        return f"{self.prefix}hashes/{digest}.json"
+
+    def save(self, model, reports, incident_id, metadata=None, features=None):
+        """
+        Store rendered reports ({format: body}) for a report model and index them
+        under incident_id, with the incident's similarity feature vector when
+        given. Objects already stored for the same content are not uploaded
+        again, but the incident always gets its own index entry.
+        Returns {'content_hash', 'keys', 'deduplicated', 'entry'}.
+        """
+        digest = content_hash(model)
+        data, _ = self._read(self._hash_key(digest))
+        known_keys = json.loads(data)['keys'] if data else {}
+
+        keys = {}
+        uploaded_bytes = 0
+        for fmt, body in reports.items():
+            key = f"{self.prefix}objects/{digest}{KEY_SUFFIXES[fmt]}"
+            keys[fmt] = key
+            if known_keys.get(fmt) == key:
+                continue
+            compressed = compress(body)
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key=key,
+                Body=compressed,
+                ContentType=CONTENT_TYPES[fmt],
+                ContentEncoding='gzip',
+                Metadata={'incident_id': incident_id, 'content_hash': digest, **(metadata or {})}
+            )
+            uploaded_bytes += len(compressed)
+
+        deduplicated = set(keys) <= set(known_keys)
+        if not deduplicated:
+            self._record_keys(digest, keys)
+
+        entry = index_entry(model, incident_id, digest, keys, features)
+        self._append_index(entry)
+        self._update_recent(entry)
+        if deduplicated:
+            print(f"   ♻️  Identical report already stored ({digest[:12]}), indexed {incident_id} without upload")
+        else:
+            print(f"   Stored {len(keys)} report(s), {uploaded_bytes} bytes compressed, index updated")
+        return {'content_hash': digest, 'keys': keys, 'deduplicated': deduplicated, 'entry': entry}
+
+    def _put_conditional(self, key, body, etag, content_type):
+        condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+        self.s3.put_object(Bucket=self.bucket, Key=key, Body=body, ContentType=content_type, **condition)
+
+    def _record_keys(self, digest, keys):
+        """Merge newly stored formats into the content hash's lookup object."""
+        key = self._hash_key(digest)
+        for attempt in range(INDEX_WRITE_ATTEMPTS):
+            data, etag = self._read(key)
+            merged = {**(json.loads(data)['keys'] if data else {}), **keys}
+            try:
+                self._put_conditional(key, json.dumps({'keys': merged}).encode('utf-8'), etag, 'application/json')
+                return
+            except Exception as e:
+                if _error_code(e) not in CONDITIONAL_WRITE_CONFLICTS or attempt == INDEX_WRITE_ATTEMPTS - 1:
+                    raise
+
+    def _append_index(self, entry):
+        """
+        Append one entry as a new gzip member of the day's current segment (a new
+        part once it is full), with a conditional write so concurrent reports
+        cannot drop each other.
+        """
+        line = compress(json.dumps(entry, default=str) + '\n')
+        day_prefix = f"{self.index_prefix}date={entry['timestamp'][:10]}/"
+        for attempt in range(INDEX_WRITE_ATTEMPTS):
+            parts = [key for key, _ in self._list(day_prefix)]
+            data, etag = self._read(parts[-1]) if parts else (b'', None)
+            if parts and len(data) + len(line) <= self.segment_max_bytes:
+                key = parts[-1]
+            else:
+                key = f"{day_prefix}part-{len(parts):05d}.jsonl.gz"
+                data, etag = b'', None
+            try:
+                self._put_conditional(key, data + line, etag, 'application/x-ndjson')
+                return
+            except Exception as e:
+                if _error_code(e) not in CONDITIONAL_WRITE_CONFLICTS or attempt == INDEX_WRITE_ATTEMPTS - 1:
+                    raise
+                # Lost the race: re-read and append to the newer segment
+
+    def _update_recent(self, entry):
+        """
+        Add an appended entry to the recent snapshot. The segments stay the source
+        of truth: a snapshot that cannot be written is reported, not raised.
+        """
+        for attempt in range(INDEX_WRITE_ATTEMPTS):
+            data, etag = self._read(self.recent_key)
+            if etag is None:
+                # First snapshot: seed it from the segments, which already hold the entry
+                entries = self.entries()[-self.recent_max_entries:]
+            else:
+                entries = parse_index(data)
+                if entry not in entries:  # a concurrent first snapshot may have seeded it
+                    entries.append(entry)
+                entries = entries[-self.recent_max_entries:]
+            body = compress(''.join(json.dumps(e, default=str) + '\n' for e in entries))
+            try:
+                self._put_conditional(self.recent_key, body, etag, 'application/x-ndjson')
+                return
+            except Exception as e:
+                if _error_code(e) not in CONDITIONAL_WRITE_CONFLICTS or attempt == INDEX_WRITE_ATTEMPTS - 1:
+                    print(f"⚠️  Recent index snapshot not updated: {str(e)}")
+                    return
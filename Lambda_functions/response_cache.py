@@ -0,0 +1,216 @@
+"""
+Two-Tier Response Cache
+In-process LRU for warm Lambda containers plus a persistent tier (S3, or a
+local directory stand-in), with TTL and size-based eviction and hit/miss stats.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+
+
+class MemoryTier:
+    """LRU cache bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries=128, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (expires_at, size, value)
+        self.total_bytes = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry[2]
+
+    def put(self, key, value, ttl_seconds, size):
+        if key in self.entries:
+            self._remove(key)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (time.time() + ttl_seconds, size, value)
+        self.total_bytes += size
+        while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self.entries.pop(key)
+        self.total_bytes -= size
+
+
+class FileTier:
+    """Persistent tier backed by a local directory (stand-in for S3/DynamoDB)."""
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if record['expires_at'] < time.time():
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+        return record['value']
+
+    def put(self, key, value, ttl_seconds, size):
+        record = {'expires_at': time.time() + ttl_seconds, 'value': value}
+        tmp_path = self._path(key) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, separators=(',', ':'))
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        """Drop the least recently written files until under max_bytes."""
+        files = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+
+class S3Tier:
+    """Persistent tier backed by S3 objects; expiry is stored in object metadata.
+    Size-based eviction is left to an S3 lifecycle rule on the prefix."""
+
+    def __init__(self, s3_client, bucket, prefix='llm-cache/'):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key):
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=f"{self.prefix}{key}.json")
+        except Exception as e:
+            # Only a missing object is a miss; throttling or access errors reach the caller's error count
+            if _error_code(e) in ('NoSuchKey', '404'):
+                return None
+            raise
+        expires_at = float(response.get('Metadata', {}).get('expires-at', '0'))
+        if expires_at < time.time():
+            return None
+        return json.loads(response['Body'].read())
+
+    def put(self, key, value, ttl_seconds, size):
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=f"{self.prefix}{key}.json",
+            Body=json.dumps(value, separators=(',', ':')).encode('utf-8'),
+            ContentType='application/json',
+            Metadata={'expires-at': str(time.time() + ttl_seconds)}
+        )
+
+
+class TwoTierCache:
+    """Read-through memory + persistent cache with hit/miss counters."""
+
+    def __init__(self, memory, persistent=None, ttl_seconds=86400):
+        self.memory = memory
+        self.persistent = persistent
+        self.ttl_seconds = ttl_seconds
+        self.counters = {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0, 'errors': 0}
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self.counters['memory_hits'] += 1
+            return value
+
+        if self.persistent is not None:
+            try:
+                value = self.persistent.get(key)
+            except Exception as e:
+                print(f"⚠️  Cache read failed: {str(e)}")
+                self.counters['errors'] += 1
+                value = None
+            if value is not None:
+                self.counters['persistent_hits'] += 1
+                self.memory.put(key, value, self.ttl_seconds, _size_of(value))
+                return value
+
+        self.counters['misses'] += 1
+        return None
+
+    def put(self, key, value, ttl_seconds=None):
+        size = _size_of(value)
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.memory.put(key, value, ttl_seconds, size)
+        if self.persistent is not None:
+            try:
+                self.persistent.put(key, value, ttl_seconds, size)
+            except Exception as e:
+                print(f"⚠️  Cache write failed: {str(e)}")
+                self.counters['errors'] += 1
+
+    def stats(self):
+        lookups = self.counters['memory_hits'] + self.counters['persistent_hits'] + self.counters['misses']
+        hits = lookups - self.counters['misses']
+        return {
+            **self.counters,
+            'hit_rate': (hits / lookups) if lookups else 0.0,
+            'memory_entries': len(self.memory.entries),
+            'evictions': self.memory.evictions + getattr(self.persistent, 'evictions', 0)
+        }
+
+
+def _error_code(error):
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+
+def _size_of(value):
+    return len(json.dumps(value, separators=(',', ':'), default=str))
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so formatting-only differences share a cache entry."""
+    return re.sub(r'\s+', ' ', prompt).strip()
+
+
+def llm_cache_key(model_id, prompt, temperature):
+    """Content address for an LLM call: hash of model, normalized prompt and temperature."""
+    material = json.dumps({
+        'model_id': model_id,
+        'prompt': normalize_prompt(prompt),
+        'temperature': round(float(temperature), 4)
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
@@ -0,0 +1,295 @@
+"""
+Retry and Latency Distribution Analysis
+Looks past the fixed CRITICAL_LATENCY_MS cutoff at how load and latency are
+distributed across every event of an incident context, to find two shapes that
+a threshold misses:
+
+  - Retry storms: a service's retry-weighted load (attempts = 1 + retry_count
+    per event) grows at least RETRY_STORM_MIN_GROWTH times over the baseline,
+    and retries per request grow by RETRY_STORM_MIN_AMPLIFICATION_GROWTH, so
+    clients retrying add load faster than the requests behind it.
+  - Bimodal timeout clusters: a service's latency histogram has a second
+    mode, separated from the normal one by a valley, sitting at or above
+    TIMEOUT_CLUSTER_MIN_MS (requests piling up on a timeout). The modes are
+    found over the whole window; the slow cluster's share before and after
+    the spike start shows whether it arrived with the incident.
+
+Everything lands in fixed-size count arrays: per service and minute, events,
+attempts and a retry_count histogram (RETRY_BINS, last bin open-ended); per
+service and phase (baseline before the spike start, incident from it), a
+log-scale latency histogram (LATENCY_BINS_PER_OCTAVE bins per doubling).
+Memory depends on the number of services and minutes, not on the number of
+events. The columns are sorted by time, so minute and phase boundaries are
+found by bisection, and each slice is counted in bulk (Counter over zipped
+column slices runs in C); Python only loops over the distinct
+(service, retry_count) and (service, latency) pairs.
+"""
+
+import bisect
+import math
+import os
+from array import array
+from collections import Counter
+
+from incident_context import CRITICAL_LATENCY_MS, MINUTE_MS, format_time_ms
+
+# Environment variables
+RETRY_STORM_MIN_GROWTH = float(os.environ.get('RETRY_STORM_MIN_GROWTH', '2.0'))
+RETRY_STORM_MIN_AMPLIFICATION_GROWTH = float(os.environ.get('RETRY_STORM_MIN_AMPLIFICATION_GROWTH', '1.25'))
+TIMEOUT_CLUSTER_MIN_MS = int(os.environ.get('TIMEOUT_CLUSTER_MIN_MS', str(CRITICAL_LATENCY_MS)))
+
+RETRY_BINS = 8  # retry_count 0..6, then 7+
+LATENCY_BINS_PER_OCTAVE = 4
+LATENCY_BINS = 18 * LATENCY_BINS_PER_OCTAVE  # 1 ms to ~262 s; slower lands in the last bin
+BASELINE, INCIDENT = 0, 1
+
+# A mode needs this share of the service's events (smoothed over 3 bins)
+BIMODAL_MIN_SHARE = 0.1
+# Modes at least an octave apart, with a valley at most half the lower peak
+BIMODAL_MIN_SEPARATION_BINS = LATENCY_BINS_PER_OCTAVE
+BIMODAL_MAX_VALLEY_RATIO = 0.5
+MIN_SERVICE_EVENTS = 50
+MAX_FINDINGS = 5
+
+
+def latency_bin(latency_ms):
+    if latency_ms < 1:
+        return 0
+    return min(LATENCY_BINS - 1, int(math.log2(latency_ms) * LATENCY_BINS_PER_OCTAVE))
+
+
+def bin_latency(index):
+    """Representative latency (geometric centre) of a latency bin."""
+    return round(2 ** ((index + 0.5) / LATENCY_BINS_PER_OCTAVE))
+
+
+class RetryHistograms:
+    """Fixed-size per-service retry and latency histograms of one incident context."""
+
+    def __init__(self, services, origin_ms, minutes, split_ms):
+        self.services = services
+        self.origin_ms = origin_ms
+        self.minutes = minutes
+        self.split_ms = split_ms
+        cells = len(services) * minutes
+        self.events = array('q', bytes(8 * cells))
+        self.attempts = array('q', bytes(8 * cells))
+        self.retries = array('q', bytes(8 * cells * RETRY_BINS))
+        self.latency = array('q', bytes(8 * 2 * len(services) * LATENCY_BINS))
+
+    @classmethod
+    def from_context(cls, context):
+        if not len(context):
+            return cls(context.dictionaries['service'], context.start_ms, 0, context.start_ms)
+        return cls.from_columns(context.dictionaries['service'], context.ts, context.latency, context.retries,
+                                context.codes['service'], context.spike_start_ms())
+
+    @classmethod
+    def from_columns(cls, services, ts, latency, retries, service_codes, split_ms):
+        """Fill the histograms from time-sorted, non-empty columns, counting each minute and phase slice in bulk."""
+        origin_ms = ts[0] - ts[0] % MINUTE_MS
+        minutes = (ts[-1] - origin_ms) // MINUTE_MS + 1
+        histograms = cls(services, origin_ms, minutes, split_ms)
+
+        bounds = [bisect.bisect_left(ts, origin_ms + minute * MINUTE_MS) for minute in range(minutes)] + [len(ts)]
+        for minute in range(minutes):
+            first, last = bounds[minute], bounds[minute + 1]
+            if first == last:
+                continue
+            for (service, retry_count), count in Counter(zip(service_codes[first:last], retries[first:last])).items():
+                cell = service * minutes + minute
+                histograms.events[cell] += count
+                histograms.attempts[cell] += count * (1 + retry_count)
+                histograms.retries[cell * RETRY_BINS + min(max(retry_count, 0), RETRY_BINS - 1)] += count
+
+        split = bisect.bisect_left(ts, split_ms)
+        for phase, (first, last) in ((BASELINE, (0, split)), (INCIDENT, (split, len(ts)))):
+            offset = phase * len(services) * LATENCY_BINS
+            for (service, latency_ms), count in Counter(zip(service_codes[first:last], latency[first:last])).items():
+                histograms.latency[offset + service * LATENCY_BINS + latency_bin(latency_ms)] += count
+        return histograms
+
+    # Views over the arrays
+
+    def split_minute(self):
+        return max(0, min(self.minutes, (self.split_ms - self.origin_ms) // MINUTE_MS))
+
+    def phase_minutes(self, phase):
+        split = self.split_minute()
+        return range(0, split) if phase == BASELINE else range(split, self.minutes)
+
+    def load(self, service, phase):
+        """(events, attempts) of a service over a phase."""
+        base = service * self.minutes
+        cells = [base + minute for minute in self.phase_minutes(phase)]
+        return sum(self.events[c] for c in cells), sum(self.attempts[c] for c in cells)
+
+    def retry_distribution(self, phase, service=None):
+        """[events with retry_count 0, 1, ... RETRY_BINS - 1 or more] over a phase."""
+        counts = [0] * RETRY_BINS
+        services = range(len(self.services)) if service is None else (service,)
+        for s in services:
+            for minute in self.phase_minutes(phase):
+                offset = (s * self.minutes + minute) * RETRY_BINS
+                for r in range(RETRY_BINS):
+                    counts[r] += self.retries[offset + r]
+        return counts
+
+    def latency_histogram(self, service, phase):
+        offset = (phase * len(self.services) + service) * LATENCY_BINS
+        return self.latency[offset:offset + LATENCY_BINS]
+
+    # Detection
+
+    def retry_storms(self):
+        """Services whose retry-weighted load grew faster than their requests."""
+        baseline_minutes = len(self.phase_minutes(BASELINE))
+        incident_minutes = len(self.phase_minutes(INCIDENT))
+        if not baseline_minutes or not incident_minutes:
+            return []
+
+        storms = []
+        for service, name in enumerate(self.services):
+            base_events, base_attempts = self.load(service, BASELINE)
+            events, attempts = self.load(service, INCIDENT)
+            if events + base_events < MIN_SERVICE_EVENTS:
+                continue
+            # A service silent before the spike counts as one attempt a minute
+            base_rate = max(base_attempts / baseline_minutes, 1)
+            rate = attempts / incident_minutes
+            base_amplification = base_attempts / base_events if base_events else 1.0
+            amplification = attempts / events if events else 1.0
+            growth = rate / base_rate
+            amplification_growth = amplification / base_amplification
+            if growth < RETRY_STORM_MIN_GROWTH or amplification_growth < RETRY_STORM_MIN_AMPLIFICATION_GROWTH:
+                continue
+
+            # First incident minute over the growth threshold, and the peak minute
+            minutes = list(self.phase_minutes(INCIDENT))
+            per_minute = [self.attempts[service * self.minutes + m] for m in minutes]
+            peak = max(range(len(minutes)), key=per_minute.__getitem__)
+            started = next((i for i, n in enumerate(per_minute) if n >= RETRY_STORM_MIN_GROWTH * base_rate), peak)
+            storms.append({
+                'service': name,
+                'load_growth': f"{growth:.1f}x",
+                'attempts_per_min': round(rate, 1),
+                'baseline_attempts_per_min': round(base_attempts / baseline_minutes, 1),
+                'attempts_per_request': round(amplification, 2),
+                'baseline_attempts_per_request': round(base_amplification, 2),
+                'retry_share': round((attempts - events) / attempts * 100, 1) if attempts else 0.0,
+                'started_at': format_time_ms(self.origin_ms + minutes[started] * MINUTE_MS),
+                'peak_at': format_time_ms(self.origin_ms + minutes[peak] * MINUTE_MS),
+                'peak_attempts_per_min': per_minute[peak],
+                'growth': growth
+            })
+        storms.sort(key=lambda storm: storm.pop('growth'), reverse=True)
+        return storms[:MAX_FINDINGS]
+
+    def timeout_clusters(self):
+        """Services whose latency is bimodal with the slow mode at a timeout."""
+        clusters = []
+        for service, name in enumerate(self.services):
+            baseline = self.latency_histogram(service, BASELINE)
+            incident = self.latency_histogram(service, INCIDENT)
+            modes = bimodal_split([b + i for b, i in zip(baseline, incident)])
+            if modes is None or modes['slow_mode_ms'] < TIMEOUT_CLUSTER_MIN_MS:
+                continue
+            split = modes.pop('split_bin')
+            baseline_total, incident_total = sum(baseline), sum(incident)
+            clusters.append({
+                'service': name,
+                **modes,
+                'baseline_slow_share': round(sum(baseline[split:]) / baseline_total * 100, 1) if baseline_total else None,
+                'incident_slow_share': round(sum(incident[split:]) / incident_total * 100, 1) if incident_total else None
+            })
+        clusters.sort(key=lambda cluster: cluster['slow_events'], reverse=True)
+        return clusters[:MAX_FINDINGS]
+
+
+def bimodal_split(hist):
+    """
+    The two strongest latency modes of a histogram, if it is bimodal: peaks of
+    the 3-bin smoothed counts at least BIMODAL_MIN_SEPARATION_BINS apart, with
+    a valley between them no higher than BIMODAL_MAX_VALLEY_RATIO of the lower
+    peak. A peak may be a plateau of equal smoothed counts; its mode is the
+    plateau's highest raw bin. The split between the clusters is the centre of
+    the valley's lowest raw bins. Returns None for unimodal (or too sparse)
+    histograms.
+    """
+    total = sum(hist)
+    if total < MIN_SERVICE_EVENTS:
+        return None
+    n = len(hist)
+    smooth = [sum(hist[max(0, i - 1):i + 2]) for i in range(n)]
+    peaks = [
+        max(range(start, end + 1), key=hist.__getitem__)
+        for start, end in _runs(smooth)
+        if smooth[start] >= BIMODAL_MIN_SHARE * total
+        and (start == 0 or smooth[start - 1] < smooth[start])
+        and (end == n - 1 or smooth[end + 1] < smooth[end])
+    ]
+
+    best = None
+    for a_index, low in enumerate(peaks):
+        for high in peaks[a_index + 1:]:
+            if high - low < BIMODAL_MIN_SEPARATION_BINS:
+                continue
+            valley = min(range(low, high + 1), key=smooth.__getitem__)
+            ratio = smooth[valley] / min(smooth[low], smooth[high])
+            if ratio <= BIMODAL_MAX_VALLEY_RATIO and (best is None or ratio < best[3]):
+                best = (low, high, valley, ratio)
+    if best is None:
+        return None
+
+    low, high, valley, ratio = best
+    # Lowest raw bins between the modes, nearest the smoothed valley; the slow
+    # cluster starts at the centre of that stretch
+    floor = min(hist[low + 1:high])
+    start, end = min(
+        ((s, e) for s, e in _runs([b == floor for b in hist[low + 1:high]]) if hist[low + 1 + s] == floor),
+        key=lambda run: max(run[0] + low + 1 - valley, valley - run[1] - low - 1, 0)
+    )
+    split = low + 1 + (start + end + 2) // 2
+    slow_events = sum(hist[split:])
+    if min(slow_events, total - slow_events) < BIMODAL_MIN_SHARE * total:
+        return None
+    return {
+        'fast_mode_ms': bin_latency(low),
+        'slow_mode_ms': bin_latency(high),
+        'split_ms': round(2 ** (split / LATENCY_BINS_PER_OCTAVE)),
+        'slow_events': slow_events,
+        'slow_share': round(slow_events / total * 100, 1),
+        'valley_ratio': round(ratio, 2),
+        'split_bin': split
+    }
+
+
+def _runs(values):
+    """(start, end) index ranges of equal consecutive values."""
+    runs = []
+    start = 0
+    for i in range(1, len(values) + 1):
+        if i == len(values) or values[i] != values[start]:
+            runs.append((start, i - 1))
+            start = i
+    return runs
+
+
+def analyze_retries(context):
+    """Retry-storm and timeout-cluster findings for a context (memoized on it)."""
+    def compute():
+        histograms = RetryHistograms.from_context(context)
+        baseline = histograms.retry_distribution(BASELINE)
+        incident = histograms.retry_distribution(INCIDENT)
+        labels = [str(r) for r in range(RETRY_BINS - 1)] + [f"{RETRY_BINS - 1}+"]
+        return {
+            'retry_storms': histograms.retry_storms(),
+            'timeout_clusters': histograms.timeout_clusters(),
+            'retry_distribution': {
+                'baseline': dict(zip(labels, baseline)),
+                'incident': dict(zip(labels, incident))
+            },
+            'services': len(histograms.services),
+            'minutes': histograms.minutes
+        }
+    return context.view('retry_analysis', compute)
@@ -0,0 +1,264 @@
+"""
+Rolling Baselines
+Minute and hour rollups of the event stream per (service, endpoint, region):
+event count, critical-error count, latency sum and a mergeable latency sketch.
+process_logs updates them during ingestion, so baseline stats for any window
+(including the same window a week earlier) are an O(buckets) lookup instead
+of a scan of raw events.
+
+The latency sketch is a log-bucketed histogram (as in DDSketch): latency v
+falls in bucket ceil(log(v) / log(gamma)). Any percentile read back is then
+within ROLLUP_SKETCH_ACCURACY relative error, and sketches merge by adding
+counts.
+
+Storage (gzip JSON under ROLLUP_PREFIX, one object per hour of minute cells and
+per day of hour cells):
+
+  {prefix}minute/date=YYYY-MM-DD/hour=HH.json.gz
+  {prefix}hour/date=YYYY-MM-DD.json.gz
+
+Each cell is [count, critical, latency_sum, {bucket: count}], keyed by the
+JSON array [bucket_start_ms, service, endpoint, region] (so any character may
+appear in a dimension; older objects used "|"-joined keys, which are still
+read). Objects are merged with conditional
+writes, and record the ingestion runs already applied, so re-processing a
+file does not count it twice.
+"""
+
+import gzip
+import json
+import math
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from aws_clients import lazy_client
+from response_cache import MemoryTier
+
+s3_client = lazy_client('s3')
+
+# Environment variables
+CRITICAL_LATENCY_MS = int(os.environ.get('CRITICAL_LATENCY_MS', '2000'))
+ROLLUP_ENABLED = os.environ.get('ROLLUP_ENABLED', 'true').lower() == 'true'
+ROLLUP_BUCKET = os.environ.get('ROLLUP_BUCKET', os.environ.get('REPORTS_BUCKET', 'hackathon-team14-bucket'))
+ROLLUP_PREFIX = os.environ.get('ROLLUP_PREFIX', 'rollups/')
+SKETCH_ACCURACY = float(os.environ.get('ROLLUP_SKETCH_ACCURACY', '0.02'))
+
+MINUTE_MS = 60000
+HOUR_MS = 60 * MINUTE_MS
+GRANULARITIES = {'minute': MINUTE_MS, 'hour': HOUR_MS}
+WEEK_MS = 7 * 24 * HOUR_MS
+RUN_HISTORY = 256  # ingestion runs remembered per object
+WRITE_ATTEMPTS = 5
+CONDITIONAL_WRITE_CONFLICTS = ('PreconditionFailed', 'ConditionalRequestConflict')
+
+GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+# Rollup objects read by this warm container; short TTL since ingestion updates them
+object_cache = MemoryTier(max_entries=256, max_bytes=64 * 1024 * 1024)
+OBJECT_CACHE_TTL_SECONDS = 60
+
+
+def sketch_bucket(latency_ms):
+    return math.ceil(math.log(max(latency_ms, 1)) / LOG_GAMMA)
+
+
+def sketch_value(bucket):
+    """Representative latency of a bucket (within SKETCH_ACCURACY of any value in it)."""
+    return 2 * GAMMA ** bucket / (GAMMA + 1) if bucket > 0 else 1
+
+
+def sketch_percentile(sketch, q):
+    total = sum(sketch.values())
+    if not total:
+        return 0
+    rank = q * (total - 1)
+    seen = 0
+    for bucket in sorted(sketch):
+        seen += sketch[bucket]
+        if seen > rank:
+            return round(sketch_value(bucket))
+    return round(sketch_value(max(sketch)))
+
+
+def _error_code(error):
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+
+def _time_ms(value):
+    return int(datetime.fromisoformat(str(value).replace('Z', '')).timestamp() * 1000)
+
+
+def cell_key(bucket_ms, dims):
+    return json.dumps([bucket_ms, *dims], separators=(',', ':'))
+
+
+def parse_cell_key(key):
+    """(bucket_ms, service, endpoint, region) of a cell key."""
+    if key.startswith('['):
+        bucket_ms, service, endpoint, region = json.loads(key)
+    else:
+        bucket_ms, service, endpoint, region = key.split('|')  # before JSON keys
+    return int(bucket_ms), service, endpoint, region
+
+
+def _new_cell():
+    return [0, 0, 0, defaultdict(int)]
+
+
+def _merge_cell(into, cell):
+    into[0] += cell[0]
+    into[1] += cell[1]
+    into[2] += cell[2]
+    for bucket, count in cell[3].items():
+        into[3][int(bucket)] += count
+
+
+class Rollup:
+    """In-memory minute and hour cells for one ingestion run."""
+
+    def __init__(self):
+        self.cells = {granularity: defaultdict(_new_cell) for granularity in GRANULARITIES}
+
+    def add(self, record):
+        try:
+            timestamp_ms = _time_ms(record['timestamp'])
+        except (KeyError, ValueError):
+            return
+        try:
+            latency = float(record.get('latency_ms') or 0)
+        except (TypeError, ValueError):
+            latency = 0
+        dims = tuple(str(record.get(dim) or 'unknown') for dim in ('service', 'endpoint', 'region'))
+        bucket = sketch_bucket(latency)
+        for granularity, size in GRANULARITIES.items():
+            cell = self.cells[granularity][cell_key(timestamp_ms - timestamp_ms % size, dims)]
+            cell[0] += 1
+            cell[1] += latency >= CRITICAL_LATENCY_MS
+            cell[2] += latency
+            cell[3][bucket] += 1
+
+    def objects(self, prefix=ROLLUP_PREFIX):
+        """{object key: {cell key: cell}} grouping cells into their storage objects."""
+        grouped = defaultdict(dict)
+        for granularity, cells in self.cells.items():
+            for key, cell in cells.items():
+                grouped[object_key(granularity, parse_cell_key(key)[0], prefix)][key] = cell
+        return grouped
+
+
+def object_key(granularity, bucket_ms, prefix=ROLLUP_PREFIX):
+    moment = datetime.fromtimestamp(bucket_ms / 1000, tz=timezone.utc)
+    if granularity == 'minute':
+        return f"{prefix}minute/date={moment:%Y-%m-%d}/hour={moment:%H}.json.gz"
+    return f"{prefix}hour/date={moment:%Y-%m-%d}.json.gz"
+
+
+class RollupStore:
+    """Rollup objects in S3: merged on write, combined per window on read."""
+
+    def __init__(self, bucket=ROLLUP_BUCKET, prefix=ROLLUP_PREFIX, s3=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.s3 = s3 or s3_client
+
+    def _read(self, key):
+        """(document, ETag); an empty document before the first write."""
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            if _error_code(e) in ('NoSuchKey', '404'):
+                return {'runs': [], 'cells': {}}, None
+            raise
+        return json.loads(gzip.decompress(response['Body'].read())), response.get('ETag')
+
+    def update(self, rollup, run_id):
+        """Merge one run's cells into the stored objects; returns {'objects', 'cells', 'skipped'}."""
+        written = skipped = cells = 0
+        for key, new_cells in rollup.objects(self.prefix).items():
+            for attempt in range(WRITE_ATTEMPTS):
+                document, etag = self._read(key)
+                if run_id in document['runs']:
+                    skipped += 1
+                    break
+                stored = {k: [c[0], c[1], c[2], defaultdict(int, {int(b): n for b, n in c[3].items()})]
+                          for k, c in document['cells'].items()}
+                for cell_id, cell in new_cells.items():
+                    _merge_cell(stored.setdefault(cell_id, _new_cell()), cell)
+                document = {'runs': (document['runs'] + [run_id])[-RUN_HISTORY:], 'cells': stored}
+                condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+                try:
+                    self.s3.put_object(
+                        Bucket=self.bucket,
+                        Key=key,
+                        Body=gzip.compress(json.dumps(document, separators=(',', ':')).encode('utf-8'), mtime=0),
+                        ContentType='application/json',
+                        **condition
+                    )
+                except Exception as e:
+                    if _error_code(e) not in CONDITIONAL_WRITE_CONFLICTS or attempt == WRITE_ATTEMPTS - 1:
+                        raise
+                    continue  # lost the race: re-read and merge into the newer object
+                object_cache.put(key, document['cells'], OBJECT_CACHE_TTL_SECONDS, len(new_cells) * 256)
+                written += 1
+                cells += len(new_cells)
+                break
+        return {'objects': written, 'cells': cells, 'skipped': skipped}
+
+    def _cells(self, key):
+        cells = object_cache.get(key)
+        if cells is None:
+            cells = self._read(key)[0]['cells']
+            object_cache.put(key, cells, OBJECT_CACHE_TTL_SECONDS, len(cells) * 256)
+        return cells
+
+    def _collect(self, granularity, start_ms, end_ms, dims, into):
+        """Merge cells of one granularity with start_ms <= bucket < end_ms into `into`."""
+        size = GRANULARITIES[granularity]
+        object_span = HOUR_MS if granularity == 'minute' else 24 * HOUR_MS
+        buckets = 0
+        first_object = start_ms - start_ms % object_span
+        for object_start in range(first_object, end_ms, object_span):
+            for cell_id, cell in self._cells(object_key(granularity, object_start, self.prefix)).items():
+                bucket_ms, service, endpoint, region = parse_cell_key(cell_id)
+                if not start_ms <= bucket_ms < end_ms:
+                    continue
+                if any(wanted and value != wanted for wanted, value in zip(dims, (service, endpoint, region))):
+                    continue
+                _merge_cell(into, cell)
+                buckets += 1
+        return buckets
+
+    def window_stats(self, start_ms, end_ms, service=None, endpoint=None, region=None):
+        """
+        Stats for [start_ms, end_ms) (rounded out to whole minutes), optionally
+        for one service/endpoint/region: whole hours come from hour cells and
+        the edges from minute cells.
+        """
+        start_ms -= start_ms % MINUTE_MS
+        end_ms += -end_ms % MINUTE_MS
+        dims = (service, endpoint, region)
+        total = _new_cell()
+        first_hour = start_ms + -start_ms % HOUR_MS
+        last_hour = end_ms - end_ms % HOUR_MS
+        if first_hour < last_hour:
+            cells = self._collect('hour', first_hour, last_hour, dims, total)
+            cells += self._collect('minute', start_ms, first_hour, dims, total)
+            cells += self._collect('minute', last_hour, end_ms, dims, total)
+        else:
+            cells = self._collect('minute', start_ms, end_ms, dims, total)
+
+        minutes = (end_ms - start_ms) / MINUTE_MS
+        count, critical, latency_sum, sketch = total
+        return {
+            'events': count,
+            'critical_events': critical,
+            'error_rate': round(critical / count, 4) if count else 0.0,
+            'error_rate_per_min': round(critical / minutes, 1) if minutes else 0.0,
+            'avg_latency_ms': round(latency_sum / count) if count else 0,
+            'p50_latency_ms': sketch_percentile(sketch, 0.5),
+            'p99_latency_ms': sketch_percentile(sketch, 0.99),
+            'minutes': minutes,
+            'cells_read': cells
+        }
@@ -0,0 +1,133 @@
+"""
+Rule-Based Synthesis
+Deterministic root cause analysis computed from the actual agent findings.
+Used by the Commander when Bedrock is unavailable or misses the deadline;
+produces the same output schema as the LLM analysis, plus the reasons of
+the rules that fired (rules_fired).
+"""
+
+# Confidence adjustments when agents agree / disagree on the culprit
+AGREEMENT_BONUS = 0.05
+DISAGREEMENT_PENALTY = 0.25
+AUTO_REMEDIATE_MIN_CONFIDENCE = 0.85
+
+
+def _weighted_confidence(logs_findings, metrics_findings, deploy_findings):
+    """Average agent confidence, weighting the two attribution agents higher."""
+    weights = ((logs_findings, 0.4), (deploy_findings, 0.4), (metrics_findings, 0.2))
+    total = sum(w for f, w in weights if f and 'error' not in f)
+    if not total:
+        return 0.0
+    return sum(f.get('confidence', 0) * w for f, w in weights if f and 'error' not in f) / total
+
+
+def describe_rules(rules_fired):
+    return '; '.join(rules_fired) if rules_fired else 'No correlating rules fired.'
+
+
+def synthesize(logs_findings, metrics_findings, deploy_findings):
+    """Build a root cause analysis from agent findings without calling an LLM."""
+    logs = logs_findings.get('findings', {}) or {}
+    metrics = metrics_findings.get('findings', {}) or {}
+    deploy = deploy_findings.get('findings', {}) or {}
+
+    top_error = logs.get('top_error', {})
+    error_type = top_error.get('type') or 'Elevated error rate'
+    logs_deployment = logs.get('deployment_correlation', {}).get('deployment_id')
+    logs_percentage = logs.get('deployment_correlation', {}).get('percentage', 0)
+
+    correlation = deploy.get('correlation', {})
+    deploy_id = correlation.get('deployment_id')
+    config_version = correlation.get('config_version')
+    minutes_before = correlation.get('time_before_incident_minutes')
+    suspicious = sorted(
+        deploy.get('suspicious_changes', []),
+        key=lambda c: {'HIGH': 0, 'MEDIUM': 1}.get(c.get('risk_level'), 2)
+    )
+
+    degradation = metrics.get('degradation', {})
+    severity = metrics_findings.get('severity', 'UNKNOWN')
+
+    # Rule 1: the logs and deploy agents point at the same deployment
+    agree = bool(deploy_id) and logs_deployment == deploy_id
+    confidence = _weighted_confidence(logs_findings, metrics_findings, deploy_findings)
+    rules_fired = []
+    if agree:
+        confidence += AGREEMENT_BONUS
+        rules_fired.append(f"LogsAgent and DeployAgent both implicate {deploy_id}")
+    elif deploy_id and logs_deployment and logs_deployment not in ('None', 'Unknown'):
+        confidence -= DISAGREEMENT_PENALTY
+        rules_fired.append(f"LogsAgent implicates {logs_deployment} but DeployAgent implicates {deploy_id}")
+
+    # Rule 2: a high-risk change shipped shortly before the incident
+    if suspicious:
+        rules_fired.append(f"{suspicious[0].get('risk_level')} risk change: {suspicious[0].get('change')}")
+    if correlation.get('correlation_strength') == 'STRONG':
+        rules_fired.append(f"Deployment landed {minutes_before} minutes before the incident")
+
+    # Rule 3: metrics confirm a real degradation
+    if severity in ('CRITICAL', 'HIGH'):
+        rules_fired.append(f"{severity} severity with {degradation.get('error_rate_multiplier', 'n/a')} error rate")
+
+    # Rule 4: retries and timeouts shape the load beyond the critical threshold
+    storms = metrics.get('retry_storms') or []
+    for storm in storms[:2]:
+        rules_fired.append(f"Retry storm on {storm['service']}: {storm['load_growth']} load at "
+                           f"{storm['attempts_per_request']} attempts per request")
+    clusters = metrics.get('timeout_clusters') or []
+    if clusters:
+        rules_fired.append(f"Timeout cluster at ~{clusters[0]['slow_mode_ms']}ms on "
+                           f"{', '.join(c['service'] for c in clusters[:3])}")
+
+    confidence = round(max(0.0, min(confidence, 0.95)), 2)
+
+    # Root cause sentence from whatever evidence is available
+    culprit = deploy_id if agree or not logs_deployment else logs_deployment
+    if culprit and culprit not in ('None', 'Unknown'):
+        root_cause = f"{error_type} caused by {culprit}"
+        if config_version and culprit == deploy_id:
+            root_cause += f" ({config_version})"
+        if suspicious and culprit == deploy_id:
+            root_cause += f": {suspicious[0].get('change')}"
+    else:
+        root_cause = f"{error_type} with no deployment correlation identified"
+
+    # Remediation: rollback first when the deployment is implicated
+    remediation_steps = []
+    if culprit == deploy_id and deploy_id and correlation.get('correlation_strength') == 'STRONG':
+        action = deploy_findings.get('recommended_action') or f"ROLLBACK {deploy_id}"
+        remediation_steps.append({'action': action, 'estimated_time': '5 minutes', 'risk': 'LOW'})
+    for change in suspicious[:2]:
+        remediation_steps.append({
+            'action': f"Revert change: {change.get('change')}",
+            'estimated_time': '15 minutes',
+            'risk': 'LOW' if change.get('risk_level') == 'HIGH' else 'MEDIUM'
+        })
+    for storm in storms[:1]:
+        remediation_steps.append({
+            'action': f"Throttle client retries to {storm['service']} (exponential backoff with jitter, retry budget)",
+            'estimated_time': '15 minutes',
+            'risk': 'LOW'
+        })
+    remediation_steps.append({
+        'action': f"Add alerting on {error_type} rate",
+        'estimated_time': '30 minutes',
+        'risk': 'LOW'
+    })
+    for priority, step in enumerate(remediation_steps, 1):
+        step['priority'] = priority
+
+    return {
+        'root_cause': root_cause,
+        'confidence': confidence,
+        'evidence_summary': {
+            'logs': f"{top_error.get('count', 0)} {error_type} errors; {logs_percentage:.0f}% linked to {logs_deployment or 'no deployment'}",
+            'metrics': f"{severity} severity, error rate {degradation.get('error_rate_multiplier', 'n/a')}, latency {degradation.get('latency_multiplier', 'n/a')}",
+            'deploy': f"{deploy_id or 'No deployment'} {f'{minutes_before} minutes before incident' if minutes_before is not None else ''}".strip()
+        },
+        'remediation_steps': [{k: s[k] for k in ('priority', 'action', 'estimated_time', 'risk')} for s in remediation_steps],
+        'auto_remediate': agree and confidence >= AUTO_REMEDIATE_MIN_CONFIDENCE and correlation.get('correlation_strength') == 'STRONG',
+        'reasoning': 'Rule-based synthesis (LLM unavailable). ' + describe_rules(rules_fired),
+        'rules_fired': rules_fired,
+        'synthesis': 'rule-based'
+    }
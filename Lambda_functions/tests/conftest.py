@@ -0,0 +1,41 @@
+"""
+Shared fixtures. The Lambda modules import each other by module name, as they
+do inside the deployment package, so Lambda_functions/ goes on sys.path.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aws_clients  # noqa: E402
+from local_aws import LocalLogs, LocalS3, LocalStepFunctions  # noqa: E402
+
+
+@pytest.fixture
+def s3():
+    """In-memory S3 served to every module's lazy client for one test."""
+    client = LocalS3()
+    aws_clients.set_override('s3', client)
+    yield client
+    aws_clients._overrides.pop('s3', None)
+
+
+@pytest.fixture
+def logs():
+    """In-memory CloudWatch Logs (with the Logs Insights subset) for one test."""
+    client = LocalLogs()
+    aws_clients.set_override('logs', client)
+    yield client
+    aws_clients._overrides.pop('logs', None)
+
+
+@pytest.fixture
+def stepfunctions():
+    """Step Functions stand-in recording started executions for one test."""
+    client = LocalStepFunctions()
+    aws_clients.set_override('stepfunctions', client)
+    yield client
+    aws_clients._overrides.pop('stepfunctions', None)
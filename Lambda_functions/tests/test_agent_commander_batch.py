@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+import agent_commander_batch as batch_mode
+from agent_commander_batch import BATCH_MODEL_MAX_OUTPUT_TOKENS, INCIDENTS_PER_CALL, batch_max_tokens, group_incidents
+
+
+def outputs(deployment_id, service):
+    return [
+        {'agent': 'LogsAgent', 'confidence': 0.9, 'findings': {
+            'top_error': {'type': 'Timeout', 'count': 10},
+            'deployment_correlation': {'deployment_id': deployment_id, 'percentage': 90},
+            'affected_services': {service: 10}}},
+        {'agent': 'MetricsAgent', 'confidence': 0.8, 'severity': 'HIGH', 'findings': {}},
+        {'agent': 'DeployAgent', 'confidence': 0.9, 'findings': {
+            'correlation': {'deployment_id': deployment_id},
+            'target_deployment': {'service': service}}}
+    ]
+
+
+def event(*incidents, mode='realtime'):
+    return {'mode': mode, 'incidents': [
+        {'incident_id': incident_id, 'agent_outputs': outputs(deployment_id, service)}
+        for incident_id, deployment_id, service in incidents
+    ]}
+
+
+def test_incidents_sharing_a_deployment_or_service_are_grouped():
+    incidents = batch_mode.prepare_incidents(event(
+        ('a', 'deploy_1', 'checkout'), ('b', 'deploy_2', 'checkout'), ('c', 'deploy_2', 'cart'),
+        ('d', 'deploy_9', 'search')
+    ))
+    groups = [[i['incident_id'] for i in batch] for batch in group_incidents(incidents)]
+    assert sorted(groups) == [['a', 'b', 'c'], ['d']]
+
+
+def test_groups_are_split_to_fit_the_model_output_limit():
+    incidents = batch_mode.prepare_incidents(event(*[(str(i), 'deploy_1', 'checkout') for i in range(20)]))
+    batches = group_incidents(incidents)
+    assert all(len(b) <= INCIDENTS_PER_CALL for b in batches)
+    assert sum(len(b) for b in batches) == 20
+    assert all(batch_max_tokens(b) <= BATCH_MODEL_MAX_OUTPUT_TOKENS for b in batches)
+
+
+def test_realtime_uses_one_call_per_group_and_fills_gaps_with_rules(s3, monkeypatch):
+    calls = []
+
+    def call_llm_with_hedge(prompt, context, max_tokens):
+        calls.append(max_tokens)
+        return 'model', {'shared_root_cause': 'deploy_1', 'incidents': [
+            {'incident_id': 'a', 'root_cause': 'pool exhausted by deploy_1', 'confidence': 0.9}
+        ]}
+
+    monkeypatch.setattr(batch_mode, 'call_llm_with_hedge', call_llm_with_hedge)
+    result = batch_mode.lambda_handler(event(('a', 'deploy_1', 'checkout'), ('b', 'deploy_1', 'checkout')), None)
+
+    assert result['llm_calls'] == 1 and len(calls) == 1
+    assert result['groups'][0]['shared_root_cause'] == 'deploy_1'
+    assert result['results']['a']['synthesis'] == 'llm'
+    assert result['results']['b']['synthesis'] == 'rule-based'
+
+
+class BatchControl:
+    """Bedrock control plane stand-in that completes jobs with a canned answer per record."""
+
+    def __init__(self, s3):
+        self.s3 = s3
+        self.jobs = {}
+
+    def create_model_invocation_job(self, jobName, inputDataConfig, outputDataConfig, **kwargs):
+        job_arn = f"arn:aws:bedrock:us-east-1:1:model-invocation-job/{jobName}-id"
+        self.jobs[job_arn] = {'jobName': jobName, 'status': 'Completed', 'outputDataConfig': outputDataConfig}
+        bucket, _, key = inputDataConfig['s3InputDataConfig']['s3Uri'][5:].partition('/')
+        lines = []
+        for line in self.s3.get_object(Bucket=bucket, Key=key)['Body'].read().decode('utf-8').splitlines():
+            record = json.loads(line)
+            prompt = record['modelInput']['messages'][0]['content']
+            incidents = [{'incident_id': part.split()[0], 'root_cause': 'shared pool'}
+                         for part in prompt.split('### INCIDENT ')[1:]]
+            answer = json.dumps({'shared_root_cause': 'shared pool', 'incidents': incidents})
+            lines.append(json.dumps({'recordId': record['recordId'], 'modelOutput': {'content': [{'text': answer}]}}))
+        self.s3.put_object(Bucket=bucket, Key=f"batch-inference/output/{jobName}-id/{key.split('/')[-1]}.out",
+                           Body='\n'.join(lines).encode('utf-8'))
+        return {'jobArn': job_arn}
+
+    def get_model_invocation_job(self, jobIdentifier):
+        return self.jobs[jobIdentifier]
+
+
+def test_offline_results_are_keyed_by_incident_id(s3, monkeypatch):
+    monkeypatch.setattr(batch_mode, 'bedrock_control', BatchControl(s3))
+    monkeypatch.setattr(batch_mode, 'BATCH_INFERENCE_ROLE_ARN', 'arn:aws:iam::1:role/batch')
+
+    job = batch_mode.lambda_handler(event(('a', 'deploy_1', 'checkout'), ('z', 'deploy_9', 'search'), mode='offline'), None)
+    collected = batch_mode.lambda_handler({'mode': 'collect', 'job_arn': job['job_arn']}, None)
+
+    assert collected['status'] == 'Completed'
+    assert sorted(collected['results']) == ['a', 'z']
+    assert all(r['root_cause'] == 'shared pool' for r in collected['results'].values())
+    assert sorted(g['incident_ids'] for g in collected['groups']) == [['a'], ['z']]
+
+
+def test_offline_mode_needs_a_service_role(s3, monkeypatch):
+    monkeypatch.setattr(batch_mode, 'BATCH_INFERENCE_ROLE_ARN', '')
+    with pytest.raises(ValueError):
+        batch_mode.submit_offline_job([])
@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+import agent_deploy
+from agent_deploy import DEFAULT_DEPLOYMENTS, lambda_handler, load_deployments
+
+HISTORY = [
+    {'deployment_id': 'deploy_4', 'timestamp': '2026-02-06T10:00:00Z', 'service': 'checkout',
+     'config_version': 'v4', 'changes': ['Reduced connection pool size from 50 to 10']},
+    {'deployment_id': 'deploy_3', 'timestamp': '2026-02-06T09:30:00Z', 'service': 'payment',
+     'config_version': 'v3', 'changes': []},
+    {'deployment_id': 'deploy_2', 'timestamp': '2026-02-06T09:00:00Z', 'service': 'checkout',
+     'config_version': 'v2', 'changes': []},
+    {'deployment_id': 'deploy_1', 'timestamp': '2026-02-06T08:00:00Z', 'service': 'auth',
+     'config_version': 'v1', 'changes': []},
+]
+
+
+def investigate(deployment_id, deployments=HISTORY):
+    return lambda_handler({
+        'correlation': {'deployment_id': deployment_id},
+        'time_window': {'start': '2026-02-06T10:10:00', 'end': '2026-02-06T10:40:00'},
+        'deployments': deployments
+    }, None)
+
+
+def test_rollback_target_is_the_same_services_previous_deployment():
+    findings = investigate('deploy_4')
+    assert findings['findings']['rollback_target'] == 'deploy_2'
+    assert findings['recommended_action'] == 'ROLLBACK deploy_4 to previous config (v2)'
+
+
+def test_no_rollback_target_without_an_earlier_deployment_of_the_service():
+    findings = investigate('deploy_4', [d for d in HISTORY if d['deployment_id'] != 'deploy_2'])
+    assert findings['confidence'] > 0.8
+    assert findings['findings']['rollback_target'] is None
+    assert not findings['recommended_action'].startswith('ROLLBACK')
+
+
+def test_demo_history_is_copied_per_invocation():
+    deployments = load_deployments({})
+    deployments[0]['changes'].append('mutated')
+    assert 'mutated' not in DEFAULT_DEPLOYMENTS[0]['changes']
+
+
+def test_table_numbers_are_plain_ints_and_floats(monkeypatch):
+    item = {
+        'deployment_id': {'S': 'deploy_9'}, 'timestamp': {'S': '2026-02-06T10:00:00Z'},
+        'replicas': {'N': '3'}, 'canary_percent': {'N': '12.5'}, 'ports': {'NS': ['8080']}
+    }
+
+    class Paginator:
+        def paginate(self, TableName):
+            return [{'Items': [item]}]
+
+    class Table:
+        def get_paginator(self, operation):
+            return Paginator()
+
+    monkeypatch.setattr(agent_deploy, 'DEPLOYMENTS_TABLE', 'deployments')
+    monkeypatch.setattr(agent_deploy, 'dynamodb', Table())
+    deployment = load_deployments({})[0]
+    assert deployment['replicas'] == 3 and type(deployment['replicas']) is int
+    assert deployment['canary_percent'] == 12.5
+    assert deployment['ports'] == [8080]
+    assert not any(isinstance(v, Decimal) for v in deployment.values())
@@ -0,0 +1,28 @@
+import pytest
+
+import aws_clients
+from aws_clients import get_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    aws_clients._clients.clear()
+    yield
+    aws_clients._clients.clear()
+
+
+def test_clients_are_shared_per_service_region_and_config():
+    adaptive = {'retries': {'max_attempts': 3, 'mode': 'adaptive'}}
+    first = get_client('bedrock-runtime', 'us-east-1', adaptive)
+    assert get_client('bedrock-runtime', 'us-east-1', dict(adaptive)) is first
+    assert get_client('bedrock-runtime', 'us-east-1') is not first
+    assert first.meta.config.retries['mode'] == 'adaptive'
+
+
+def test_override_is_served_for_every_config():
+    stand_in = object()
+    aws_clients.set_override('s3', stand_in)
+    try:
+        assert get_client('s3', config={'max_pool_connections': 1}) is stand_in
+    finally:
+        aws_clients._overrides.pop('s3', None)
@@ -0,0 +1,47 @@
+import struct
+
+import pytest
+
+from bedrock_client import _arriving_chunks, iter_event_stream
+
+
+def frame(payload, message_type='event'):
+    """Encode one event-stream frame (CRCs are not checked by the decoder)."""
+    name = b':message-type'
+    value = message_type.encode('utf-8')
+    headers = bytes([len(name)]) + name + bytes([7]) + struct.pack('>H', len(value)) + value
+    total = 12 + len(headers) + len(payload) + 4
+    return struct.pack('>III', total, len(headers), 0) + headers + payload + b'\0\0\0\0'
+
+
+def test_yields_each_frame_before_reading_further():
+    def chunks():
+        yield frame(b'first')
+        raise AssertionError('read past a complete frame')
+
+    assert next(iter_event_stream(chunks())) == b'first'
+
+
+def test_reassembles_frames_split_across_chunks():
+    data = frame(b'one') + frame(b'two')
+    pieces = [data[i:i + 7] for i in range(0, len(data), 7)]
+    assert list(iter_event_stream(pieces)) == [b'one', b'two']
+
+
+def test_exception_frames_raise():
+    with pytest.raises(RuntimeError, match='boom'):
+        list(iter_event_stream([frame(b'boom', message_type='exception')]))
+
+
+def test_arriving_chunks_prefers_read1():
+    class Response:
+        def __init__(self):
+            self.pending = [b'ab', b'c']
+
+        def read1(self, amt):
+            return self.pending.pop(0) if self.pending else b''
+
+        def read(self, amt):
+            raise AssertionError('read blocks until amt bytes arrive')
+
+    assert list(_arriving_chunks(Response())) == [b'ab', b'c']
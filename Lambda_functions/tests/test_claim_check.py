@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import claim_check
+from claim_check import REF_KEY, is_reference, materialize, offload, resolve
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    claim_check.payload_cache.entries.clear()
+    claim_check.payload_cache.total_bytes = 0
+    claim_check.stored_keys.clear()
+
+
+def large_result():
+    return {
+        'agent': 'LogsAgent',
+        'confidence': 0.9,
+        'findings': {'events': [{'service': 'checkout', 'message': 'x' * 100, 'n': i} for i in range(200)]},
+        'summary': {'critical': 120}
+    }
+
+
+def test_small_results_are_left_inline(s3):
+    result = {'agent': 'LogsAgent', 'findings': {'n': 1}}
+    assert offload(result, threshold=1024) is result
+    assert s3.calls == 0
+
+
+def test_offloads_largest_field_and_resolves_it_back(s3):
+    result = large_result()
+    offloaded = offload(result, threshold=4096)
+
+    assert is_reference(offloaded['findings'])
+    assert offloaded['summary'] == {'critical': 120}
+    assert len(json.dumps(offloaded)) < 4096
+    assert offloaded['findings'][REF_KEY]['key'] in {key for _, key in s3.objects}
+
+    claim_check.payload_cache.entries.clear()
+    claim_check.payload_cache.total_bytes = 0
+    assert resolve(offloaded) == result
+
+
+def test_reoffloading_a_passed_through_payload_makes_no_s3_calls(s3):
+    offloaded = offload(large_result(), threshold=4096)
+    claim_check.payload_cache.entries.clear()
+    claim_check.payload_cache.total_bytes = 0
+    event = resolve({'agent_outputs': [offloaded]})
+    calls = s3.calls
+    again = offload(event['agent_outputs'][0], threshold=4096)
+    assert again['findings'] == offloaded['findings']
+    assert s3.calls == calls
+
+
+def test_field_is_kept_when_its_reference_would_not_be_smaller(s3, monkeypatch):
+    monkeypatch.setattr(claim_check, 'MIN_FIELD_BYTES', 0)
+    result = {'tiny': {'a': 1}, 'padding': 'x' * 200}
+    assert offload(result, threshold=50) == result
+    assert s3.calls == 0
+
+
+def test_materialize_resolves_nested_references(s3):
+    inner = offload({'findings': {'data': 'y' * 8000}}, threshold=1024)
+    outer = {'agent_outputs': [[{'result': inner}]]}
+    assert materialize(outer)['agent_outputs'][0][0]['result']['findings']['data'] == 'y' * 8000
+
+
+def test_claim_checked_handler_sees_plain_values(s3):
+    seen = {}
+
+    @claim_check.claim_checked
+    def handler(event, context):
+        seen.update(event)
+        return {'echo': event['findings']}
+
+    offloaded = offload(large_result(), threshold=4096)
+    handler(offloaded, None)
+    assert seen['findings'] == large_result()['findings']
@@ -0,0 +1,122 @@
+import evidence_board
+from evidence_board import EvidenceBoard, board_ref, collect_and_synthesize, gate, publishes_evidence
+
+
+def logs_findings(deployment='deploy_1', confidence=0.9):
+    return {'agent': 'LogsAgent', 'confidence': confidence,
+            'findings': {'deployment_correlation': {'percentage': 80, 'deployment_id': deployment}}}
+
+
+def deploy_findings(deployment='deploy_1', confidence=0.9):
+    return {'agent': 'DeployAgent', 'confidence': confidence,
+            'findings': {'correlation': {'deployment_id': deployment}}}
+
+
+def metrics_findings(confidence=0.7):
+    return {'agent': 'MetricsAgent', 'confidence': confidence, 'findings': {}}
+
+
+def evidence(*findings):
+    return {f['agent']: f for f in findings}
+
+
+def recording_synthesize(calls):
+    def synthesize(outputs):
+        calls.append(sorted(o['agent'] for o in outputs))
+        return {'root_cause': f"deploy_1 ({len(outputs)} agents)", 'confidence': 0.9}
+    return synthesize
+
+
+def test_gate_needs_enough_confident_agents():
+    met, reason = gate(evidence(logs_findings(), deploy_findings(confidence=0.5)), min_agents=2, min_confidence=0.8)
+    assert not met
+    assert reason.startswith('1/2 agents')
+
+
+def test_gate_ignores_agents_that_errored():
+    errored = {**deploy_findings(), 'error': 'timeout'}
+    met, _ = gate(evidence(logs_findings(), errored), min_agents=2, min_confidence=0.8)
+    assert not met
+
+
+def test_gate_requires_agreement_on_one_deployment():
+    met, reason = gate(evidence(logs_findings('deploy_1'), deploy_findings('deploy_2')),
+                       min_agents=2, min_confidence=0.8, require_agreement=True)
+    assert not met
+    assert reason.startswith('no agreement')
+
+    met, reason = gate(evidence(logs_findings(), deploy_findings()), min_agents=2, min_confidence=0.8, require_agreement=True)
+    assert met
+    assert reason == 'DeployAgent and LogsAgent agree on deploy_1'
+
+
+def test_gate_without_agreement_counts_confident_agents():
+    met, _ = gate(evidence(logs_findings('deploy_1'), deploy_findings('deploy_2')),
+                  min_agents=2, min_confidence=0.8, require_agreement=False)
+    assert met
+
+
+def test_collect_returns_only_new_findings(s3):
+    board = EvidenceBoard('inv-1', bucket='bucket', s3=s3)
+    board.publish(logs_findings())
+    assert list(board.collect()) == ['LogsAgent']
+    board.publish(deploy_findings())
+    assert list(board.collect()) == ['DeployAgent']
+    assert board.collect() == {}
+
+
+def test_preliminary_rca_runs_before_the_last_agent_and_is_refined(s3, monkeypatch):
+    board = EvidenceBoard('inv-1', bucket='bucket', s3=s3)
+    board.publish(logs_findings())
+    board.publish(deploy_findings())
+    pending = [metrics_findings()]
+    # The slow agent publishes while the Commander waits
+    monkeypatch.setattr(evidence_board.time, 'sleep', lambda seconds: pending and board.publish(pending.pop()))
+    calls = []
+
+    result = collect_and_synthesize(board, recording_synthesize(calls), wait_seconds=60)
+
+    assert calls == [['DeployAgent', 'LogsAgent'], ['DeployAgent', 'LogsAgent', 'MetricsAgent']]
+    info = result['evidence_board']
+    assert info['preliminary']['agents'] == ['DeployAgent', 'LogsAgent']
+    assert info['refined'] is True
+    assert info['late_agents'] == ['MetricsAgent']
+    assert info['root_cause_changed'] is True
+    assert ('bucket', 'evidence/inv-1/commander/preliminary.json') in s3.objects
+    assert ('bucket', 'evidence/inv-1/commander/final.json') in s3.objects
+
+
+def test_gate_not_met_waits_for_every_agent(s3, monkeypatch):
+    board = EvidenceBoard('inv-1', bucket='bucket', s3=s3)
+    board.publish(logs_findings('deploy_1'))
+    board.publish(deploy_findings('deploy_2'))
+    pending = [metrics_findings()]
+    monkeypatch.setattr(evidence_board.time, 'sleep', lambda seconds: pending and board.publish(pending.pop()))
+    calls = []
+
+    result = collect_and_synthesize(board, recording_synthesize(calls), wait_seconds=60)
+
+    assert calls == [['DeployAgent', 'LogsAgent', 'MetricsAgent']]
+    assert result['evidence_board']['preliminary'] is None
+    assert result['evidence_board']['refined'] is False
+
+
+def test_deadline_synthesizes_with_the_agents_present(s3):
+    board = EvidenceBoard('inv-1', bucket='bucket', s3=s3)
+    board.publish(logs_findings('deploy_1'))
+    calls = []
+
+    result = collect_and_synthesize(board, recording_synthesize(calls), wait_seconds=0)
+
+    assert calls == [['LogsAgent']]
+    assert result['evidence_board']['missing_agents'] == ['MetricsAgent', 'DeployAgent']
+
+
+def test_publishes_evidence_only_with_a_board_reference(s3):
+    handler = publishes_evidence(lambda event, context: deploy_findings())
+
+    handler({}, None)
+    assert s3.objects == {}
+
+    handler({'evidence_board': board_ref('inv-1', bucket='bucket')}, None)
+    assert ('bucket', 'evidence/inv-1/agents/DeployAgent.json') in s3.objects
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+import agent_commander
+from agent_commander import BEDROCK_HEDGE_MODEL_ID, BEDROCK_MODEL_ID, call_llm_with_hedge
+
+
+class Context:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def test_hedge_answers_and_late_primary_fields_are_dropped(monkeypatch):
+    monkeypatch.setattr(agent_commander, 'BEDROCK_HEDGE_DELAY_SECONDS', 0.05)
+    primary_stopped = threading.Event()
+
+    def invoke_claude(prompt, model_id, on_field, cancelled, **kwargs):
+        if model_id == BEDROCK_MODEL_ID:
+            cancelled.wait(5)
+            on_field('root_cause', 'late primary answer')
+            primary_stopped.set()
+            return '{"root_cause": "late primary answer"}'
+        on_field('root_cause', 'hedge answer')
+        return '{"root_cause": "hedge answer"}'
+
+    monkeypatch.setattr(agent_commander, 'invoke_claude', invoke_claude)
+    fields = []
+    model_id, analysis = call_llm_with_hedge('prompt', None, on_field=lambda name, value: fields.append(value))
+
+    assert (model_id, analysis['root_cause']) == (BEDROCK_HEDGE_MODEL_ID, 'hedge answer')
+    assert primary_stopped.wait(5)
+    assert fields == ['hedge answer']
+
+
+def test_failed_primary_is_hedged_immediately(monkeypatch):
+    def invoke_claude(prompt, model_id, **kwargs):
+        if model_id == BEDROCK_MODEL_ID:
+            raise RuntimeError('throttled')
+        return '{"root_cause": "hedge answer"}'
+
+    monkeypatch.setattr(agent_commander, 'invoke_claude', invoke_claude)
+    started = time.time()
+    assert call_llm_with_hedge('prompt', None)[0] == BEDROCK_HEDGE_MODEL_ID
+    assert time.time() - started < agent_commander.BEDROCK_HEDGE_DELAY_SECONDS
+
+
+def test_deadline_is_the_lambda_remaining_time(monkeypatch):
+    monkeypatch.setattr(agent_commander, 'invoke_claude', lambda prompt, cancelled, **kwargs: cancelled.wait(5))
+    context = Context(agent_commander.DEADLINE_SAFETY_MARGIN_MS + 100)
+    with pytest.raises(TimeoutError):
+        call_llm_with_hedge('prompt', context)
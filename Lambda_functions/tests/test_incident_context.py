@@ -0,0 +1,81 @@
+import pytest
+
+import incident_context
+from incident_context import IncidentContext, load_context, parse_time_ms, save_context
+
+
+def make_records():
+    """Six quiet minutes, then four minutes of critical latency on checkout after deploy_1009."""
+    records = []
+    for minute in range(10):
+        spike = minute >= 6
+        for i in range(20 if spike else 10):
+            records.append({
+                'timestamp': f"2026-01-01T10:{minute:02d}:{i:02d}Z",
+                'service': 'checkout' if spike else ['checkout', 'search'][i % 2],
+                'endpoint': '/pay',
+                'error_type': 'ConnectionPoolExhausted' if spike else 'Timeout',
+                'deployment_id': 'deploy_1009' if spike else None,
+                'latency_ms': 3000 if spike else 120,
+                'retry_count': '2' if spike else 0,
+                'trace_id': f"t-{minute}-{i}"
+            })
+    # Out of order and unparseable rows
+    records.reverse()
+    records.append({'timestamp': 'not a time'})
+    return records
+
+
+@pytest.fixture
+def context():
+    return IncidentContext.from_records('ctx-1', make_records())
+
+
+def test_rows_are_time_sorted_and_typed(context):
+    assert len(context) == 140
+    assert list(context.ts) == sorted(context.ts)
+    assert context.time_window['start'].startswith('2026-01-01T10:00:00')
+    assert context.retries[-1] == 2
+
+
+def test_dimensions_are_dictionary_encoded(context):
+    assert sorted(context.dictionaries['service']) == ['checkout', 'search']
+    assert 'Unknown' in context.dictionaries['deployment_id']
+    assert context.counts('deployment_id') == {'deploy_1009': 80}
+    assert context.counts('service', rows=range(10)) == {'checkout': 5, 'search': 5}
+
+
+def test_views_are_memoized(context):
+    calls = []
+    assert context.view('v', lambda: calls.append(1) or 'x') == 'x'
+    assert context.view('v', lambda: calls.append(1) or 'y') == 'x'
+    assert calls == [1]
+
+
+def test_spike_start_is_first_jump_above_running_baseline(context):
+    assert context.spike_start_ms() == parse_time_ms('2026-01-01T10:06:00')
+    first, last = context.rows_between(context.spike_start_ms(), context.end_ms + 1)
+    assert (first, last) == (60, 140)
+    assert context.latency_percentile(first, last, 0.5) == 3000
+
+
+def test_quiet_context_spikes_at_its_start():
+    quiet = IncidentContext.from_records('quiet', [
+        {'timestamp': f"2026-01-01T10:{m:02d}:00", 'latency_ms': 5000} for m in range(5)
+    ])
+    assert quiet.spike_start_ms() == quiet.start_ms
+
+
+def test_bytes_round_trip(context):
+    restored = IncidentContext.from_bytes(context.to_bytes())
+    assert list(restored.ts) == list(context.ts)
+    assert restored.records(range(3)) == context.records(range(3))
+    assert restored.summary() == context.summary()
+
+
+def test_save_and_load_through_s3(s3, context):
+    ref = save_context(context, bucket='ctx-bucket')
+    incident_context.context_cache.entries.clear()
+    loaded = load_context({'context_id': 'ctx-1', 'context_ref': ref})
+    assert loaded.summary() == context.summary()
+    assert load_context({}) is None
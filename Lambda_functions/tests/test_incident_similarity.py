@@ -0,0 +1,52 @@
+import math
+
+from agent_commander import can_skip_llm
+from incident_similarity import SimilarityIndex, change_keywords, incident_features
+
+
+def features(error_type='ConnectionPoolExhaustedException', service='checkout',
+             change='Reduced connection pool size from 50 to 10', p99=4000):
+    logs = {'findings': {'error_distribution': {error_type: 100}, 'affected_services': {service: 100}}}
+    metrics = {'severity': 'CRITICAL', 'findings': {'incident': {'p99_latency_ms': p99},
+                                                    'degradation': {'latency_multiplier': '8.0x'}}}
+    deploy = {'findings': {'target_deployment': {'changes': [change]}}}
+    return incident_features(logs, metrics, deploy)
+
+
+def test_vectors_are_unit_length_and_skip_stopwords():
+    vector = features()
+    assert math.isclose(sum(v * v for v in vector.values()), 1.0, abs_tol=1e-3)
+    assert change_keywords(['Reduced connection pool size']) == {'connection', 'pool', 'size'}
+
+
+def test_nearest_ranks_by_shared_features():
+    index = SimilarityIndex()
+    index.add(features(), {'incident_id': 'same'})
+    index.add(features(change='Raised cache TTL'), {'incident_id': 'other-change'})
+    index.add(features(error_type='DiskFull', service='search', change='Rotated logs', p99=50),
+              {'incident_id': 'unrelated'})
+
+    matches = index.nearest(features(), k=2)
+    assert [record['incident_id'] for _, record in matches] == ['same', 'other-change']
+    assert matches[0][0] >= 0.99 > matches[1][0]
+    assert index.nearest(features(), min_similarity=0.999)[0][1]['incident_id'] == 'same'
+
+
+def test_index_from_entries_keeps_newest_entry_per_content():
+    entries = [
+        {'incident_id': 'old', 'content_hash': 'h1', 'features': features()},
+        {'incident_id': 'no-features', 'content_hash': 'h2'},
+        {'incident_id': 'new', 'content_hash': 'h1', 'features': features()},
+    ]
+    index = SimilarityIndex.from_entries(entries)
+    assert len(index) == 1
+    assert index.records[0]['incident_id'] == 'new' and 'features' not in index.records[0]
+
+
+def test_only_trusted_near_duplicates_skip_the_llm():
+    prior = {'similarity': 0.99, 'confidence': 0.9, 'synthesis': 'llm'}
+    assert can_skip_llm(prior)
+    assert not can_skip_llm({**prior, 'synthesis': 'rule-based'})
+    assert can_skip_llm({**prior, 'synthesis': 'rule-based', 'verified': True})
+    assert not can_skip_llm({**prior, 'similarity': 0.9})
+    assert not can_skip_llm({**prior, 'confidence': 0.5})
@@ -0,0 +1,49 @@
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import instrumentation
+from instrumentation import current_span, record_aws_call, span
+
+
+@pytest.fixture
+def records():
+    captured = []
+    instrumentation.set_sink(captured.append)
+    yield captured
+    instrumentation.set_sink(print)
+
+
+def test_nested_spans_both_count_aws_calls(records):
+    with span('handler'):
+        with span('llm_call'):
+            record_aws_call('bedrock-runtime.InvokeModel', 5.0)
+        assert current_span().stage == 'handler'
+    llm_call, handler = (json.loads(r) for r in records)
+    assert llm_call['aws_calls'] == handler['aws_calls'] == {'bedrock-runtime.InvokeModel': {'count': 1, 'ms': 5.0}}
+    assert current_span() is instrumentation.NULL_SPAN
+
+
+def test_worker_in_copied_context_is_attributed_to_callers_span(records):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with span('llm_call'):
+            futures = [executor.submit(contextvars.copy_context().run, record_aws_call, 'bedrock-runtime.InvokeModel', 1.0)
+                       for _ in range(2)]
+            for future in futures:
+                future.result()
+        executor.submit(record_aws_call, 'bedrock-runtime.InvokeModel', 1.0).result()
+    (llm_call,) = (json.loads(r) for r in records)
+    assert llm_call['aws_calls']['bedrock-runtime.InvokeModel']['count'] == 2
+
+
+def test_instrumented_handler_keeps_the_handler_identity(records):
+    def lambda_handler(event, context):
+        """Docstring."""
+        return event
+
+    wrapped = instrumentation.instrumented_handler('stage')(lambda_handler)
+    assert (wrapped.__name__, wrapped.__doc__, wrapped.__wrapped__) == ('lambda_handler', 'Docstring.', lambda_handler)
+    assert wrapped({'x': 1}, None) == {'x': 1}
+    assert json.loads(records[0])['Stage'] == 'stage'
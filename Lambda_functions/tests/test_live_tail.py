@@ -0,0 +1,85 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+import lambda_live_tail as live_tail
+from lambda_live_tail import MINUTE_MS, SlidingWindow, log_event_batches, subscription_event
+
+T0 = 1_767_225_600_000  # 2026-01-01T00:00:00Z
+
+
+@pytest.fixture(autouse=True)
+def fresh_windows():
+    live_tail.windows.clear()
+    live_tail.known_streams.clear()
+
+
+def critical_events(minute, count, service='checkout'):
+    return [{'timestamp': T0 + minute * MINUTE_MS + i,
+             'message': json.dumps({'service': service, 'latency_ms': 5000, 'error_type': 'Timeout'})}
+            for i in range(count)]
+
+
+def deliver(minute, count):
+    result = live_tail.lambda_handler(subscription_event('/app/checkout', 'stream', critical_events(minute, count)), None)
+    return json.loads(result['body'])['batches'][0]
+
+
+def test_late_events_outside_the_window_are_dropped():
+    window = SlidingWindow(minutes=5)
+    window.add({'latency_ms': 5000}, T0 + 10 * MINUTE_MS)
+    window.add({'latency_ms': 5000}, T0 + 5 * MINUTE_MS)
+    window.add({'latency_ms': 5000}, T0 + 6 * MINUTE_MS)
+    assert window.late_events == 1
+    assert sorted(window.buckets) == [(T0 // MINUTE_MS) + 6, (T0 // MINUTE_MS) + 10]
+
+
+def test_eviction_keeps_only_the_window():
+    window = SlidingWindow(minutes=5)
+    for minute in range(12):
+        window.add({'latency_ms': 5000}, T0 + minute * MINUTE_MS)
+    window.evict()
+    assert window.summary()['critical_events'] == 5
+
+
+def test_threshold_triggers_once_per_cooldown(stepfunctions):
+    assert not deliver(0, live_tail.TRIGGER_THRESHOLD)['trigger_investigation']
+    assert deliver(1, 10)['trigger_investigation']
+    # Still over the threshold, but within the cooldown
+    assert not deliver(2, 60)['trigger_investigation']
+    assert not deliver(live_tail.COOLDOWN_MINUTES, 60)['trigger_investigation']
+    assert deliver(live_tail.COOLDOWN_MINUTES + 1, 60)['trigger_investigation']
+    assert len(stepfunctions.executions) == 2
+    started = stepfunctions.executions[0]['input']
+    assert started['trigger'] == 'live_tail' and started['ingestion_summary']['critical_services'] == {'checkout': 60}
+
+
+def test_window_is_restored_from_the_checkpoint(s3, stepfunctions, monkeypatch):
+    monkeypatch.setattr(live_tail, 'STATE_BUCKET', 'state-bucket')
+    deliver(0, 30)
+    live_tail.windows.clear()  # cold start
+    assert deliver(1, 30)['critical_in_window'] == 60
+
+
+def kinesis_record(shard, rows):
+    data = gzip.compress('\n'.join(json.dumps(row) for row in rows).encode('utf-8'))
+    return {'eventID': f"{shard}:seq", 'kinesis': {'data': base64.b64encode(data).decode('ascii'),
+                                                   'approximateArrivalTimestamp': T0 / 1000}}
+
+
+def test_kinesis_rows_are_grouped_per_shard_and_forwarded(logs, stepfunctions):
+    rows = [{'timestamp': '2026-01-01T00:00:01', 'service': 'cart', 'latency_ms': 100}] * 10
+    event = {'Records': [kinesis_record('shard-1', rows), kinesis_record('shard-1', rows),
+                         kinesis_record('shard-2', rows)]}
+    batches = json.loads(live_tail.lambda_handler(event, None)['body'])['batches']
+    assert [(b['source'], b['events']) for b in batches] == [('shard-1', 20), ('shard-2', 10)]
+    assert len(logs.streams[(live_tail.LOG_GROUP_NAME, 'live-tail-shard-1')]) == 20
+
+
+def test_log_event_batches_respect_the_byte_limit(monkeypatch):
+    monkeypatch.setattr(live_tail, 'PUT_LOG_EVENTS_MAX_BYTES', 1000)
+    events = [{'timestamp': i, 'message': 'x' * 174} for i in range(12)]
+    batches = list(log_event_batches(events))
+    assert [len(b) for b in batches] == [5, 5, 2]
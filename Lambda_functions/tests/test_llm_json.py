@@ -0,0 +1,37 @@
+import pytest
+
+from llm_json import IncrementalJSONParser, parse_llm_json
+
+
+def test_parses_object_inside_code_fence_and_prose():
+    text = 'Here is the analysis:\n```json\n{"root_cause": "pool", "confidence": 0.9}\n```\nDone.'
+    assert parse_llm_json(text) == {'root_cause': 'pool', 'confidence': 0.9}
+
+
+def test_repairs_trailing_commas_and_python_literals():
+    text = '{"auto_remediate": True, "steps": [1, 2,], "owner": None,}'
+    assert parse_llm_json(text) == {'auto_remediate': True, 'steps': [1, 2], 'owner': None}
+
+
+def test_closes_truncated_response():
+    text = '{"root_cause": "pool exhausted", "remediation_steps": [{"action": "roll'
+    result = parse_llm_json(text)
+    assert result['root_cause'] == 'pool exhausted'
+    assert result['remediation_steps'][0]['action'] == 'roll'
+
+
+def test_raises_without_json_object():
+    with pytest.raises(ValueError):
+        parse_llm_json('no json here')
+
+
+def test_incremental_parser_reports_top_level_scalars_as_they_complete():
+    fields = []
+    parser = IncrementalJSONParser(on_field=lambda name, value: fields.append((name, value)))
+    text = '```json\n{"root_cause": "a \\"quoted\\" cause", "confidence": 0.85, "evidence_summary": {"logs": "x"}, "auto_remediate": false}'
+    for i in range(0, len(text), 7):
+        parser.feed(text[i:i + 7])
+        if len(fields) == 1:
+            assert fields == [('root_cause', 'a "quoted" cause')]
+    assert fields == [('root_cause', 'a "quoted" cause'), ('confidence', 0.85), ('auto_remediate', False)]
+    assert parser.result()['evidence_summary'] == {'logs': 'x'}
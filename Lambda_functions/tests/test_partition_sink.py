@@ -0,0 +1,80 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from partition_sink import COMPRESSOR_STATE_BYTES, MIN_PART_BYTES, PartitionedSink, partition_for
+
+
+def event(service='checkout', latency_ms=50, timestamp='2026-01-01T10:15:00Z', **extra):
+    return {'timestamp': timestamp, 'service': service, 'latency_ms': latency_ms, **extra}
+
+
+def add(sink, record):
+    sink.add(record, json.dumps(record).encode())
+
+
+def read_lines(s3, key):
+    return [json.loads(line) for line in gzip.decompress(s3.objects[('bucket', key)]['Body']).splitlines()]
+
+
+def test_partition_keys_use_category_service_and_hour():
+    assert partition_for(event('pay/ments', 3000)) == 'category=critical/service=pay_ments/date=2026-01-01/hour=10'
+    assert partition_for({'service': None}) == 'category=fast/service=unknown/date=unknown/hour=00'
+
+
+def test_close_writes_one_gzip_file_per_partition(s3):
+    sink = PartitionedSink(s3, 'bucket', 'run1', prefix='p/')
+    add(sink, event(latency_ms=50))
+    add(sink, event(latency_ms=250))
+    add(sink, event(latency_ms=60, message='second'))
+    summary = sink.close()
+
+    assert summary['files'] == 2
+    assert summary['events_by_category'] == {'fast': 2, 'medium': 1}
+    key = 'p/category=fast/service=checkout/date=2026-01-01/hour=10/part-run1-00000.jsonl.gz'
+    assert [line['latency_ms'] for line in read_lines(s3, key)] == [50, 60]
+
+
+def test_large_partition_goes_out_as_multipart(s3):
+    sink = PartitionedSink(s3, 'bucket', 'run1', prefix='p/')
+    # Random hex compresses about 2:1, so the compressed buffer crosses the part minimum
+    for _ in range(MIN_PART_BYTES // 2000 + 200):
+        add(sink, event(payload=os.urandom(2000).hex()))
+    summary = sink.close()
+
+    assert sink.written[0]['multipart_parts'] == 2
+    assert len(read_lines(s3, sink.written[0]['key'])) == summary['events']
+    assert s3.uploads == {}
+
+
+def test_failed_completion_aborts_the_multipart_upload(s3, monkeypatch):
+    sink = PartitionedSink(s3, 'bucket', 'run1', prefix='p/')
+    for _ in range(MIN_PART_BYTES // 2000 + 200):
+        add(sink, event(payload=os.urandom(2000).hex()))
+    assert len(s3.uploads) == 1
+
+    def fail(**kwargs):
+        raise RuntimeError('complete failed')
+    monkeypatch.setattr(s3, 'complete_multipart_upload', fail)
+
+    with pytest.raises(RuntimeError):
+        sink.close()
+    assert s3.uploads == {}
+    assert sink.open_files == {}
+
+
+def test_open_compressors_count_toward_the_memory_bound(s3):
+    sink = PartitionedSink(s3, 'bucket', 'run1', prefix='p/', buffer_max_bytes=3 * COMPRESSOR_STATE_BYTES + 1024)
+    for i in range(10):
+        add(sink, event(f'svc{i}'))
+        assert len(sink.open_files) <= 3
+        assert sink.memory_bytes() <= sink.buffer_max_bytes
+    # Writing svc8 again makes svc7 the least recently written, so svc7 closes for svc10
+    add(sink, event('svc8'))
+    add(sink, event('svc10'))
+    assert [p.split('/')[1] for p in sink.open_files] == ['service=svc9', 'service=svc8', 'service=svc10']
+
+    summary = sink.close()
+    assert summary['events'] == 12
@@ -0,0 +1,48 @@
+import json
+
+from prompt_compaction import MAX_LIST_ITEMS, compact_evidence, estimate_tokens, minify
+
+
+def findings(**values):
+    return {'agent': 'LogsAgent', 'findings': values}
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('abcde') == 2
+
+
+def test_minify_is_compact():
+    assert minify({'a': [1, 2]}) == '{"a":[1,2]}'
+
+
+def test_drops_empty_and_redundant_keys_and_truncates_lists():
+    evidence = compact_evidence({
+        'logs': findings(top_error={'type': 'Timeout', 'count': 3, 'period': '1h'}, empty=[],
+                         affected_services=[f"svc-{i}" for i in range(20)])
+    }, token_budget=1000)
+    logs = json.loads(evidence['logs'])
+    assert logs['top_error'] == {'type': 'Timeout', 'count': 3}
+    assert 'empty' not in logs
+    assert len(logs['affected_services']) == MAX_LIST_ITEMS + 1
+    assert logs['affected_services'][-1] == f"...(+{20 - MAX_LIST_ITEMS} more)"
+
+
+def test_keeps_most_relevant_keys_within_budget():
+    evidence = compact_evidence({
+        'logs': findings(recent_deployments=['x' * 200] * 5, top_error={'type': 'ConnectionPoolExhausted'}),
+        'deploy': findings(correlation={'deployment_id': 'deploy_1009'})
+    }, token_budget=40)
+    assert 'ConnectionPoolExhausted' in evidence['logs']
+    assert 'deploy_1009' in evidence['deploy']
+    assert evidence['stats']['omitted'] == ['logs.recent_deployments']
+    assert evidence['stats']['evidence_tokens'] <= 40
+
+
+def test_skips_list_items_repeated_verbatim():
+    target = {'deployment_id': 'deploy_1009', 'service': 'checkout'}
+    evidence = compact_evidence({
+        'deploy': findings(target_deployment=target, recent_deployments=[target, {'deployment_id': 'deploy_1008'}])
+    }, token_budget=1000)
+    deploy = json.loads(evidence['deploy'])
+    assert deploy['recent_deployments'] == [{'deployment_id': 'deploy_1008'}]
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import query_cache
+from query_cache import cached_query, normalize_query
+from response_cache import FileTier, MemoryTier, TwoTierCache
+
+T0 = 1_767_225_600  # 2026-01-01T00:00:00Z, epoch seconds
+GROUP = '/app/checkout'
+QUERY = 'fields @timestamp, service, latency_ms | filter latency_ms >= 2000'
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_cache, 'query_cache',
+                        TwoTierCache(MemoryTier(max_entries=16, max_bytes=1 << 20), FileTier(str(tmp_path)), ttl_seconds=900))
+    monkeypatch.setattr(query_cache.time, 'sleep', lambda seconds: None)
+
+
+@pytest.fixture
+def incident_logs(logs):
+    logs.put_log_events(GROUP, 'stream', [
+        {'timestamp': (T0 + minute * 60) * 1000, 'message': json.dumps({'service': 'checkout', 'latency_ms': 5000})}
+        for minute in range(10)
+    ])
+    return logs
+
+
+def starts(logs):
+    return len(logs.queries)
+
+
+def test_layout_only_differences_normalize_alike():
+    assert normalize_query('fields a ,b\n  | filter x') == normalize_query('fields a, b | filter   x')
+
+
+def test_repeated_window_is_served_from_the_cache(incident_logs):
+    rows, source = cached_query(GROUP, QUERY, T0, T0 + 600)
+    assert (len(rows), source) == (10, 'query')
+
+    again, source = cached_query(GROUP, '  fields @timestamp,service, latency_ms|filter latency_ms >= 2000', T0, T0 + 600)
+    assert (again, source) == (rows, 'exact')
+    assert starts(incident_logs) == 1
+
+
+def test_narrower_window_is_filtered_from_a_wider_one(incident_logs):
+    cached_query(GROUP, QUERY, T0, T0 + 600)
+    rows, source = cached_query(GROUP, QUERY, T0 + 120, T0 + 240)
+    assert (len(rows), source) == (3, 'subwindow')
+    assert starts(incident_logs) == 1
+
+
+def test_aggregating_queries_are_not_filtered_to_subwindows(incident_logs):
+    query = 'fields @timestamp, service | stats count(*) by service'
+    cached_query(GROUP, query, T0, T0 + 600)
+    _, source = cached_query(GROUP, query, T0 + 120, T0 + 240)
+    assert source == 'query'
+    assert starts(incident_logs) == 2
+
+
+@pytest.mark.parametrize('status', ['Running', 'Failed', 'Cancelled', 'Timeout'])
+def test_query_that_never_completes_is_not_cached(incident_logs, status):
+    polls = []
+
+    def never_complete(queryId):
+        polls.append(queryId)
+        return {'status': status, 'results': incident_logs.queries[queryId][:2]}
+    incident_logs.get_query_results = never_complete
+
+    rows, source = cached_query(GROUP, QUERY, T0, T0 + 600)
+    assert (len(rows), source) == (2, 'incomplete')
+    # Terminal statuses stop polling; a query still running is given up after the last poll
+    assert len(polls) == (query_cache.POLL_MAX_ATTEMPTS if status == 'Running' else 1)
+
+    del incident_logs.get_query_results
+    rows, source = cached_query(GROUP, QUERY, T0, T0 + 600)
+    assert (len(rows), source) == (10, 'query')
+    assert starts(incident_logs) == 2
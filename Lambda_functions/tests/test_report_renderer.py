@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from report_renderer import FORMATS, build_report_model, render_model, render_report
+
+COMMANDER_OUTPUT = {
+    'root_cause': 'ConnectionPoolExhaustedException caused by deploy_1009',
+    'confidence': 0.92,
+    'auto_remediate': True,
+    'evidence_summary': {'logs': '120 pool errors', 'deploy': 'deploy_1009 4 minutes before'},
+    'reasoning': 'Pool size cut <50 -> 10>',
+    'remediation_steps': [{'priority': 2, 'action': 'Add alerting'}, {'priority': 1, 'action': 'ROLLBACK deploy_1009'}],
+    'agent_contributions': {
+        'logs': {'findings': {
+            'total_critical_errors': 150,
+            'top_error': {'type': 'ConnectionPoolExhaustedException', 'count': 120, 'percentage': 80.0},
+            'deployment_correlation': {'deployment_id': 'deploy_1009', 'percentage': 95.0},
+            'error_distribution': {'ConnectionPoolExhaustedException': 120, 'TimeoutException': 30}
+        }},
+        'deploy': {'recommended_action': 'ROLLBACK deploy_1009 to v39', 'findings': {}}
+    },
+    'synthesis': 'llm',
+    'model_id': 'anthropic.claude-3-5-sonnet'
+}
+
+
+def test_model_maps_commander_output():
+    model = build_report_model(COMMANDER_OUTPUT, generated_at='2026-01-01 00:00:00 UTC')
+    assert model['confidence_level'] == 'HIGH'
+    assert model['deployment_id'] == 'deploy_1009'
+    assert model['rollback_recommended'] is True
+    assert [s['action'] for s in model['remediation_steps']] == ['ROLLBACK deploy_1009', 'Add alerting']
+    assert model['model_label'] == 'anthropic.claude-3-5-sonnet'
+    assert model['synthesis'] == 'llm'
+
+
+def test_rule_based_reports_say_so():
+    model = build_report_model({**COMMANDER_OUTPUT, 'synthesis': 'rule-based'})
+    assert model['model_label'] == 'Rule-based synthesis (LLM unavailable)'
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_every_format_renders_the_root_cause(fmt):
+    report = render_report(COMMANDER_OUTPUT, fmt, generated_at='2026-01-01 00:00:00 UTC')
+    assert 'ConnectionPoolExhaustedException caused by deploy_1009' in report
+
+
+def test_plain_markdown_has_no_emoji_and_html_is_escaped():
+    model = build_report_model(COMMANDER_OUTPUT)
+    assert '🎯' in render_model(model, 'markdown')
+    assert '🎯' not in render_model(model, 'markdown-plain')
+    html = render_model(model, 'html')
+    assert '&lt;50 -&gt; 10&gt;' in html and '<50' not in html
+
+
+def test_json_report_is_valid_and_flattens_facts():
+    report = json.loads(render_report(COMMANDER_OUTPUT, 'json'))
+    logs = next(s for s in report['sections'] if s['key'] == 'logs')
+    assert logs['facts'][0]['value'] == '120 ConnectionPoolExhaustedException errors (80.0% of 150 critical errors)'
+    assert logs['tables'][0]['rows'][0] == ['ConnectionPoolExhaustedException', 120, '80.0%']
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        render_report(COMMANDER_OUTPUT, 'pdf')
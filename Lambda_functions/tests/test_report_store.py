@@ -0,0 +1,130 @@
+from report_store import ReportStore, content_hash, parse_index, segment_date
+
+BUCKET = 'reports-bucket'
+
+
+def model(root_cause='Pool exhausted by deploy_1009', **overrides):
+    return {
+        'generated_at': '2026-01-01 00:00:00 UTC',
+        'root_cause': root_cause,
+        'confidence': 0.9,
+        'deployment_id': 'deploy_1009',
+        'auto_remediate': True,
+        'synthesis': 'llm',
+        **overrides
+    }
+
+
+def test_content_hash_ignores_generation_time():
+    assert content_hash(model()) == content_hash(model(generated_at='later'))
+    assert content_hash(model()) != content_hash(model(root_cause='other'))
+
+
+def test_segment_date():
+    assert segment_date('rca_reports/index/date=2026-01-02/part-00000.jsonl.gz') == '2026-01-02'
+    assert segment_date('rca_reports/index/legacy.jsonl.gz') == ''
+
+
+def test_duplicate_report_is_not_uploaded_again_but_indexed(s3):
+    store = ReportStore(s3, BUCKET)
+    first = store.save(model(), {'markdown': '# RCA'}, 'inc-A', features={'error:Pool': 1.0})
+    second = store.save(model(), {'markdown': '# RCA'}, 'inc-B', features={'error:Timeout': 1.0})
+
+    assert not first['deduplicated'] and second['deduplicated']
+    assert second['keys'] == first['keys']
+    entries = store.entries()
+    assert [e['incident_id'] for e in entries] == ['inc-A', 'inc-B']
+    assert entries[1]['features'] == {'error:Timeout': 1.0}
+    assert entries[1]['synthesis'] == 'llm'
+    assert store.get_report(first['keys']['markdown']) == '# RCA'
+
+
+def test_new_format_for_known_content_is_uploaded(s3):
+    store = ReportStore(s3, BUCKET)
+    store.save(model(), {'markdown': '# RCA'}, 'inc-A')
+    result = store.save(model(), {'markdown': '# RCA', 'html': '<h1>RCA</h1>'}, 'inc-B')
+    assert not result['deduplicated']
+    assert store.get_report(result['keys']['html']) == '<h1>RCA</h1>'
+
+
+def test_index_rolls_over_to_new_segment_parts(s3):
+    store = ReportStore(s3, BUCKET, segment_max_bytes=300)
+    for i in range(6):
+        store.save(model(root_cause=f"cause {i}"), {'markdown': f"# {i}"}, f"inc-{i}")
+    segments = store.segments()
+    assert len(segments) > 1
+    assert all(size <= 300 for _, size in segments)
+    assert [e['incident_id'] for e in store.entries()] == [f"inc-{i}" for i in range(6)]
+
+
+def test_conflicting_index_append_is_retried_not_dropped(s3):
+    store = ReportStore(s3, BUCKET)
+    store.save(model(root_cause='first'), {'markdown': 'a'}, 'inc-1')
+    put_object = s3.put_object
+    raced = []
+
+    def racing_put_object(**kwargs):
+        # Another report lands on the same segment between our read and write
+        if '/index/' in kwargs['Key'] and not raced:
+            raced.append(kwargs['Key'])
+            store.save(model(root_cause='racer'), {'markdown': 'r'}, 'inc-race')
+        return put_object(**kwargs)
+
+    s3.put_object = racing_put_object
+    store.save(model(root_cause='second'), {'markdown': 'b'}, 'inc-2')
+    assert [e['incident_id'] for e in store.entries()] == ['inc-1', 'inc-race', 'inc-2']
+
+
+def test_query_filters_newest_first(s3):
+    store = ReportStore(s3, BUCKET)
+    store.save(model(confidence=0.5), {'markdown': 'a'}, 'inc-low')
+    store.save(model(root_cause='Disk full', deployment_id='deploy_2'), {'markdown': 'b'}, 'inc-disk')
+    store.save(model(root_cause='Pool again'), {'markdown': 'c'}, 'inc-pool')
+
+    assert [e['incident_id'] for e in store.query(min_confidence=0.8)] == ['inc-pool', 'inc-disk']
+    assert [e['incident_id'] for e in store.query(deployment_id='deploy_2')] == ['inc-disk']
+    assert [e['incident_id'] for e in store.query(text='pool', limit=1)] == ['inc-pool']
+    assert store.query(since='2999-01-01') == []
+
+
+def test_lookups_are_one_get_of_the_recent_snapshot(s3):
+    store = ReportStore(s3, BUCKET)
+    for i in range(3):
+        store.save(model(root_cause=f"cause {i}", deployment_id=f"deploy_{i}"), {'markdown': str(i)}, f"inc-{i}")
+    calls = s3.calls
+    assert [e['incident_id'] for e in store.query(deployment_id='deploy_1')] == ['inc-1']
+    assert [e['incident_id'] for e in store.recent()] == ['inc-0', 'inc-1', 'inc-2']
+    assert s3.calls == calls + 2
+
+
+def test_appends_list_only_their_own_day(s3):
+    store = ReportStore(s3, BUCKET)
+    store.save(model(), {'markdown': 'a'}, 'inc-A')
+    list_objects_v2 = s3.list_objects_v2
+    prefixes = []
+
+    def recording_list_objects_v2(**kwargs):
+        prefixes.append(kwargs['Prefix'])
+        return list_objects_v2(**kwargs)
+
+    s3.list_objects_v2 = recording_list_objects_v2
+    store.save(model(root_cause='other'), {'markdown': 'b'}, 'inc-B')
+    assert prefixes and all(segment_date(prefix) for prefix in prefixes)
+
+
+def test_snapshot_is_bounded_and_older_matches_come_from_the_segments(s3):
+    store = ReportStore(s3, BUCKET, recent_max_entries=2)
+    for i in range(4):
+        store.save(model(root_cause=f"cause {i}"), {'markdown': str(i)}, f"inc-{i}")
+    assert [e['incident_id'] for e in store.recent()] == ['inc-2', 'inc-3']
+    assert [e['incident_id'] for e in store.query(text='cause 0')] == ['inc-0']
+    assert [e['incident_id'] for e in store.query(limit=1)] == ['inc-3']
+
+
+def test_index_without_a_snapshot_is_read_from_and_seeds_the_segments(s3):
+    store = ReportStore(s3, BUCKET)
+    store.save(model(root_cause='old'), {'markdown': 'a'}, 'inc-old')
+    del s3.objects[(BUCKET, store.recent_key)]
+    assert [e['incident_id'] for e in store.recent()] == ['inc-old']
+    store.save(model(root_cause='new'), {'markdown': 'b'}, 'inc-new')
+    assert [e['incident_id'] for e in parse_index(store._read(store.recent_key)[0])] == ['inc-old', 'inc-new']
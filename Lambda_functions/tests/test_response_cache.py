@@ -0,0 +1,82 @@
+from response_cache import FileTier, MemoryTier, S3Tier, TwoTierCache, llm_cache_key
+
+
+def test_memory_tier_evicts_least_recently_used():
+    tier = MemoryTier(max_entries=2)
+    tier.put('a', 1, 60, 1)
+    tier.put('b', 2, 60, 1)
+    tier.get('a')
+    tier.put('c', 3, 60, 1)
+    assert tier.get('a') == 1 and tier.get('b') is None and tier.get('c') == 3
+    assert tier.evictions == 1
+
+
+def test_memory_tier_bounds_bytes_and_expires():
+    tier = MemoryTier(max_entries=10, max_bytes=10)
+    tier.put('big', 'x', 60, 11)
+    assert tier.get('big') is None
+    tier.put('old', 'x', -1, 1)
+    assert tier.get('old') is None
+    assert tier.total_bytes == 0
+
+
+def test_file_tier_round_trip_and_expiry(tmp_path):
+    tier = FileTier(str(tmp_path))
+    tier.put('k', {'root_cause': 'pool'}, 60, 0)
+    assert tier.get('k') == {'root_cause': 'pool'}
+    tier.put('stale', {'x': 1}, -1, 0)
+    assert tier.get('stale') is None
+    assert not (tmp_path / 'stale.json').exists()
+
+
+def test_s3_tier_honours_expiry_metadata(s3):
+    tier = S3Tier(s3, 'cache-bucket')
+    tier.put('k', {'v': 1}, 60, 0)
+    assert tier.get('k') == {'v': 1}
+    tier.put('k', {'v': 1}, -1, 0)
+    assert tier.get('k') is None
+    assert tier.get('missing') is None
+
+
+def test_s3_tier_errors_other_than_missing_key_are_counted(s3):
+    class Throttled(Exception):
+        response = {'Error': {'Code': 'SlowDown'}}
+
+    def get_object(**kwargs):
+        raise Throttled()
+
+    s3.get_object = get_object
+    cache = TwoTierCache(MemoryTier(), S3Tier(s3, 'cache-bucket'))
+    assert cache.get('k') is None
+    assert cache.stats()['errors'] == 1
+
+
+def test_two_tier_promotes_persistent_hits_and_counts(tmp_path):
+    persistent = FileTier(str(tmp_path))
+    TwoTierCache(MemoryTier(), persistent).put('k', {'v': 1})
+    cache = TwoTierCache(MemoryTier(), persistent)
+    assert cache.get('k') == {'v': 1}
+    assert cache.get('k') == {'v': 1}
+    assert cache.get('other') is None
+    stats = cache.stats()
+    assert (stats['persistent_hits'], stats['memory_hits'], stats['misses']) == (1, 1, 1)
+
+
+def test_two_tier_survives_persistent_errors():
+    class Broken:
+        def get(self, key):
+            raise OSError('down')
+
+        def put(self, key, value, ttl_seconds, size):
+            raise OSError('down')
+
+    cache = TwoTierCache(MemoryTier(), Broken())
+    cache.put('k', 1)
+    assert cache.get('k') == 1
+    assert cache.get('other') is None
+    assert cache.stats()['errors'] == 2
+
+
+def test_cache_key_ignores_whitespace_only_differences():
+    assert llm_cache_key('m', 'a  b\n c', 0.3) == llm_cache_key('m', 'a b c', 0.30001)
+    assert llm_cache_key('m', 'a b c', 0.3) != llm_cache_key('other', 'a b c', 0.3)
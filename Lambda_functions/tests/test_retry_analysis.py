@@ -0,0 +1,106 @@
+import random
+
+from incident_context import IncidentContext
+from retry_analysis import (
+    LATENCY_BINS, LATENCY_BINS_PER_OCTAVE, MINUTE_MS, RETRY_BINS, RetryHistograms, analyze_retries, bimodal_split,
+    latency_bin
+)
+
+
+def hist(**bins):
+    values = [0] * LATENCY_BINS
+    for index, count in bins.items():
+        values[int(index[1:])] = count
+    return values
+
+
+def test_latency_bins_are_log_scale():
+    assert latency_bin(0) == 0
+    assert latency_bin(2) == LATENCY_BINS_PER_OCTAVE
+    assert latency_bin(10 ** 9) == LATENCY_BINS - 1
+
+
+def test_unimodal_and_sparse_histograms_are_not_split():
+    assert bimodal_split(hist(b20=40, b21=60, b22=40)) is None
+    assert bimodal_split(hist(b20=10, b40=10)) is None
+
+
+def test_two_separated_modes_are_split():
+    modes = bimodal_split(hist(b19=10, b20=40, b21=10, b40=10, b41=40, b42=10))
+    assert 21 < modes['split_bin'] < 40
+    assert modes['slow_events'] == 60
+
+
+def test_plateau_mode_is_its_highest_raw_bin():
+    modes = bimodal_split(hist(b19=10, b20=40, b21=20, b22=10, b40=10, b41=40, b42=20, b43=10))
+    assert modes['fast_mode_ms'] == round(2 ** (20.5 / LATENCY_BINS_PER_OCTAVE))
+    assert modes['slow_mode_ms'] == round(2 ** (41.5 / LATENCY_BINS_PER_OCTAVE))
+
+
+def test_split_is_at_the_centre_of_the_valley():
+    modes = bimodal_split(hist(b20=50, b21=5, b22=1, b23=1, b24=1, b25=5, b26=50))
+    assert modes['split_bin'] == 24
+    assert modes['slow_events'] == 56
+
+    empty_valley = bimodal_split(hist(b20=60, b31=60))
+    assert empty_valley['split_bin'] == 26
+
+
+def minute_records(minute, service, count, latency, retries):
+    return [
+        {'timestamp': f"2026-01-01T10:{minute:02d}:{i % 60:02d}", 'service': service,
+         'latency_ms': latency if not callable(latency) else latency(i), 'retry_count': retries}
+        for i in range(count)
+    ]
+
+
+def test_detects_retry_storm_and_timeout_cluster():
+    records = []
+    for minute in range(10):
+        spike = minute >= 6
+        records += minute_records(minute, 'payment', 30 if spike else 10, 3000 if spike else 80, 3 if spike else 0)
+        records += minute_records(minute, 'checkout', 20, (lambda i: 3000 if i % 2 else 40) if spike else 40, 0)
+    findings = analyze_retries(IncidentContext.from_records('ctx', records))
+
+    storms = {storm['service']: storm for storm in findings['retry_storms']}
+    assert list(storms) == ['payment']
+    assert storms['payment']['attempts_per_request'] == 4.0
+    assert storms['payment']['started_at'].startswith('2026-01-01T10:06')
+
+    clusters = {cluster['service']: cluster for cluster in findings['timeout_clusters']}
+    assert clusters['checkout']['fast_mode_ms'] < 100 <= 2000 <= clusters['checkout']['slow_mode_ms']
+    assert clusters['checkout']['baseline_slow_share'] == 0.0
+    assert clusters['checkout']['incident_slow_share'] == 50.0
+    assert findings['retry_distribution']['incident']['3'] == 120
+
+
+def test_empty_context_has_no_findings():
+    findings = analyze_retries(IncidentContext.from_records('empty', []))
+    assert findings['retry_storms'] == [] and findings['timeout_clusters'] == []
+
+
+def test_bulk_counts_match_a_per_event_count():
+    rng = random.Random(7)
+    records = [
+        {'timestamp': f"2026-01-01T10:{rng.randrange(0, 30, 3):02d}:{rng.randrange(60):02d}",
+         'service': rng.choice(['a', 'b', 'c']), 'latency_ms': rng.choice([0, 5, 80, 3000, 10 ** 7]),
+         'retry_count': rng.choice([-1, 0, 2, 9])}
+        for _ in range(2000)
+    ]
+    context = IncidentContext.from_records('ctx', records)
+    histograms = RetryHistograms.from_context(context)
+
+    services, minutes = len(histograms.services), histograms.minutes
+    events, attempts = [0] * (services * minutes), [0] * (services * minutes)
+    retries, latency = [0] * (services * minutes * RETRY_BINS), [0] * (2 * services * LATENCY_BINS)
+    for ts, latency_ms, retry_count, service in zip(context.ts, context.latency, context.retries, context.codes['service']):
+        cell = service * minutes + (ts - histograms.origin_ms) // MINUTE_MS
+        events[cell] += 1
+        attempts[cell] += 1 + retry_count
+        retries[cell * RETRY_BINS + min(max(retry_count, 0), RETRY_BINS - 1)] += 1
+        latency[(ts >= histograms.split_ms) * services * LATENCY_BINS + service * LATENCY_BINS + latency_bin(latency_ms)] += 1
+
+    assert list(histograms.events) == events
+    assert list(histograms.attempts) == attempts
+    assert list(histograms.retries) == retries
+    assert list(histograms.latency) == latency
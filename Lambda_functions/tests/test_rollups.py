@@ -0,0 +1,107 @@
+import gzip
+import json
+
+import pytest
+
+import rollups
+from response_cache import MemoryTier
+from rollups import SKETCH_ACCURACY, Rollup, RollupStore, object_key, sketch_bucket, sketch_value
+
+
+@pytest.fixture(autouse=True)
+def fresh_object_cache(monkeypatch):
+    monkeypatch.setattr(rollups, 'object_cache', MemoryTier(max_entries=64, max_bytes=1 << 20))
+
+
+def rollup_of(*records):
+    rollup = Rollup()
+    for record in records:
+        rollup.add(record)
+    return rollup
+
+
+def event(minute, latency_ms=50, service='checkout', hour=10):
+    return {'timestamp': f'2026-01-01T{hour:02d}:{minute:02d}:30Z', 'service': service,
+            'endpoint': '/pay', 'region': 'us-east-1', 'latency_ms': latency_ms}
+
+
+def start_ms(hour=10, minute=0):
+    return rollups._time_ms(f'2026-01-01T{hour:02d}:{minute:02d}:00Z')
+
+
+def stored_document(s3, key):
+    return json.loads(gzip.decompress(s3.objects[('bucket', key)]['Body']))
+
+
+def test_sketch_values_are_within_the_accuracy():
+    for latency in (1.5, 37, 480, 2500, 91000):
+        assert abs(sketch_value(sketch_bucket(latency)) - latency) <= latency * SKETCH_ACCURACY
+
+
+def test_window_stats_combine_hour_and_minute_cells(s3):
+    store = RollupStore(bucket='bucket', s3=s3)
+    store.update(rollup_of(*[event(m, 3000 if m % 2 else 100) for m in range(60)],
+                           event(5, hour=11), event(50, hour=9)), 'run-1')
+
+    stats = store.window_stats(start_ms(9, 30), start_ms(11, 10))
+    assert stats['events'] == 62
+    assert stats['critical_events'] == 30
+    assert stats['p99_latency_ms'] == pytest.approx(3000, rel=SKETCH_ACCURACY)
+    # The whole 10:00 hour is one hour cell, the edges minute cells
+    assert stats['cells_read'] == 3
+
+    assert store.window_stats(start_ms(10, 0), start_ms(10, 10))['events'] == 10
+
+
+def test_dimensions_may_contain_the_old_separator(s3):
+    store = RollupStore(bucket='bucket', s3=s3)
+    store.update(rollup_of(event(1, service='pay|ments'), event(2, service='pay')), 'run-1')
+
+    assert store.window_stats(start_ms(), start_ms(11), service='pay|ments')['events'] == 1
+    assert store.window_stats(start_ms(), start_ms(11), service='pay')['events'] == 1
+
+
+def test_pipe_joined_cell_keys_are_still_read(s3):
+    key = object_key('minute', start_ms(), 'rollups/')
+    legacy = {'runs': ['old'], 'cells': {f'{start_ms(10, 3)}|checkout|/pay|us-east-1': [2, 1, 2100, {'100': 2}]}}
+    s3.put_object(Bucket='bucket', Key=key, Body=gzip.compress(json.dumps(legacy).encode()))
+
+    store = RollupStore(bucket='bucket', s3=s3)
+    assert store.window_stats(start_ms(10, 0), start_ms(10, 10), service='checkout')['events'] == 2
+
+
+def test_reprocessing_a_run_does_not_count_twice(s3):
+    store = RollupStore(bucket='bucket', s3=s3)
+    rollup = rollup_of(event(1), event(2))
+    assert store.update(rollup, 'run-1') == {'objects': 2, 'cells': 3, 'skipped': 0}
+    assert store.update(rollup, 'run-1') == {'objects': 0, 'cells': 0, 'skipped': 2}
+
+    hour_key = object_key('hour', start_ms(), 'rollups/')
+    assert stored_document(s3, hour_key)['runs'] == ['run-1']
+    assert sum(cell[0] for cell in stored_document(s3, hour_key)['cells'].values()) == 2
+
+
+def test_conflicting_writes_are_retried_and_merged(s3, monkeypatch):
+    store = RollupStore(bucket='bucket', s3=s3)
+    store.update(rollup_of(event(1)), 'run-0')
+
+    put_object = s3.put_object
+    raced, rejected = [], []
+
+    def racing_put(**kwargs):
+        # Another ingestion run writes the same object between our read and our write
+        if not raced:
+            raced.append(kwargs['Key'])
+            RollupStore(bucket='bucket', s3=s3).update(rollup_of(event(2)), 'run-other')
+        try:
+            return put_object(**kwargs)
+        except Exception as e:
+            rejected.append(rollups._error_code(e))
+            raise
+    monkeypatch.setattr(s3, 'put_object', racing_put)
+
+    assert store.update(rollup_of(event(3)), 'run-1') == {'objects': 2, 'cells': 2, 'skipped': 0}
+    assert rejected == ['PreconditionFailed']
+    document = stored_document(s3, raced[0])
+    assert document['runs'] == ['run-0', 'run-other', 'run-1']
+    assert sum(cell[0] for cell in document['cells'].values()) == 3
@@ -0,0 +1,57 @@
+from rule_synthesis import synthesize
+
+STRONG_DEPLOY = {
+    'agent': 'DeployAgent',
+    'confidence': 0.9,
+    'recommended_action': 'ROLLBACK deploy_1009 to v39',
+    'findings': {
+        'correlation': {'deployment_id': 'deploy_1009', 'config_version': 'v40',
+                        'time_before_incident_minutes': 4, 'correlation_strength': 'STRONG'},
+        'suspicious_changes': [
+            {'change': 'Enabled verbose logging', 'risk_level': 'MEDIUM'},
+            {'change': 'Reduced connection pool size from 50 to 10', 'risk_level': 'HIGH'}
+        ]
+    }
+}
+
+
+def logs(deployment_id):
+    return {
+        'agent': 'LogsAgent',
+        'confidence': 0.9,
+        'findings': {
+            'top_error': {'type': 'ConnectionPoolExhaustedException', 'count': 120},
+            'deployment_correlation': {'deployment_id': deployment_id, 'percentage': 95}
+        }
+    }
+
+
+METRICS = {'agent': 'MetricsAgent', 'confidence': 0.8, 'severity': 'CRITICAL',
+           'findings': {'degradation': {'error_rate_multiplier': '12x'}}}
+
+
+def test_agreeing_agents_name_the_deployment_and_roll_back_first():
+    result = synthesize(logs('deploy_1009'), METRICS, STRONG_DEPLOY)
+    assert result['root_cause'] == ('ConnectionPoolExhaustedException caused by deploy_1009 (v40): '
+                                    'Reduced connection pool size from 50 to 10')
+    assert result['confidence'] == 0.93
+    assert result['auto_remediate'] is True
+    assert result['remediation_steps'][0] == {'priority': 1, 'action': 'ROLLBACK deploy_1009 to v39',
+                                              'estimated_time': '5 minutes', 'risk': 'LOW'}
+    assert result['rules_fired'][0] == 'LogsAgent and DeployAgent both implicate deploy_1009'
+    assert result['synthesis'] == 'rule-based'
+
+
+def test_disagreeing_agents_lower_confidence_and_block_auto_remediation():
+    result = synthesize(logs('deploy_1008'), METRICS, STRONG_DEPLOY)
+    assert result['root_cause'] == 'ConnectionPoolExhaustedException caused by deploy_1008'
+    assert result['confidence'] == 0.63
+    assert result['auto_remediate'] is False
+    assert not result['remediation_steps'][0]['action'].startswith('ROLLBACK')
+
+
+def test_no_deployment_and_failed_agents():
+    result = synthesize({'agent': 'LogsAgent', 'error': 'timeout'}, {}, {})
+    assert result['root_cause'] == 'Elevated error rate with no deployment correlation identified'
+    assert result['confidence'] == 0.0
+    assert result['reasoning'].endswith('No correlating rules fired.')
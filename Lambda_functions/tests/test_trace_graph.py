@@ -0,0 +1,63 @@
+from trace_graph import TraceGrouper, analyze_traces, compact_span
+
+
+def span(trace_id, second, service, retries=0, error_type='Timeout', endpoint='/pay'):
+    return {
+        'trace_id': trace_id, 'span_id': f"{trace_id}-{service}", 'timestamp': f"2026-01-01T10:00:{second:02d}",
+        'service': service, 'endpoint': endpoint, 'latency_ms': 3000, 'retry_count': retries, 'error_type': error_type
+    }
+
+
+def events():
+    """Database failures propagating to payment, then checkout; one isolated search failure."""
+    result = []
+    for n in range(4):
+        trace = f"t{n}"
+        result += [
+            span(trace, 3, 'checkout'),
+            span(trace, 1, 'database', error_type='ConnectionPoolExhausted'),
+            span(trace, 2, 'payment', retries=2),
+        ]
+    result.append(span('t-search', 5, 'search', endpoint='/find'))
+    result.append({'service': 'no-trace'})
+    return result
+
+
+def test_compact_span_defaults():
+    assert compact_span({}) == ('', 'unknown', '', '', 0, 0, 'Unknown')
+
+
+def test_failure_graph_finds_origin_edges_and_amplification():
+    summary = analyze_traces(events())
+    assert summary['traces'] == 5 and summary['spans'] == 13
+    assert summary['origin_service'] == 'database'
+    assert summary['origin_error_type'] == 'ConnectionPoolExhausted'
+    assert summary['multi_service_traces'] == 4
+    assert summary['propagation_edges'] == [
+        {'from': 'database', 'to': 'payment', 'traces': 4},
+        {'from': 'payment', 'to': 'checkout', 'traces': 4},
+    ]
+    assert summary['blast_radius'] == {'services': ['checkout', 'database', 'payment'], 'endpoints': 1, 'traces': 4}
+    assert summary['retry_amplification']['by_service']['payment'] == 3.0
+    assert summary['spilled'] is False
+
+
+def test_spilling_to_disk_gives_the_same_summary():
+    in_memory = analyze_traces(events())
+    spilled = analyze_traces(events(), max_in_memory=2)
+    assert spilled.pop('spilled') is True
+    in_memory.pop('spilled')
+    assert spilled == in_memory
+
+
+def test_spill_directory_is_removed_after_grouping(tmp_path):
+    grouper = TraceGrouper(max_in_memory=1, partitions=4, spill_dir=str(tmp_path))
+    for event in events():
+        grouper.add(event)
+    assert grouper.spilled
+    assert sum(len(spans) for _, spans in grouper.groups()) == 13
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_no_traces():
+    assert analyze_traces([{'service': 'a'}]) == {'traces': 0, 'spans': 0, 'spilled': False}
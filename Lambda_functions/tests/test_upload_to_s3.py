@@ -0,0 +1,59 @@
+import gzip
+import io
+import os
+import sys
+
+from local_aws import LocalS3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from upload_to_s3 import MAX_PARTS, MB, GzipStream, expand_paths, transfer_config_for, upload_many  # noqa: E402
+
+BUCKET = 'logs-bucket'
+
+
+def test_gzip_stream_round_trips_in_small_reads():
+    data = b''.join(b'{"n": %d}\n' % i for i in range(5000))
+    stream = GzipStream(io.BytesIO(data))
+    compressed = b''.join(iter(lambda: stream.read(100), b''))
+    assert gzip.decompress(compressed) == data
+    assert (stream.bytes_in, stream.bytes_out) == (len(data), len(compressed))
+
+
+def test_transfer_config_stays_under_the_part_limit():
+    small = transfer_config_for(1 * MB)
+    assert small.multipart_chunksize == 8 * MB and not small.use_threads
+    huge = transfer_config_for(200_000 * MB)
+    assert -(-200_000 * MB // huge.multipart_chunksize) <= MAX_PARTS
+    assert huge.max_concurrency == 16
+
+
+def test_expand_paths_walks_directories_and_globs(tmp_path):
+    (tmp_path / 'day1').mkdir()
+    (tmp_path / 'day1' / 'a.log').write_text('a')
+    (tmp_path / 'b.log').write_text('b')
+    found = dict(expand_paths([str(tmp_path), str(tmp_path / '*.log')]))
+    assert sorted(found.values()) == ['b.log', 'day1/a.log']
+
+
+def test_upload_many_compresses_to_gz_keys_and_reports_failures(tmp_path):
+    (tmp_path / 'plain.log').write_text('{"level": "ERROR"}\n' * 100)
+    (tmp_path / 'packed.log.gz').write_bytes(gzip.compress(b'{"level": "ERROR"}\n'))
+    s3 = LocalS3()
+    files = list(expand_paths([str(tmp_path)])) + [(str(tmp_path / 'missing.log'), 'missing.log')]
+
+    results, failures, summary = upload_many(s3, files, BUCKET, prefix='backfill/', workers=2)
+
+    assert sorted(r['key'] for r in results) == ['backfill/packed.log.gz', 'backfill/plain.log.gz']
+    stored = s3.objects[(BUCKET, 'backfill/plain.log.gz')]
+    assert gzip.decompress(stored['Body']) == b'{"level": "ERROR"}\n' * 100
+    assert stored['ContentEncoding'] is None
+    assert [f['path'] for f in failures] == [str(tmp_path / 'missing.log')]
+    assert summary['files'] == 2 and summary['compression_ratio'] > 1
+
+
+def test_upload_without_gzip_keeps_the_key(tmp_path):
+    (tmp_path / 'errors.log').write_text('x')
+    s3 = LocalS3()
+    upload_many(s3, expand_paths([str(tmp_path / 'errors.log')]), BUCKET, compress=False)
+    assert s3.objects[(BUCKET, 'errors.log')]['Body'] == b'x'
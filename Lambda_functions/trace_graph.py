@@ -0,0 +1,211 @@
+"""
+Trace Graph Analysis
+Groups error events by trace_id in one streaming pass and reduces each trace
+to a failure chain across services, then aggregates those chains into a
+service-to-service failure graph, the upstream origin service and retry
+amplification.
+
+The logs carry no parent span IDs, so a trace's spans are ordered by time. A
+failing callee logs before the callers waiting on it, so a trace's first failing
+service is its origin, and each later service it reaches is a propagation edge
+(origin -> caller).
+
+Memory is bounded: past MAX_IN_MEMORY_SPANS buffered spans, the grouper spills
+to SPILL_PARTITIONS temp files by trace_id hash (a grace hash join's partition
+phase). It then reduces one partition at a time, so a trace is never split
+across partitions.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from collections import Counter, defaultdict
+
+# Environment variables
+MAX_IN_MEMORY_SPANS = int(os.environ.get('TRACE_MAX_IN_MEMORY_SPANS', '200000'))
+SPILL_PARTITIONS = int(os.environ.get('TRACE_SPILL_PARTITIONS', '64'))
+SPILL_DIR = os.environ.get('TRACE_SPILL_DIR', tempfile.gettempdir())
+
+TOP_EDGES = 10
+
+
+def _int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def compact_span(event):
+    """(timestamp, service, endpoint, span_id, latency_ms, retry_count, error_type) from a log event."""
+    return (
+        str(event.get('timestamp') or event.get('@timestamp') or ''),
+        event.get('service') or 'unknown',
+        event.get('endpoint') or '',
+        event.get('span_id') or '',
+        _int(event.get('latency_ms')),
+        _int(event.get('retry_count')),
+        event.get('error_type') or 'Unknown'
+    )
+
+
+class TraceGrouper:
+    """Groups spans by trace_id, spilling to disk partitions past a memory bound."""
+
+    def __init__(self, max_in_memory=MAX_IN_MEMORY_SPANS, partitions=SPILL_PARTITIONS, spill_dir=SPILL_DIR):
+        self.max_in_memory = max_in_memory
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.traces = defaultdict(list)
+        self.buffered = 0
+        self.spans = 0
+        self.directory = None
+        self.files = None
+
+    @property
+    def spilled(self):
+        return self.files is not None
+
+    def add(self, event):
+        trace_id = event.get('trace_id')
+        if not trace_id:
+            return
+        self.spans += 1
+        span = compact_span(event)
+        if self.spilled:
+            self._write(trace_id, span)
+            return
+        self.traces[trace_id].append(span)
+        self.buffered += 1
+        if self.buffered > self.max_in_memory:
+            self._spill()
+
+    def _spill(self):
+        self.directory = tempfile.mkdtemp(prefix='traces-', dir=self.spill_dir)
+        self.files = [
+            open(os.path.join(self.directory, f"part-{i:03d}.jsonl"), 'w', encoding='utf-8')
+            for i in range(self.partitions)
+        ]
+        for trace_id, spans in self.traces.items():
+            for span in spans:
+                self._write(trace_id, span)
+        self.traces = defaultdict(list)
+        self.buffered = 0
+
+    def _write(self, trace_id, span):
+        partition = zlib.crc32(trace_id.encode('utf-8')) % self.partitions
+        self.files[partition].write(json.dumps([trace_id, *span], separators=(',', ':')) + '\n')
+
+    def groups(self):
+        """Yield (trace_id, spans) for every trace, one spill partition in memory at a time."""
+        if not self.spilled:
+            yield from self.traces.items()
+            return
+        try:
+            for f in self.files:
+                f.close()
+            for f in self.files:
+                traces = defaultdict(list)
+                with open(f.name, 'r', encoding='utf-8') as partition:
+                    for line in partition:
+                        trace_id, *span = json.loads(line)
+                        traces[trace_id].append(tuple(span))
+                yield from traces.items()
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class FailureGraph:
+    """Aggregates per-trace failure chains."""
+
+    def __init__(self):
+        self.traces = 0
+        self.multi_service_traces = 0
+        self.origins = Counter()
+        self.origin_errors = defaultdict(Counter)
+        self.edges = Counter()
+        self.reached = defaultdict(set)  # origin service -> services its failures reached
+        self.endpoints = defaultdict(set)
+        self.attempts = Counter()  # service -> calls including retries
+        self.requests = Counter()  # service -> distinct (trace, service) failures
+        self.retried_requests = Counter()
+
+    def add_trace(self, spans):
+        spans = sorted(spans)
+        self.traces += 1
+        origin = spans[0]
+        self.origins[origin[1]] += 1
+        self.origin_errors[origin[1]][origin[6]] += 1
+
+        chain = []
+        max_retries = {}
+        span_counts = Counter()
+        for _, service, endpoint, _, _, retries, _ in spans:
+            if not chain or chain[-1] != service:
+                chain.append(service)
+            self.endpoints[origin[1]].add(endpoint)
+            max_retries[service] = max(max_retries.get(service, 0), retries)
+            span_counts[service] += 1
+        # A retried call logs either once per attempt or once with its retry_count
+        per_service = {service: max(span_counts[service], retries + 1) for service, retries in max_retries.items()}
+        for service, attempts in per_service.items():
+            self.attempts[service] += attempts
+            self.requests[service] += 1
+            if attempts > 1:
+                self.retried_requests[service] += 1
+
+        if len(per_service) > 1:
+            self.multi_service_traces += 1
+        for caller, callee in zip(chain, chain[1:]):
+            if caller != callee:
+                self.edges[(caller, callee)] += 1
+        self.reached[origin[1]].update(per_service)
+
+    def summary(self):
+        if not self.traces:
+            return {'traces': 0}
+        origin, origin_traces = self.origins.most_common(1)[0]
+        total_attempts = sum(self.attempts.values())
+        total_requests = sum(self.requests.values())
+        return {
+            'traces': self.traces,
+            'multi_service_traces': self.multi_service_traces,
+            'origin_service': origin,
+            'origin_share': round(origin_traces / self.traces * 100, 1),
+            'origin_error_type': self.origin_errors[origin].most_common(1)[0][0],
+            'origins': dict(self.origins.most_common(5)),
+            'propagation_edges': [
+                {'from': src, 'to': dst, 'traces': count}
+                for (src, dst), count in self.edges.most_common(TOP_EDGES)
+            ],
+            'blast_radius': {
+                'services': sorted(self.reached[origin]),
+                'endpoints': len(self.endpoints[origin] - {''}),
+                'traces': origin_traces
+            },
+            'retry_amplification': {
+                'overall': round(total_attempts / total_requests, 2) if total_requests else 1.0,
+                'by_service': {
+                    service: round(self.attempts[service] / self.requests[service], 2)
+                    for service, _ in self.attempts.most_common()
+                },
+                'retried_share': round(sum(self.retried_requests.values()) / total_requests * 100, 1)
+                if total_requests else 0.0
+            }
+        }
+
+
+def analyze_traces(events, max_in_memory=MAX_IN_MEMORY_SPANS):
+    """Failure-graph summary for an iterable of log events (dicts with trace_id/span_id/service...)."""
+    grouper = TraceGrouper(max_in_memory=max_in_memory)
+    for event in events:
+        grouper.add(event)
+    graph = FailureGraph()
+    for _, spans in grouper.groups():
+        graph.add_trace(spans)
+    result = graph.summary()
+    result['spans'] = grouper.spans
+    result['spilled'] = grouper.spilled
+    return result
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Cold-Start Benchmark
+
+Measures Lambda init cost per handler, each sample in a fresh interpreter:
+  - init_ms:    importing the handler module (what Lambda's init phase runs)
+  - clients_ms: resolving the module's lazy AWS clients (paid on first use)
+  - imports:    modules loaded by init, to spot heavy imports creeping back in
+
+Usage:
+  python scripts/benchmark_cold_start.py
+  python scripts/benchmark_cold_start.py --runs 20 --handlers agent_logs,agent_commander
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+LAMBDA_DIR = os.path.join(SCRIPTS_DIR, '..', 'Lambda_functions')
+
+HANDLERS = [
+    'lambda_process_logs',
+    'agent_logs',
+    'agent_metrics',
+    'agent_deploy',
+    'agent_commander',
+    'agent_commander_batch',
+    'lambda_generate_report',
+]
+
+# Runs inside the fresh interpreter; prints one JSON line
+PROBE = """
+import json, sys, time
+modules_before = set(sys.modules)
+started = time.perf_counter()
+module = __import__({handler!r})
+init_ms = (time.perf_counter() - started) * 1000
+
+imports = len(set(sys.modules) - modules_before)
+boto3_at_init = 'boto3' in sys.modules
+
+# Lazy clients held by the handler and the repo modules it imported
+from aws_clients import LazyClient
+lazy = [
+    value for name, loaded in list(sys.modules.items()) if name not in modules_before
+    for value in vars(loaded).values() if isinstance(value, LazyClient)
+]
+started = time.perf_counter()
+for client in lazy:
+    client.meta
+clients_ms = (time.perf_counter() - started) * 1000
+
+print(json.dumps({{
+    'init_ms': init_ms,
+    'clients_ms': clients_ms,
+    'clients': sorted({{client.service for client in lazy}}),
+    'boto3_at_init': boto3_at_init,
+    'imports': imports
+}}))
+"""
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def probe(handler):
+    env = {
+        **os.environ,
+        'AWS_DEFAULT_REGION': os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+        'AWS_ACCESS_KEY_ID': os.environ.get('AWS_ACCESS_KEY_ID', 'local'),
+        'AWS_SECRET_ACCESS_KEY': os.environ.get('AWS_SECRET_ACCESS_KEY', 'local'),
+        'LLM_CACHE_ENABLED': 'false',
+        'PYTHONDONTWRITEBYTECODE': '1',
+    }
+    output = subprocess.check_output(
+        [sys.executable, '-c', PROBE.format(handler=handler)], cwd=LAMBDA_DIR, env=env
+    )
+    # Handler modules may print during init; the probe result is the last line
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def summarize(samples, metric):
+    values = sorted(s[metric] for s in samples)
+    return {
+        'median': statistics.median(values),
+        'p90': values[min(int(len(values) * 0.9), len(values) - 1)],
+        'min': values[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold-start init time per Lambda handler')
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters per handler')
+    parser.add_argument('--handlers', default=','.join(HANDLERS), help='Comma-separated handler modules')
+    parser.add_argument('--output-dir', default='bench_results')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'handler':<26} {'init ms':>10} {'p90':>8} {'clients ms':>11} {'imports':>8}  boto3 at init")
+    print("=" * 80)
+    for handler in [h for h in args.handlers.split(',') if h]:
+        samples = [probe(handler) for _ in range(args.runs)]
+        results[handler] = {
+            'init_ms': summarize(samples, 'init_ms'),
+            'clients_ms': summarize(samples, 'clients_ms'),
+            'clients': samples[0]['clients'],
+            'boto3_at_init': samples[0]['boto3_at_init'],
+            'imports': samples[0]['imports']
+        }
+        r = results[handler]
+        print(f"{handler:<26} {r['init_ms']['median']:>10.1f} {r['init_ms']['p90']:>8.1f} "
+              f"{r['clients_ms']['median']:>11.1f} {r['imports']:>8}  {'yes' if r['boto3_at_init'] else 'no'}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    commit = git_commit()
+    output_path = os.path.join(args.output_dir, f"cold_start_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{commit}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.utcnow().isoformat(),
+                'git_commit': commit,
+                'python': platform.python_version(),
+                'runs': args.runs
+            },
+            'handlers': results
+        }, f, indent=2)
+    print(f"\n✅ Results saved to: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Synthetic Incident Log Generator
+
+Writes JSON-lines error logs in the same shape as sample_data/errors_json_native.log,
+with a controllable deploy-induced spike (ConnectionPoolExhaustedException on a
+bad deployment), from 10K up to 100M events. Output is streamed, so memory stays
+flat regardless of size.
+
+Usage:
+  python scripts/generate_incident_logs.py --events 1000000 --output incident_1m.log
+  python scripts/generate_incident_logs.py --events 100000 --spike-start 0.3 --spike-ratio 0.8 --gzip
+  python scripts/generate_incident_logs.py --events 100000 --call-chains   # multi-service traces
+"""
+
+import argparse
+import gzip
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+SERVICES = ['checkout', 'payment', 'auth', 'inventory', 'recommendation']
+ENDPOINTS = ['/checkout', '/items', '/pay', '/login', '/recommend']
+REGIONS = ['us-east-1', 'eu-west-1', 'ap-south-1']
+ERRORS = [
+    ('SQLTimeoutException', 'Query execution exceeded threshold'),
+    ('SocketTimeoutException', 'Downstream API did not respond'),
+    ('CacheMissException', 'Redis key not found'),
+    ('LLMContextLengthExceededException', 'prompt_tokens exceeded model limit'),
+    ('ConnectionPoolExhaustedException', 'HikariPool exhausted'),
+]
+SPIKE_ERROR = ('ConnectionPoolExhaustedException', 'HikariPool exhausted')
+DEPLOYMENTS = [(f"deploy_{1000 + i}", f"v{41 + i}") for i in range(11) if i != 9]
+# With --call-chains, spike failures start in the first service and propagate to its callers
+CALL_CHAIN = ['inventory', 'payment', 'checkout']
+UPSTREAM_ERROR = ('SocketTimeoutException', 'Downstream API did not respond')
+
+LINE = ('{{"timestamp": "{ts}", "level": "ERROR", "service": "{service}", "endpoint": "{endpoint}", '
+        '"region": "{region}", "trace_id": "{trace:016x}", "span_id": "{span:08x}", "latency_ms": {latency}, '
+        '"retry_count": {retries}, "error_type": "{error_type}", "error_message": "{error_type}: {message}", '
+        '"deployment_id": "{deployment_id}", "config_version": "{config_version}"}}\n')
+
+
+def generate_lines(events, start=datetime(2026, 2, 6, 10, 0, 0), duration_minutes=30,
+                   spike_start=0.5, spike_end=0.9, spike_ratio=0.75,
+                   spike_deployment=('deploy_1009', 'v40'), seed=42, call_chains=False):
+    """
+    Yield log lines. Between spike_start and spike_end (fractions of the run),
+    `spike_ratio` of events come from the bad deployment with critical latency.
+    With call_chains, each spike failure also times out its callers in the same
+    trace (CALL_CHAIN order), logged after it with more retries.
+    """
+    rng = random.Random(seed)
+    step = timedelta(minutes=duration_minutes) / max(events, 1)
+    spike_from = int(events * spike_start)
+    spike_to = int(events * spike_end)
+
+    for index in range(events):
+        ts = start + step * index
+        timestamp = ts.isoformat() + 'Z'
+        in_spike = spike_from <= index < spike_to and rng.random() < spike_ratio
+
+        if in_spike:
+            error_type, message = SPIKE_ERROR
+            deployment_id, config_version = spike_deployment
+            latency = rng.randint(2000, 4000)
+            retries = rng.choice((1, 2, 3, 3))
+        else:
+            error_type, message = rng.choice(ERRORS)
+            deployment_id, config_version = rng.choice(DEPLOYMENTS)
+            # Mostly fast failures with a small critical tail (~5%)
+            latency = int(rng.lognormvariate(6.0, 0.6)) if rng.random() > 0.05 else rng.randint(2000, 3000)
+            retries = rng.randint(0, 3)
+
+        service = rng.choice(SERVICES)
+        endpoint = rng.choice(ENDPOINTS)
+        region = rng.choice(REGIONS)
+        trace = rng.getrandbits(64)
+        yield LINE.format(
+            ts=timestamp,
+            service=CALL_CHAIN[0] if call_chains and in_spike else service,
+            endpoint=endpoint,
+            region=region,
+            trace=trace,
+            span=rng.getrandbits(32),
+            latency=latency,
+            retries=retries,
+            error_type=error_type,
+            message=message,
+            deployment_id=deployment_id,
+            config_version=config_version
+        )
+
+        if call_chains and in_spike:
+            for depth, caller in enumerate(CALL_CHAIN[1:rng.randint(1, len(CALL_CHAIN))], start=1):
+                latency += rng.randint(200, 800)
+                yield LINE.format(
+                    ts=(ts + timedelta(milliseconds=latency)).isoformat() + 'Z',
+                    service=caller,
+                    endpoint=endpoint,
+                    region=region,
+                    trace=trace,
+                    span=rng.getrandbits(32),
+                    latency=latency,
+                    retries=min(retries + depth, 3),
+                    error_type=UPSTREAM_ERROR[0],
+                    message=UPSTREAM_ERROR[1],
+                    deployment_id=deployment_id,
+                    config_version=config_version
+                )
+
+
+def write_log(path, events, compress=False, buffer_lines=10000, **kwargs):
+    """Stream generated lines to `path`; returns bytes written (uncompressed)."""
+    opener = gzip.open if compress else open
+    written = 0
+    buffer = []
+    with opener(path, 'wt', encoding='utf-8') as f:
+        for line in generate_lines(events, **kwargs):
+            buffer.append(line)
+            if len(buffer) >= buffer_lines:
+                chunk = ''.join(buffer)
+                f.write(chunk)
+                written += len(chunk)
+                buffer = []
+        chunk = ''.join(buffer)
+        f.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic incident logs')
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--output', default='synthetic_incident.log')
+    parser.add_argument('--duration-minutes', type=int, default=30)
+    parser.add_argument('--spike-start', type=float, default=0.5, help='Spike start as a fraction of the run')
+    parser.add_argument('--spike-end', type=float, default=0.9, help='Spike end as a fraction of the run')
+    parser.add_argument('--spike-ratio', type=float, default=0.75, help='Share of spike-window events from the bad deploy')
+    parser.add_argument('--spike-deployment', default='deploy_1009:v40', help='deployment_id:config_version')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--gzip', action='store_true', help='Write gzip-compressed output')
+    parser.add_argument('--call-chains', action='store_true', help='Spike failures propagate to callers in the same trace')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    written = write_log(
+        args.output,
+        args.events,
+        compress=args.gzip,
+        duration_minutes=args.duration_minutes,
+        spike_start=args.spike_start,
+        spike_end=args.spike_end,
+        spike_ratio=args.spike_ratio,
+        spike_deployment=tuple(args.spike_deployment.split(':', 1)),
+        seed=args.seed,
+        call_chains=args.call_chains
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ Wrote {args.events:,} events ({written / 1e6:.1f} MB) to {args.output}", file=sys.stderr)
+    print(f"   {args.events / elapsed:,.0f} events/s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Query the RCA report index
+
+Reads the index segments (all of them, or from the day of --since on) or a
+saved local copy, and filters them in memory.
+
+Usage:
+  python scripts/query_report_index.py --bucket hackathon-team14-bucket --deployment deploy_1009
+  python scripts/query_report_index.py --bucket hackathon-team14-bucket --save index.jsonl.gz
+  python scripts/query_report_index.py --index-file index.jsonl.gz --min-confidence 0.8 --text pool
+  python scripts/query_report_index.py --bucket hackathon-team14-bucket --incident abc12345 --show markdown
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Lambda_functions'))
+
+from report_store import REPORT_INDEX_PREFIX, ReportStore, parse_index, query_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the RCA report index')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--bucket', help='Reports bucket (reads the index segments)')
+    source.add_argument('--index-file', help='Local copy of the index')
+    parser.add_argument('--index-prefix', default=REPORT_INDEX_PREFIX)
+    parser.add_argument('--save', help='Also save the downloaded index to this path')
+    parser.add_argument('--incident', help='incident_id')
+    parser.add_argument('--deployment', help='deployment_id')
+    parser.add_argument('--min-confidence', type=float)
+    parser.add_argument('--since', help='ISO timestamp lower bound')
+    parser.add_argument('--text', help='Substring of the root cause')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--show', metavar='FORMAT', help='Print the newest match in this format (needs --bucket)')
+    parser.add_argument('--json', action='store_true', help='Print matches as JSON lines')
+    args = parser.parse_args()
+
+    store = None
+    if args.bucket:
+        from aws_clients import get_client
+        store = ReportStore(get_client('s3'), args.bucket, index_prefix=args.index_prefix)
+        data = store.load_index(since=args.since)
+        if args.save:
+            with open(args.save, 'wb') as f:
+                f.write(data)
+    else:
+        with open(args.index_file, 'rb') as f:
+            data = f.read()
+
+    entries = parse_index(data)
+    matches = query_index(
+        entries,
+        incident_id=args.incident,
+        deployment_id=args.deployment,
+        min_confidence=args.min_confidence,
+        since=args.since,
+        text=args.text,
+        limit=args.limit
+    )
+
+    if args.json:
+        for entry in matches:
+            print(json.dumps(entry))
+    else:
+        print(f"🔎 {len(matches)} of {len(entries)} indexed reports ({len(data)} bytes index)")
+        for entry in matches:
+            print(f"   {entry['timestamp'][:19]}  {entry['incident_id']:<12} {entry.get('deployment_id') or '-':<14} "
+                  f"{entry.get('confidence', 0):>4.0%}  {entry['root_cause'][:70]}")
+
+    if args.show and matches:
+        if store is None:
+            parser.error('--show needs --bucket')
+        key = matches[0]['keys'].get(args.show)
+        if not key:
+            parser.error(f"no {args.show} report stored for {matches[0]['incident_id']}")
+        print(store.get_report(key))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Incident Replay Harness
+
+Replays a corpus of recorded incidents through the full handler chain
+(process_logs -> agents -> Commander -> report) offline, against the in-memory
+AWS stand-ins, and reports for each incident and overall:
+  - root-cause correctness against the incident's label
+  - per-stage latency percentiles (p50/p90/p99 over --repeat runs)
+  - Claude token usage (estimated from the recorded prompts and responses)
+Results are written as JSON so a change to prompts, agents or synthesis can be
+compared with the previous run; --compare exits non-zero on an accuracy drop
+or latency regression.
+
+Each incident is a directory under --corpus with an incident.json:
+
+  {
+    "name": "...",
+    "log_file": "path/to/events.log",          (relative to the incident directory)
+    "generate": {"events": 6000, ...},          (or: generate_incident_logs.write_log arguments)
+    "deployments": [...],                       (optional deployment history for the DeployAgent)
+    "bedrock_response": "bedrock_response.json",  (optional recorded Claude response;
+                                                   without one, synthesis is rule-based)
+    "label": {"deployment_id": "...", "error_type": "...", "root_cause_keywords": ["..."]}
+  }
+
+Usage:
+  python scripts/replay_incidents.py
+  python scripts/replay_incidents.py --repeat 5 --compare replay_results/baseline.json
+"""
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, '..', 'Lambda_functions'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+# Every replay must reach the Commander's synthesis, not an earlier run's answer
+os.environ.setdefault('LLM_CACHE_ENABLED', 'false')
+os.environ.setdefault('QUERY_CACHE_ENABLED', 'false')
+
+from generate_incident_logs import write_log
+from local_pipeline import LocalAWS, run_pipeline
+from prompt_compaction import estimate_tokens
+from run_benchmarks import git_commit
+
+DEFAULT_CORPUS = os.path.join(SCRIPTS_DIR, '..', 'sample_data', 'incidents')
+PERCENTILES = (50, 90, 99)
+# Stages faster than this are dominated by timer noise when comparing
+MIN_COMPARED_MS = 5
+
+
+def load_corpus(corpus_dir):
+    incidents = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, '*', 'incident.json'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            incident = json.load(f)
+        incident['dir'] = os.path.dirname(path)
+        incident.setdefault('name', os.path.basename(incident['dir']))
+        incidents.append(incident)
+    return incidents
+
+
+def incident_logs(incident, workdir):
+    """Raw log bytes for an incident, generating them if the incident is synthetic."""
+    if 'generate' in incident:
+        params = dict(incident['generate'])
+        path = os.path.join(workdir, f"{incident['name']}.log")
+        if 'spike_deployment' in params:
+            params['spike_deployment'] = tuple(params['spike_deployment'])
+        write_log(path, params.pop('events'), **params)
+    else:
+        path = os.path.join(incident['dir'], incident['log_file'])
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def recorded_response(incident):
+    if not incident.get('bedrock_response'):
+        return None
+    with open(os.path.join(incident['dir'], incident['bedrock_response']), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def score(commander, label):
+    """{check: passed} for the Commander's root cause against the incident label."""
+    root_cause = (commander.get('root_cause') or '').lower()
+    checks = {}
+    if label.get('deployment_id'):
+        checks['deployment'] = label['deployment_id'].lower() in root_cause
+    if label.get('error_type'):
+        checks['error_type'] = label['error_type'].lower() in root_cause
+    if label.get('root_cause_keywords'):
+        checks['keywords'] = all(k.lower() in root_cause for k in label['root_cause_keywords'])
+    return checks
+
+
+def agent_attribution(agent_outputs, label):
+    """{agent: whether it named the labelled deployment}, for the attribution agents."""
+    named = {}
+    for output in agent_outputs:
+        findings = output.get('findings', {}) or {}
+        if output.get('agent') == 'LogsAgent':
+            named['LogsAgent'] = findings.get('deployment_correlation', {}).get('deployment_id')
+        elif output.get('agent') == 'DeployAgent':
+            named['DeployAgent'] = findings.get('correlation', {}).get('deployment_id')
+    return {agent: deployment == label.get('deployment_id') for agent, deployment in named.items()}
+
+
+def replay(incident, log_data, bedrock_response):
+    aws = LocalAWS(bedrock_response=bedrock_response)
+    overrides = {'deployments': incident['deployments']} if incident.get('deployments') else None
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        result = run_pipeline(log_data, aws=aws, key=f"{incident['name']}.log", investigation_overrides=overrides)
+
+    commander = result.get('commander', {})
+    bedrock = aws.clients['bedrock-runtime']
+    checks = score(commander, incident.get('label', {}))
+    return {
+        'root_cause': commander.get('root_cause'),
+        'confidence': commander.get('confidence'),
+        'synthesis': commander.get('synthesis'),
+        'checks': checks,
+        'correct': bool(checks) and all(checks.values()),
+        'agents': agent_attribution(result.get('agent_outputs', []), incident.get('label', {})),
+        'timings_ms': result['timings'],
+        'tokens': {
+            'llm_calls': bedrock.calls,
+            'input': sum(estimate_tokens(prompt) for prompt in bedrock.prompts),
+            'output': estimate_tokens(bedrock_response) * bedrock.calls if bedrock_response else 0,
+            'prompt_estimate': commander.get('prompt_stats', {}).get('estimated_input_tokens', 0)
+        }
+    }
+
+
+def percentile(values, q):
+    """Nearest-rank percentile."""
+    values = sorted(values)
+    if not values:
+        return 0
+    return values[min(len(values) - 1, max(0, -(-q * len(values) // 100) - 1))]
+
+
+def latency_summary(runs):
+    stages = sorted({stage for run in runs for stage in run['timings_ms']})
+    return {
+        stage: {
+            f"p{q}_ms": round(percentile([run['timings_ms'][stage] for run in runs if stage in run['timings_ms']], q), 2)
+            for q in PERCENTILES
+        }
+        for stage in stages
+    }
+
+
+def run(incidents, repeat, workdir):
+    entries = []
+    for incident in incidents:
+        log_data = incident_logs(incident, workdir)
+        bedrock_response = recorded_response(incident)
+        runs = [replay(incident, log_data, bedrock_response) for _ in range(repeat)]
+
+        correct = sum(run['correct'] for run in runs)
+        entry = {
+            'name': incident['name'],
+            'label': incident.get('label', {}),
+            'root_cause': runs[-1]['root_cause'],
+            'synthesis': runs[-1]['synthesis'],
+            'checks': runs[-1]['checks'],
+            'agents': runs[-1]['agents'],
+            'accuracy': correct / len(runs),
+            'latency': latency_summary(runs),
+            'tokens': runs[-1]['tokens']
+        }
+        entries.append(entry)
+
+        marker = '✅' if correct == len(runs) else '❌'
+        failed = [check for check, passed in entry['checks'].items() if not passed]
+        print(f"{marker} {incident['name']}: {correct}/{len(runs)} correct ({entry['synthesis']})"
+              + (f", failed {', '.join(failed)}" if failed else ''))
+        print(f"   root cause: {entry['root_cause']}")
+        end_to_end = entry['latency']['end_to_end_ms']
+        print(f"   end-to-end: p50 {end_to_end['p50_ms']:.0f} ms, p99 {end_to_end['p99_ms']:.0f} ms; "
+              f"tokens: {entry['tokens']['input']} in / {entry['tokens']['output']} out "
+              f"({entry['tokens']['llm_calls']} LLM calls)")
+    return entries
+
+
+def summarize(entries):
+    if not entries:
+        return {'incidents': 0, 'accuracy': 0.0, 'agent_accuracy': {}, 'input_tokens': 0, 'output_tokens': 0}
+    agents = sorted({agent for entry in entries for agent in entry['agents']})
+    return {
+        'incidents': len(entries),
+        'accuracy': round(sum(entry['accuracy'] for entry in entries) / len(entries), 4),
+        'agent_accuracy': {
+            agent: round(sum(entry['agents'].get(agent, False) for entry in entries) / len(entries), 4)
+            for agent in agents
+        },
+        'input_tokens': sum(entry['tokens']['input'] for entry in entries),
+        'output_tokens': sum(entry['tokens']['output'] for entry in entries)
+    }
+
+
+def compare(current, summary, baseline_path, threshold):
+    """Print accuracy and latency changes against a previous results file; return the regressions."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {entry['name']: entry for entry in baseline['incidents']}
+
+    regressions = []
+    print(f"\n📈 Comparison with {baseline_path}")
+    before, after = baseline['summary']['accuracy'], summary['accuracy']
+    print(f"   {'🔴' if after < before else '  '} accuracy {before:.0%} -> {after:.0%}")
+    if after < before:
+        regressions.append(('*', 'accuracy', after - before))
+
+    for entry in current:
+        old = previous.get(entry['name'])
+        if not old:
+            continue
+        if entry['accuracy'] < old['accuracy']:
+            print(f"   🔴 {entry['name']:<28} accuracy {old['accuracy']:.0%} -> {entry['accuracy']:.0%}")
+            regressions.append((entry['name'], 'accuracy', entry['accuracy'] - old['accuracy']))
+        for stage, stats in entry['latency'].items():
+            was = old['latency'].get(stage, {}).get('p90_ms')
+            now = stats['p90_ms']
+            if not was or max(was, now) < MIN_COMPARED_MS:
+                continue
+            change = (now - was) / was
+            marker = '🔴' if change > threshold else '🟢' if change < -threshold else '  '
+            print(f"   {marker} {entry['name']:<28} {stage + ' p90':<36} {was:>10.1f} -> {now:>10.1f} ({change:+.0%})")
+            if change > threshold:
+                regressions.append((entry['name'], stage, change))
+        was, now = old['tokens']['input'], entry['tokens']['input']
+        if was and (now - was) / was > threshold:
+            print(f"   🔴 {entry['name']:<28} {'input tokens':<36} {was:>10} -> {now:>10}")
+            regressions.append((entry['name'], 'input_tokens', (now - was) / was))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded incidents and score the investigations')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='Directory of incident directories')
+    parser.add_argument('--only', help='Comma-separated incident names to replay')
+    parser.add_argument('--repeat', type=int, default=3, help='Replays per incident (for latency percentiles)')
+    parser.add_argument('--output-dir', default='replay_results')
+    parser.add_argument('--compare', help='Previous results JSON to compare against')
+    parser.add_argument('--fail-threshold', type=float, default=0.25,
+                        help='Relative p90 latency or token increase that fails the run when comparing')
+    args = parser.parse_args()
+
+    incidents = load_corpus(args.corpus)
+    if args.only:
+        wanted = set(args.only.split(','))
+        incidents = [incident for incident in incidents if incident['name'] in wanted]
+    if not incidents:
+        print(f"❌ No incidents found in {args.corpus}")
+        sys.exit(1)
+
+    print(f"🎬 Replaying {len(incidents)} incidents x {args.repeat}")
+    with tempfile.TemporaryDirectory() as workdir:
+        entries = run(incidents, max(args.repeat, 1), workdir)
+    summary = summarize(entries)
+    print(f"\n🎯 Accuracy: {summary['accuracy']:.0%} over {summary['incidents']} incidents "
+          f"(agents: {', '.join(f'{a} {v:.0%}' for a, v in summary['agent_accuracy'].items())})")
+
+    results = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat
+        },
+        'summary': summary,
+        'incidents': entries
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"replay_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{results['meta']['git_commit']}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"✅ Results saved to: {output_path}")
+
+    if args.compare:
+        regressions = compare(entries, summary, args.compare, args.fail_threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions against {args.compare}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
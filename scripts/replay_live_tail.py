@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Replay CloudWatch Logs subscription / Kinesis payloads through the live-tail
+handler locally (no AWS account needed) and report time-to-trigger.
+
+Usage:
+  # Record subscription deliveries from a log file, then replay them
+  python scripts/replay_live_tail.py --log-file sample_data/errors_json_native.log --record payloads.jsonl
+  python scripts/replay_live_tail.py --payloads payloads.jsonl
+  # Payloads captured from real Lambda invocations (one event per line) work the same way
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Lambda_functions'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+os.environ.setdefault('LLM_CACHE_ENABLED', 'false')
+
+from local_pipeline import run_live_tail, subscription_events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay live-tail payloads in-process')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--log-file', help='JSON-lines log file to split into subscription deliveries')
+    source.add_argument('--payloads', help='Recorded Lambda events, one JSON object per line')
+    parser.add_argument('--batch-events', type=int, default=500, help='Log events per delivery (with --log-file)')
+    parser.add_argument('--record', help='Save the generated deliveries to this file and exit')
+    parser.add_argument('--no-stop', action='store_true', help='Keep replaying after the investigation starts')
+    parser.add_argument('--output', default='live_tail_output.json')
+    args = parser.parse_args()
+
+    if args.log_file:
+        with open(args.log_file, 'rb') as f:
+            events = subscription_events(f.read(), batch_events=args.batch_events)
+    else:
+        with open(args.payloads, 'r', encoding='utf-8') as f:
+            events = [json.loads(line) for line in f if line.strip()]
+
+    if args.record:
+        with open(args.record, 'w', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event) + '\n')
+        print(f"✅ Recorded {len(events)} deliveries to: {args.record}")
+        return
+
+    result = run_live_tail(events, stop_at_trigger=not args.no_stop)
+
+    print("\n⏱️  Live tail")
+    print("=" * 60)
+    trigger = result.get('trigger')
+    if trigger:
+        print(f"   Triggered at delivery {trigger['batch']} of {len(events)}, "
+              f"after {trigger['events_ingested']} events ({trigger['elapsed_ms']:.1f} ms)")
+    else:
+        print(f"   No investigation triggered ({result['events_ingested']} events)")
+    for stage, elapsed_ms in result['timings'].items():
+        print(f"   {stage:<32} {elapsed_ms:>10.1f} ms")
+
+    commander = result.get('commander')
+    if commander:
+        print(f"\n🎯 Root cause: {commander.get('root_cause')}")
+        print(f"   Confidence: {commander.get('confidence', 0):.0%} ({commander.get('synthesis', 'llm')})")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, default=str)
+    print(f"\n✅ Output saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+End-to-End Benchmark Suite
+
+Generates synthetic incident logs at each requested size and measures, against
+the in-process pipeline and in-memory AWS stand-ins:
+  - log generation and JSON parse throughput
+  - ingestion (lambda_process_logs) time and put_log_events batching
+  - per-agent analysis time, Commander time and prompt size
+  - report generation time
+Results are written as JSON so runs can be compared between versions.
+
+Usage:
+  python scripts/run_benchmarks.py --sizes 10000,100000
+  python scripts/run_benchmarks.py --sizes 10000 --compare bench_results/baseline.json
+  python scripts/run_benchmarks.py --sizes 100000000 --pipeline-max 0   # parse-only at 100M
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, '..', 'Lambda_functions'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+os.environ.setdefault('LLM_CACHE_ENABLED', 'false')
+
+from generate_incident_logs import write_log
+from local_pipeline import LocalAWS, run_pipeline
+
+# Metrics where a higher value is better; everything else timed is lower-is-better
+HIGHER_IS_BETTER = ('events_per_s', 'mb_per_s')
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def bench_parse(path):
+    """Line-by-line JSON parse, as lambda_process_logs does."""
+    started = time.perf_counter()
+    events = 0
+    size = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            size += len(line)
+            try:
+                json.loads(line)
+                events += 1
+            except ValueError:
+                continue
+    elapsed = time.perf_counter() - started
+    return {
+        'seconds': elapsed,
+        'events_per_s': events / elapsed,
+        'mb_per_s': size / 1e6 / elapsed
+    }
+
+
+def bench_pipeline(path, bedrock_response):
+    with open(path, 'rb') as f:
+        log_data = f.read()
+
+    aws = LocalAWS(bedrock_response=bedrock_response)
+    # Handler logging is part of real cost but would drown the benchmark output
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        result = run_pipeline(log_data, aws=aws)
+
+    commander = result.get('commander', {})
+    return {
+        'timings_ms': result['timings'],
+        'aws_calls': result['aws_calls'],
+        'put_log_events_batches': sum(
+            1 for stream in aws.clients['logs'].streams.values() for _ in range(0, len(stream), 10000)
+        ),
+        'prompt': commander.get('prompt_stats', {}),
+        'synthesis': commander.get('synthesis'),
+        'root_cause': commander.get('root_cause')
+    }
+
+
+def run(sizes, pipeline_max, repeat, bedrock_response, workdir):
+    runs = []
+    for events in sizes:
+        path = os.path.join(workdir, f"bench_{events}.log")
+        started = time.perf_counter()
+        size = write_log(path, events)
+        generate_seconds = time.perf_counter() - started
+        print(f"📦 {events:,} events ({size / 1e6:.1f} MB) generated in {generate_seconds:.1f}s")
+
+        entry = {
+            'events': events,
+            'bytes': size,
+            'generate': {'seconds': generate_seconds, 'events_per_s': events / generate_seconds},
+            'parse': min((bench_parse(path) for _ in range(repeat)), key=lambda r: r['seconds'])
+        }
+        print(f"   parse: {entry['parse']['events_per_s']:,.0f} events/s ({entry['parse']['mb_per_s']:.1f} MB/s)")
+
+        if events <= pipeline_max:
+            entry['pipeline'] = min(
+                (bench_pipeline(path, bedrock_response) for _ in range(repeat)),
+                key=lambda r: r['timings_ms']['end_to_end_ms']
+            )
+            timings = entry['pipeline']['timings_ms']
+            print(f"   pipeline: {timings['end_to_end_ms']:.0f} ms end-to-end "
+                  f"(ingest {timings['lambda_process_logs_ms']:.0f} ms, "
+                  f"agents {timings.get('agents_parallel_ms', 0):.0f} ms, "
+                  f"commander {timings.get('agent_commander_ms', 0):.0f} ms, "
+                  f"report {timings.get('lambda_generate_report_ms', 0):.0f} ms)")
+            print(f"   prompt: ~{entry['pipeline']['prompt'].get('estimated_input_tokens', 0)} tokens")
+
+        os.remove(path)
+        runs.append(entry)
+    return runs
+
+
+def flatten(entry, prefix=''):
+    flat = {}
+    for key, value in entry.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current, baseline_path, threshold):
+    """Print metric changes against a previous results file; return the regressions."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {run['events']: flatten(run) for run in json.load(f)['runs']}
+
+    regressions = []
+    print(f"\n📈 Comparison with {baseline_path}")
+    for run in current:
+        previous = baseline.get(run['events'])
+        if not previous:
+            continue
+        for metric, value in flatten(run).items():
+            before = previous.get(metric)
+            if not before or not metric.endswith(('_ms', 'seconds', 'events_per_s', 'mb_per_s', 'tokens')):
+                continue
+            if metric.endswith('_ms') and max(before, value) < 5:
+                # Sub-5ms stages are dominated by timer noise
+                continue
+            change = (value - before) / before
+            worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+            marker = '🔴' if worse > threshold else '🟢' if worse < -threshold else '  '
+            print(f"   {marker} {run['events']:>12,} {metric:<45} {before:>12.1f} -> {value:>12.1f} ({change:+.0%})")
+            if worse > threshold:
+                regressions.append((run['events'], metric, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the end-to-end benchmark suite')
+    parser.add_argument('--sizes', default='10000,100000', help='Comma-separated event counts')
+    parser.add_argument('--pipeline-max', type=int, default=1000000,
+                        help='Largest size to run through the full in-memory pipeline')
+    parser.add_argument('--repeat', type=int, default=1, help='Repetitions per size (best is kept)')
+    parser.add_argument('--bedrock-response', help='File with a recorded Claude response text')
+    parser.add_argument('--output-dir', default='bench_results')
+    parser.add_argument('--compare', help='Previous results JSON to compare against')
+    parser.add_argument('--fail-threshold', type=float, default=0.2,
+                        help='Relative regression that fails the run when comparing')
+    args = parser.parse_args()
+
+    bedrock_response = None
+    if args.bedrock_response:
+        with open(args.bedrock_response, 'r', encoding='utf-8') as f:
+            bedrock_response = f.read()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    with tempfile.TemporaryDirectory() as workdir:
+        runs = run(sizes, args.pipeline_max, args.repeat, bedrock_response, workdir)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'runs': runs
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"bench_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{results['meta']['git_commit']}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\n✅ Results saved to: {output_path}")
+
+    if args.compare:
+        regressions = compare(runs, args.compare, args.fail_threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} metrics regressed by more than {args.fail_threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
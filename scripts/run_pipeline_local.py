@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Run the full incident pipeline locally (no AWS account needed)
+
+Usage:
+  python scripts/run_pipeline_local.py sample_data/errors_json_native.log
+  python scripts/run_pipeline_local.py logs.log --concurrency asyncio --bedrock-response claude.json
+  python scripts/run_pipeline_local.py logs.log --early-exit --agent-delay agent_metrics=5
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Lambda_functions'))
+
+# boto3 still builds its (unused) default clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+os.environ.setdefault('LLM_CACHE_ENABLED', 'false')
+
+from local_pipeline import LocalAWS, run_pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the incident pipeline in-process')
+    parser.add_argument('log_file', help='JSON-lines log file to ingest')
+    parser.add_argument('--concurrency', choices=['threads', 'asyncio'], default='threads')
+    parser.add_argument('--bedrock-response', help='File with a recorded Claude response text')
+    parser.add_argument('--bedrock-latency', type=float, default=0.0, help='Simulated Bedrock latency (s)')
+    parser.add_argument('--early-exit', action='store_true',
+                        help='Run the Commander next to the agents, synthesizing once the evidence gate is met')
+    parser.add_argument('--agent-delay', action='append', default=[], metavar='AGENT=SECONDS',
+                        help='Simulated extra latency for an agent (repeatable), e.g. agent_metrics=5')
+    parser.add_argument('--output', default='local_pipeline_output.json')
+    args = parser.parse_args()
+
+    bedrock_response = None
+    if args.bedrock_response:
+        with open(args.bedrock_response, 'r', encoding='utf-8') as f:
+            bedrock_response = f.read()
+
+    agent_delays = {}
+    for item in args.agent_delay:
+        agent, _, seconds = item.partition('=')
+        agent_delays[agent] = float(seconds)
+
+    with open(args.log_file, 'rb') as f:
+        log_data = f.read()
+
+    aws = LocalAWS(bedrock_response=bedrock_response, bedrock_latency_seconds=args.bedrock_latency)
+    result = run_pipeline(log_data, aws=aws, key=os.path.basename(args.log_file), concurrency=args.concurrency,
+                          early_exit=args.early_exit, agent_delays=agent_delays)
+
+    print("\n⏱️  Stage timings")
+    print("=" * 60)
+    for stage, elapsed_ms in result['timings'].items():
+        print(f"   {stage:<32} {elapsed_ms:>10.1f} ms")
+    print(f"   AWS calls: {result['aws_calls']}")
+
+    commander = result.get('commander')
+    if commander:
+        print(f"\n🎯 Root cause: {commander.get('root_cause')}")
+        print(f"   Confidence: {commander.get('confidence', 0):.0%} ({commander.get('synthesis', 'llm')})")
+        board = commander.get('evidence_board')
+        if board and board['preliminary']:
+            print(f"   First RCA after {board['time_to_first_rca_ms']}ms from {', '.join(board['preliminary']['agents'])}"
+                  f"{', refined with ' + ', '.join(board['late_agents']) if board['refined'] else ''}")
+    else:
+        print("\nℹ️  No investigation triggered")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, default=str)
+    print(f"\n✅ Output saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()